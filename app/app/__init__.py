@@ -15,7 +15,7 @@ def create_app(config_name=None):
     
     Args:
         config_name (str): Configuration environment (development, testing, production)
-        
+    
     Returns:
         Flask application instance
     """
@@ -49,6 +49,54 @@ def configure_app(app, config_name):
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev-key-do-not-use-in-production'),
         JWT_SECRET_KEY=os.environ.get('JWT_SECRET_KEY', 'jwt-dev-key-do-not-use-in-production'),
         DATABASE_URI=os.environ.get('DATABASE_URI', 'sqlite:///app.db'),
+        DATABASE_POOL_SIZE=int(os.environ.get('DATABASE_POOL_SIZE', 5)),
+        DATABASE_MAX_OVERFLOW=int(os.environ.get('DATABASE_MAX_OVERFLOW', 10)),
+        DATABASE_POOL_TIMEOUT=float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+        DATABASE_POOL_RECYCLE=int(os.environ.get('DATABASE_POOL_RECYCLE', 1800)),  # seconds
+        DATABASE_POOL_PRE_PING=os.environ.get('DATABASE_POOL_PRE_PING', 'true').lower() == 'true',
+        DATABASE_PROFILE=os.environ.get('DATABASE_PROFILE', 'default'),  # or 'sqlite-production'
+        DATABASE_READ_POOL_SIZE=int(os.environ.get('DATABASE_READ_POOL_SIZE', 8)),
+        SQLITE_CACHE_SIZE_KB=int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536)),
+        SQLITE_MMAP_SIZE=int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),  # 256 MB
+        SQLITE_BUSY_TIMEOUT_MS=int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        CONVERSATION_WRITE_BEHIND=os.environ.get('CONVERSATION_WRITE_BEHIND', 'false').lower() == 'true',
+        WRITE_BEHIND_MAX_QUEUE=int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', 1000)),
+        WRITE_BEHIND_BATCH_SIZE=int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 100)),
+        WRITE_BEHIND_FLUSH_INTERVAL_MS=int(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL_MS', 50)),
+        WRITE_BEHIND_ENQUEUE_TIMEOUT_MS=int(os.environ.get('WRITE_BEHIND_ENQUEUE_TIMEOUT_MS', 500)),
+        WRITE_BEHIND_DEAD_LETTER_PATH=os.environ.get('WRITE_BEHIND_DEAD_LETTER_PATH', 'write_behind_dead_letters.jsonl'),  # rows that could not be written
+        NLP_WARMUP_MODELS=os.environ.get('NLP_WARMUP_MODELS', ''),  # comma-separated model names or 'all'
+        NLP_MODEL_IDLE_TIMEOUT=float(os.environ.get('NLP_MODEL_IDLE_TIMEOUT', 0)),  # seconds, 0 keeps models loaded
+        NLP_INFERENCE_BACKEND=os.environ.get('NLP_INFERENCE_BACKEND', 'pytorch'),  # pytorch, int8, onnx or onnx-int8
+        NLP_ONNX_CACHE_DIR=os.environ.get('NLP_ONNX_CACHE_DIR'),  # default app/models/onnx
+        NLP_MODEL_SERVER_SOCKET=os.environ.get('NLP_MODEL_SERVER_SOCKET'),  # socket path, or 'default'
+        NLP_MODEL_SERVER_TIMEOUT=float(os.environ.get('NLP_MODEL_SERVER_TIMEOUT', 2.0)),
+        NLP_MODEL_SERVER_AUTHKEY=os.environ.get('NLP_MODEL_SERVER_AUTHKEY'),
+        NLP_SENTIMENT_BATCH_SIZE=int(os.environ.get('NLP_SENTIMENT_BATCH_SIZE', 0)),  # 0 or 1 disables batching
+        NLP_SENTIMENT_BATCH_WAIT_MS=float(os.environ.get('NLP_SENTIMENT_BATCH_WAIT_MS', 5)),
+        NLP_SENTIMENT_BATCH_MAX_QUEUE=int(os.environ.get('NLP_SENTIMENT_BATCH_MAX_QUEUE', 1024)),
+        NLP_SENTIMENT_BATCH_TIMEOUT=float(os.environ.get('NLP_SENTIMENT_BATCH_TIMEOUT', 5.0)),
+        PROVIDER_CONNECT_TIMEOUT=float(os.environ.get('PROVIDER_CONNECT_TIMEOUT', 3.05)),  # seconds
+        PROVIDER_READ_TIMEOUT=float(os.environ.get('PROVIDER_READ_TIMEOUT', 60)),  # seconds
+        PROVIDER_MAX_RETRIES=int(os.environ.get('PROVIDER_MAX_RETRIES', 2)),  # on 429, 5xx and connection errors
+        PROVIDER_BACKOFF_BASE=float(os.environ.get('PROVIDER_BACKOFF_BASE', 0.5)),  # seconds, doubled per retry
+        PROVIDER_BACKOFF_MAX=float(os.environ.get('PROVIDER_BACKOFF_MAX', 8)),  # seconds
+        PROVIDER_POOL_SIZE=int(os.environ.get('PROVIDER_POOL_SIZE', 10)),  # keep-alive connections per endpoint
+        NLP_ROUTING_WORKERS=int(os.environ.get('NLP_ROUTING_WORKERS', 32)),  # threads running fallback/hedged model calls
+        NLP_HEDGE_MIN_SAMPLES=int(os.environ.get('NLP_HEDGE_MIN_SAMPLES', 20)),  # latencies before a model's own p95 is used
+        NLP_HEDGE_DEFAULT_MS=float(os.environ.get('NLP_HEDGE_DEFAULT_MS', 2000)),
+        FALLBACK_CHAIN_CACHE_SIZE=int(os.environ.get('FALLBACK_CHAIN_CACHE_SIZE', 1024)),  # (model, user) chains; 0 disables
+        FALLBACK_CHAIN_CACHE_TTL=float(os.environ.get('FALLBACK_CHAIN_CACHE_TTL', 60)),  # seconds
+        NLP_BREAKER_WINDOW=int(os.environ.get('NLP_BREAKER_WINDOW', 20)),  # recent calls per model the rates are computed over
+        NLP_BREAKER_MIN_CALLS=int(os.environ.get('NLP_BREAKER_MIN_CALLS', 10)),
+        NLP_BREAKER_ERROR_RATE=float(os.environ.get('NLP_BREAKER_ERROR_RATE', 0.5)),
+        NLP_BREAKER_SLOW_CALL_MS=float(os.environ.get('NLP_BREAKER_SLOW_CALL_MS', 10000)),
+        NLP_BREAKER_SLOW_CALL_RATE=float(os.environ.get('NLP_BREAKER_SLOW_CALL_RATE', 0.5)),
+        NLP_BREAKER_OPEN_SECONDS=float(os.environ.get('NLP_BREAKER_OPEN_SECONDS', 30)),  # before half-open probes
+        NLP_BREAKER_HALF_OPEN_CALLS=int(os.environ.get('NLP_BREAKER_HALF_OPEN_CALLS', 1)),
+        NLP_CONCURRENCY_INITIAL_LIMIT=int(os.environ.get('NLP_CONCURRENCY_INITIAL_LIMIT', 16)),  # concurrent calls per model
+        NLP_CONCURRENCY_MIN_LIMIT=int(os.environ.get('NLP_CONCURRENCY_MIN_LIMIT', 1)),
+        NLP_CONCURRENCY_MAX_LIMIT=int(os.environ.get('NLP_CONCURRENCY_MAX_LIMIT', 64)),
         DEBUG=True if config_name == 'development' else False,
         TESTING=True if config_name == 'testing' else False,
         OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', ''),
@@ -70,6 +118,38 @@ def register_middleware(app):
 
 def register_extensions(app):
     """Register Flask extensions"""
+    # Database engine and session registry (one per process)
+    from app.database.db import init_app as init_database
+    init_database(app)
+    
+    # Background writer for tutor conversations (no-op unless enabled)
+    from app.database.write_behind import init_app as init_write_behind
+    init_write_behind(app)
+    
+    # Shared NLP models: loaded lazily, optionally warmed up and unloaded when idle
+    from app.models.model_registry import init_app as init_models
+    init_models(app)
+    
+    # Sentiment micro-batching (no-op unless NLP_SENTIMENT_BATCH_SIZE > 1)
+    from app.models.micro_batcher import init_app as init_batching
+    init_batching(app)
+    
+    # Pooled keep-alive HTTP clients for the AI model providers
+    from app.models.provider_transport import init_app as init_providers
+    init_providers(app)
+    
+    # Fallback and hedging across AI models (used by models with a routing policy)
+    from app.models.provider_router import init_app as init_routing
+    init_routing(app)
+    
+    # Resolved fallback chains of the routing policies
+    from app.database.fallback_cache import init_app as init_fallback_cache
+    init_fallback_cache(app)
+    
+    # Circuit breakers and AIMD concurrency limits per AI model
+    from app.models.circuit_breaker import init_app as init_breakers
+    init_breakers(app)
+    
     # JWT Manager
     jwt = JWTManager(app)
     
@@ -4,9 +4,9 @@ Dashboard routes for the Smart Learning with Personalized AI Tutor application
 
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.database.db import get_session, close_session
+from app.database.db import get_read_session, close_session
 from app.models.user import User, UserRole
-from app.models.learning import LearningSession, Conversation, Assessment
+from app.models.learning import LearningSession, Conversation, Assessment, AssessmentTag
 from sqlalchemy import func, desc
 import json
 import datetime
@@ -20,7 +20,7 @@ def get_overview():
     """Get an overview of user's learning activities"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user:
@@ -116,15 +116,21 @@ def get_progress():
     """Get user's learning progress"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user:
         close_session(session)
         return jsonify({'error': 'User not found'}), 404
     
-    # Get all assessments
-    assessments = session.query(Assessment).join(
+    # Get all scored assessments with their session subject and topic
+    assessments = session.query(
+        Assessment.timestamp,
+        Assessment.score,
+        Assessment.max_score,
+        LearningSession.subject,
+        LearningSession.topic
+    ).join(
         LearningSession
     ).filter(
         LearningSession.user_id == user_id,
@@ -138,35 +144,33 @@ def get_progress():
     for assessment in assessments:
         progress_data.append({
             'timestamp': assessment.timestamp.isoformat(),
-            'subject': assessment.learning_session.subject,
-            'topic': assessment.learning_session.topic,
+            'subject': assessment.subject,
+            'topic': assessment.topic,
             'score': assessment.score,
             'max_score': assessment.max_score,
             'percentage': (assessment.score / assessment.max_score * 100) if assessment.max_score else None
         })
     
-    # Get strengths and areas for improvement
-    strengths = {}
-    areas_for_improvement = {}
+    # Count strengths and areas for improvement across scored assessments
+    tag_counts = session.query(
+        AssessmentTag.kind,
+        AssessmentTag.tag,
+        func.count(AssessmentTag.id).label('count')
+    ).join(
+        LearningSession, LearningSession.id == AssessmentTag.learning_session_id
+    ).join(
+        Assessment, Assessment.id == AssessmentTag.assessment_id
+    ).filter(
+        LearningSession.user_id == user_id,
+        Assessment.score.isnot(None)
+    ).group_by(
+        AssessmentTag.kind, AssessmentTag.tag
+    ).order_by(
+        desc('count'), AssessmentTag.tag
+    ).all()
     
-    for assessment in assessments:
-        if assessment.strengths:
-            for strength in json.loads(assessment.strengths):
-                if strength in strengths:
-                    strengths[strength] += 1
-                else:
-                    strengths[strength] = 1
-        
-        if assessment.areas_for_improvement:
-            for area in json.loads(assessment.areas_for_improvement):
-                if area in areas_for_improvement:
-                    areas_for_improvement[area] += 1
-                else:
-                    areas_for_improvement[area] = 1
-    
-    # Sort by frequency
-    strengths = [{'area': k, 'count': v} for k, v in sorted(strengths.items(), key=lambda item: item[1], reverse=True)]
-    areas_for_improvement = [{'area': k, 'count': v} for k, v in sorted(areas_for_improvement.items(), key=lambda item: item[1], reverse=True)]
+    strengths = [{'area': tag, 'count': count} for kind, tag, count in tag_counts if kind == AssessmentTag.STRENGTH]
+    areas_for_improvement = [{'area': tag, 'count': count} for kind, tag, count in tag_counts if kind == AssessmentTag.IMPROVEMENT]
     
     # Get engagement metrics
     engagement_data = session.query(
@@ -208,7 +212,7 @@ def get_insights():
     """Get personalized insights for the user"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user:
@@ -324,7 +328,7 @@ def admin_overview():
     """Get an overview of all users and activities (admin only)"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user or user.role != UserRole.ADMIN:
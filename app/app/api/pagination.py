@@ -0,0 +1,157 @@
+"""
+Keyset pagination and NDJSON streaming for the Smart Learning with Personalized AI Tutor application
+
+Listings are ordered by (timestamp, id) and paged with a keyset cursor,
+``?after=<iso timestamp>,<id>&limit=<n>``, so deep pages cost the same as
+the first one. The next cursor is returned in the X-Next-Cursor header so
+the response body stays a plain JSON array. With ``?format=ndjson`` the rows are streamed one JSON
+object per line from a server-side cursor instead of being collected first.
+"""
+
+import datetime
+import json
+from flask import Response, jsonify, stream_with_context
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def encode_cursor(timestamp, row_id):
+    """
+    Build the cursor pointing just past a row
+    
+    Args:
+        timestamp (datetime): Row timestamp
+        row_id (int): Row ID
+    
+    Returns:
+        str: Cursor value for the ``after`` parameter
+    """
+    return f"{timestamp.isoformat()},{row_id}"
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor built by encode_cursor()
+    
+    Args:
+        cursor (str): Cursor value
+    
+    Returns:
+        tuple: (timestamp, id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    timestamp, separator, row_id = cursor.rpartition(',')
+    if not separator:
+        raise ValueError("Cursor must be '<timestamp>,<id>'")
+    return datetime.datetime.fromisoformat(timestamp), int(row_id)
+
+def parse_page_args(args):
+    """
+    Read the pagination parameters of a request
+    
+    Args:
+        args (MultiDict): Request query parameters
+    
+    Returns:
+        tuple: (cursor or None, limit or None, streaming flag). The limit is
+        only None for streaming requests without an explicit limit.
+    
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    streaming = args.get('format') == 'ndjson'
+    
+    cursor = None
+    if args.get('after'):
+        cursor = decode_cursor(args['after'])
+    
+    limit = args.get('limit')
+    if limit is None:
+        limit = None if streaming else DEFAULT_PAGE_SIZE
+    else:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        if not streaming:
+            limit = min(limit, MAX_PAGE_SIZE)
+    
+    return cursor, limit, streaming
+
+def keyset_filter(query, timestamp_column, id_column, cursor):
+    """
+    Order a query by (timestamp, id) and skip rows up to the cursor
+    
+    Args:
+        query (Query): Query to page
+        timestamp_column (Column): Timestamp ordering column
+        id_column (Column): Primary key, breaks timestamp ties
+        cursor (tuple): (timestamp, id) of the last row already seen, or None
+    
+    Returns:
+        Query: Ordered and filtered query
+    """
+    if cursor is not None:
+        timestamp, row_id = cursor
+        query = query.filter(or_(
+            timestamp_column > timestamp,
+            and_(timestamp_column == timestamp, id_column > row_id)
+        ))
+    return query.order_by(timestamp_column, id_column)
+
+def paginated_response(query, timestamp_attr, args, close):
+    """
+    Respond with one page or an NDJSON stream of a listing
+    
+    Args:
+        query (Query): Listing query for a single ORM entity with to_dict()
+        timestamp_attr (str): Name of the entity's ordering timestamp attribute
+        args (MultiDict): Request query parameters
+        close (callable): Releases the database session once the rows are sent
+    
+    Returns:
+        Response: JSON array page, NDJSON stream, or a 400 error
+    """
+    entity = query.column_descriptions[0]['entity']
+    timestamp_column = getattr(entity, timestamp_attr)
+    
+    try:
+        cursor, limit, streaming = parse_page_args(args)
+    except ValueError as e:
+        close()
+        return jsonify({'error': f'Invalid pagination parameters: {str(e)}'}), 400
+    
+    query = keyset_filter(query, timestamp_column, entity.id, cursor)
+    
+    if streaming:
+        if limit is not None:
+            query = query.limit(limit)
+        
+        def generate():
+            try:
+                for row in query.yield_per(STREAM_BATCH_SIZE):
+                    yield json.dumps(row.to_dict()) + '\n'
+            finally:
+                close()
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = [row.to_dict() for row in rows]
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_attr), last.id)
+    close()
+    
+    response = jsonify(data)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
\ No newline at end of file
@@ -4,10 +4,19 @@ Main API routes for the Smart Learning with Personalized AI Tutor application
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.database.db import get_session, close_session
+from sqlalchemy import func
+from app.database.db import get_session, get_read_session, close_session, writer_session, get_pool_metrics
+from app.database.write_behind import get_write_queue
+from app.api.pagination import paginated_response
 from app.models.user import User, UserProfile
-from app.models.learning import LearningSession, Conversation, Assessment
+from app.models.learning import LearningSession, Conversation, Assessment, ConversationTopic
 from app.models.nlp_processor import NLPProcessor
+from app.models.model_registry import model_registry
+from app.models.micro_batcher import get_sentiment_batcher
+from app.models.provider_transport import transport_metrics
+from app.models.provider_router import get_router
+from app.models.circuit_breaker import guard_states
+from app.database.fallback_cache import cache_info as fallback_cache_info
 from app.blockchain.blockchain_handler import BlockchainHandler
 import json
 import datetime
@@ -24,9 +33,25 @@ blockchain_handler = BlockchainHandler()
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    write_queue = get_write_queue()
+    sentiment_batcher = get_sentiment_batcher()
     return jsonify({
         'status': 'ok',
-        'timestamp': datetime.datetime.utcnow().isoformat()
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'database': get_pool_metrics(),
+        'write_behind': write_queue.metrics() if write_queue else None,
+        'nlp': {
+            'models': model_registry.stats(),
+            'sentiment_batcher': sentiment_batcher.metrics() if sentiment_batcher else None,
+            'token_cache': nlp_processor.token_cache_info(),
+            'response_cache': nlp_processor.response_cache_info(),
+            'semantic_cache': nlp_processor.semantic_cache_info(),
+            'knowledge_base': nlp_processor.knowledge_base_info(),
+            'routing': get_router().metrics(),
+            'fallback_chains': fallback_cache_info(),
+            'breakers': guard_states()
+        },
+        'providers': transport_metrics()
     })
 
 @api_bp.route('/user/<int:user_id>', methods=['GET'])
@@ -38,7 +63,7 @@ def get_user(user_id):
     if current_user_id != user_id:
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user:
@@ -139,21 +164,19 @@ def user_profile(user_id):
 @api_bp.route('/sessions', methods=['GET'])
 @jwt_required()
 def get_sessions():
-    """Get all learning sessions for the current user"""
+    """Get the learning sessions of the current user, one page at a time"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     user = session.query(User).filter_by(id=user_id).first()
     
     if not user:
         close_session(session)
         return jsonify({'error': 'User not found'}), 404
     
-    learning_sessions = session.query(LearningSession).filter_by(user_id=user_id).all()
-    sessions_data = [ls.to_dict() for ls in learning_sessions]
-    close_session(session)
-    
-    return jsonify(sessions_data)
+    # Keyset-paged by (start_time, id), or streamed with ?format=ndjson
+    query = session.query(LearningSession).filter_by(user_id=user_id)
+    return paginated_response(query, 'start_time', request.args, lambda: close_session(session))
 
 @api_bp.route('/sessions', methods=['POST'])
 @jwt_required()
@@ -215,7 +238,7 @@ def get_session_by_id(session_id):
     """Get a specific learning session"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     learning_session = session.query(LearningSession).filter_by(id=session_id).first()
     
     if not learning_session:
@@ -235,10 +258,10 @@ def get_session_by_id(session_id):
 @api_bp.route('/sessions/<int:session_id>/conversations', methods=['GET'])
 @jwt_required()
 def get_conversations(session_id):
-    """Get all conversations for a learning session"""
+    """Get the conversations of a learning session, one page at a time"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     learning_session = session.query(LearningSession).filter_by(id=session_id).first()
     
     if not learning_session:
@@ -250,11 +273,9 @@ def get_conversations(session_id):
         close_session(session)
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    conversations = session.query(Conversation).filter_by(learning_session_id=session_id).order_by(Conversation.timestamp).all()
-    conversations_data = [conv.to_dict() for conv in conversations]
-    close_session(session)
-    
-    return jsonify(conversations_data)
+    # Keyset-paged by (timestamp, id), or streamed with ?format=ndjson
+    query = session.query(Conversation).filter_by(learning_session_id=session_id)
+    return paginated_response(query, 'timestamp', request.args, lambda: close_session(session))
 
 @api_bp.route('/sessions/<int:session_id>/conversations', methods=['POST'])
 @jwt_required()
@@ -267,7 +288,8 @@ def create_conversation(session_id):
     if 'user_message' not in data:
         return jsonify({'error': 'Missing required field: user_message'}), 400
     
-    session = get_session()
+    # Reads go through the reader pool; the writer is only taken for the insert
+    session = get_read_session()
     learning_session = session.query(LearningSession).filter_by(id=session_id).first()
     
     if not learning_session:
@@ -282,21 +304,16 @@ def create_conversation(session_id):
     # Get user profile for personalization
     user = session.query(User).filter_by(id=user_id).first()
     user_profile = user.profile.to_dict() if user.profile else {}
+    close_session(session)
     
     # Process user message with NLP
     user_message = data['user_message']
     
-    # Extract topics from message
-    topics = nlp_processor.extract_topics(user_message)
-    
-    # Calculate sentiment score
-    sentiment_score = nlp_processor.analyze_sentiment(user_message)
-    
-    # Calculate engagement score
-    engagement_score = nlp_processor.calculate_engagement_score(user_message)
+    # Topics, sentiment and engagement from a single tokenization
+    analysis = nlp_processor.analyze_message(user_message)
     
     # Generate personalized AI response
-    ai_response = nlp_processor.generate_personalized_response(user_message, user_profile)
+    ai_response = nlp_processor.generate_personalized_response(user_message, user_profile, topics=analysis.topics, tokens=analysis.tokens)
     
     # Create new conversation
     from app.models.learning import CommunicationType
@@ -305,10 +322,10 @@ def create_conversation(session_id):
         communication_type=CommunicationType(data.get('communication_type', 'text')),
         user_message=user_message,
         ai_response=ai_response,
-        sentiment_score=sentiment_score,
-        topics_covered=json.dumps(topics),
-        user_engagement_score=engagement_score
+        sentiment_score=analysis.sentiment,
+        user_engagement_score=analysis.engagement
     )
+    conversation.set_topics(analysis.topics)
     
     # Store conversation data hash on blockchain
     conversation_data = {
@@ -321,11 +338,10 @@ def create_conversation(session_id):
     data_hash = blockchain_handler.get_hash(conversation_data)
     conversation.content_hash = data_hash
     
-    session.add(conversation)
-    session.commit()
-    
-    conversation_data = conversation.to_dict()
-    close_session(session)
+    with writer_session() as session:
+        session.add(conversation)
+        session.flush()
+        conversation_data = conversation.to_dict()
     
     return jsonify(conversation_data), 201
 
@@ -352,14 +368,23 @@ def end_session(session_id):
     learning_session.is_active = False
     
     # Generate session summary
-    conversations = session.query(Conversation).filter_by(learning_session_id=session_id).all()
-    topics_covered = set()
-    for conv in conversations:
-        if conv.topics_covered:
-            topics_covered.update(json.loads(conv.topics_covered))
+    topics_covered = [
+        topic for topic, count in session.query(
+            ConversationTopic.topic, func.count(ConversationTopic.id)
+        ).filter_by(
+            learning_session_id=session_id
+        ).group_by(
+            ConversationTopic.topic
+        ).order_by(
+            func.count(ConversationTopic.id).desc(), ConversationTopic.topic
+        ).all()
+    ]
+    interaction_count = session.query(func.count(Conversation.id)).filter_by(
+        learning_session_id=session_id
+    ).scalar()
     
     summary = f"Session covered the following topics: {', '.join(topics_covered)}. "
-    summary += f"Total of {len(conversations)} interactions."
+    summary += f"Total of {interaction_count} interactions."
     
     learning_session.session_summary = summary
     
@@ -404,10 +429,9 @@ def create_assessment(session_id):
         answers=json.dumps(data.get('answers', {})),
         score=data.get('score'),
         max_score=data.get('max_score'),
-        feedback=data.get('feedback', ''),
-        strengths=json.dumps(data.get('strengths', [])),
-        areas_for_improvement=json.dumps(data.get('areas_for_improvement', []))
+        feedback=data.get('feedback', '')
     )
+    assessment.set_feedback_tags(data.get('strengths', []), data.get('areas_for_improvement', []))
     
     session.add(assessment)
     session.commit()
@@ -423,7 +447,7 @@ def get_assessments(session_id):
     """Get all assessments for a learning session"""
     user_id = get_jwt_identity()
     
-    session = get_session()
+    session = get_read_session()
     learning_session = session.query(LearningSession).filter_by(id=session_id).first()
     
     if not learning_session:
@@ -2,13 +2,15 @@
 Tutor-specific routes for the Smart Learning with Personalized AI Tutor application
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.database.db import get_session, close_session
+from sqlalchemy import func
+from app.database.db import get_session, get_read_session, close_session, writer_session
+from app.database.write_behind import save_conversation
+from app.database.tutor_context import load_tutor_context
 from app.models.user import User, UserProfile
-from app.models.learning import LearningSession, Conversation, Assessment, CommunicationType
+from app.models.learning import LearningSession, Conversation, Assessment, CommunicationType, ConversationTopic
 from app.models.nlp_processor import NLPProcessor
-from app.models.ai_model import AIModel, UserAIModelPreference
 from app.blockchain.blockchain_handler import BlockchainHandler
 import json
 import datetime
@@ -16,6 +18,7 @@ import os
 import base64
 import tempfile
 import uuid
+import logging
 
 # Create blueprint
 tutor_bp = Blueprint('tutor', __name__, url_prefix='/tutor')
@@ -29,7 +32,13 @@ blockchain_handler = BlockchainHandler()
 @tutor_bp.route('/ask', methods=['POST'])
 @jwt_required()
 def ask_question():
-    """Ask a question to the AI tutor"""
+    """
+    Ask a question to the AI tutor
+    
+    With "stream": true the response is NDJSON: {"token": ...} objects while
+    the answer is generated, then {"done": true, "conversation": ...} once the
+    conversation is stored, or {"error": ...} if that fails.
+    """
     user_id = get_jwt_identity()
     data = request.json
     
@@ -39,122 +48,127 @@ def ask_question():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    session = get_session()
-    learning_session = session.query(LearningSession).filter_by(id=data['session_id']).first()
+    # Load session, profile, AI model and recent history in two queries
+    read_session = get_read_session()
+    context = load_tutor_context(
+        read_session,
+        data['session_id'],
+        user_id,
+        model_id=data.get('model_id')
+    )
+    close_session(read_session)
     
-    if not learning_session:
-        close_session(session)
+    if not context:
         return jsonify({'error': 'Session not found'}), 404
     
     # Check if user has permission to access this session
-    if learning_session.user_id != user_id:
-        close_session(session)
+    if context.owner_id != user_id:
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    # Get user profile for personalization
-    user = session.query(User).filter_by(id=user_id).first()
-    user_profile = user.profile.to_dict() if user.profile else {}
-    
     # Process user message with NLP
     user_message = data['message']
     
-    # Extract topics from message
-    topics = nlp_processor.extract_topics(user_message)
-    
-    # Calculate sentiment score
-    sentiment_score = nlp_processor.analyze_sentiment(user_message)
-    
-    # Calculate engagement score
-    engagement_score = nlp_processor.calculate_engagement_score(user_message)
-    
-    # Get previous conversations for context
-    previous_conversations = session.query(Conversation).filter_by(
-        learning_session_id=data['session_id']
-    ).order_by(Conversation.timestamp.desc()).limit(5).all()
-    
-    conversation_history = [
-        {
-            'user_message': conv.user_message,
-            'ai_response': conv.ai_response,
-            'timestamp': conv.timestamp.isoformat()
-        }
-        for conv in previous_conversations
-    ]
-    conversation_history.reverse()  # Chronological order
-    
-    # Get user's preferred AI model if available
-    ai_model = None
-    ai_model_preference = None
-    
-    # Check if specific model requested in this request
-    if 'model_id' in data:
-        ai_model = session.query(AIModel).filter_by(id=data['model_id'], is_active=True).first()
-        if ai_model:
-            ai_model_preference = session.query(UserAIModelPreference).filter_by(
-                user_id=user_id, 
-                ai_model_id=ai_model.id
-            ).first()
-    
-    # If no model specified, use user's default model
-    if not ai_model and user.profile and user.profile.default_ai_model_id:
-        ai_model = session.query(AIModel).filter_by(
-            id=user.profile.default_ai_model_id, 
-            is_active=True
-        ).first()
+    # Topics, sentiment and engagement from a single tokenization
+    analysis = nlp_processor.analyze_message(user_message)
+    
+    if data.get('stream'):
+        response_stream = nlp_processor.stream_personalized_response(
+            user_message,
+            context.user_profile,
+            list(context.conversation_history),
+            context.ai_model,
+            context.ai_model_preference,
+            topics=analysis.topics,
+            tokens=analysis.tokens,
+            fallback_models=context.fallback_models
+        )
         
-        if ai_model:
-            ai_model_preference = session.query(UserAIModelPreference).filter_by(
-                user_id=user_id, 
-                ai_model_id=ai_model.id
-            ).first()
+        def generate():
+            parts = []
+            try:
+                for token in response_stream:
+                    parts.append(token)
+                    yield json.dumps({'token': token}) + '\n'
+                
+                # The conversation is stored once the whole response is known
+                conversation_data = _store_conversation(data['session_id'], user_id, user_message, ''.join(parts), analysis, context.ai_model_info)
+                yield json.dumps({'done': True, 'conversation': conversation_data}) + '\n'
+            except Exception as e:
+                logging.error(f"Error streaming tutor response: {str(e)}")
+                yield json.dumps({'error': 'Failed to generate response'}) + '\n'
+        
+        # Disable proxy buffering so each line reaches the client when it is generated
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
     
     # Generate personalized AI response with specified AI model if available
     ai_response = nlp_processor.generate_personalized_response(
         user_message, 
-        user_profile,
-        conversation_history,
-        ai_model,
-        ai_model_preference
+        context.user_profile,
+        list(context.conversation_history),
+        context.ai_model,
+        context.ai_model_preference,
+        topics=analysis.topics,
+        tokens=analysis.tokens,
+        fallback_models=context.fallback_models
     )
-    
+
+    return jsonify(_store_conversation(data['session_id'], user_id, user_message, ai_response, analysis, context.ai_model_info))
+
+def _store_conversation(session_id, user_id, user_message, ai_response, analysis, ai_model_info=None,
+                        communication_type=CommunicationType.TEXT, media_url=None):
+    """
+    Build, hash and save the conversation of an answered question
+    
+    Args:
+        session_id (int): Learning session ID
+        user_id (int): ID of the asking user
+        user_message (str): User's message
+        ai_response (str): Complete AI response
+        analysis (MessageAnalysis): analyze_message() result of the user's message
+        ai_model_info (dict): Model that generated the response, added to the result
+        communication_type (CommunicationType): How the message was sent
+        media_url (str): Media attached to the conversation, if any
+    
+    Returns:
+        dict: Serialized conversation, with the AI model info if one was used
+    """
     # Create new conversation
     conversation = Conversation(
-        learning_session_id=data['session_id'],
-        communication_type=CommunicationType.TEXT,
+        learning_session_id=session_id,
+        communication_type=communication_type,
         user_message=user_message,
         ai_response=ai_response,
-        sentiment_score=sentiment_score,
-        topics_covered=json.dumps(topics),
-        user_engagement_score=engagement_score
+        media_url=media_url,
+        sentiment_score=analysis.sentiment,
+        user_engagement_score=analysis.engagement
     )
+    conversation.set_topics(analysis.topics)
     
     # Store conversation data hash on blockchain
     conversation_data = {
-        'session_id': data['session_id'],
+        'session_id': session_id,
         'user_id': user_id,
         'user_message': user_message,
-        'ai_response': ai_response,
-        'timestamp': datetime.datetime.utcnow().isoformat()
+        'ai_response': ai_response
     }
+    if media_url is not None:
+        conversation_data['media_url'] = media_url
+    conversation_data['timestamp'] = datetime.datetime.utcnow().isoformat()
     data_hash = blockchain_handler.get_hash(conversation_data)
     conversation.content_hash = data_hash
     
-    session.add(conversation)
-    session.commit()
-    
-    conversation_data = conversation.to_dict()
+    # Queued for the background writer when write-behind is enabled
+    conversation_data = save_conversation(conversation)
     
     # Add AI model info if used
-    if ai_model:
-        conversation_data['ai_model'] = {
-            'id': ai_model.id,
-            'name': ai_model.name,
-            'model_type': ai_model.model_type.value
-        }
-        
-    close_session(session)
+    if ai_model_info:
+        conversation_data['ai_model'] = ai_model_info
     
-    return jsonify(conversation_data)
+    return conversation_data
 
 @tutor_bp.route('/voice', methods=['POST'])
 @jwt_required()
@@ -171,22 +185,23 @@ def voice_interaction():
     if not session_id:
         return jsonify({'error': 'Missing session_id'}), 400
     
-    db_session = get_session()
-    learning_session = db_session.query(LearningSession).filter_by(id=session_id).first()
+    # Load session, profile, AI model and recent history in two queries
+    read_session = get_read_session()
+    context = load_tutor_context(
+        read_session,
+        session_id,
+        user_id,
+        model_id=request.form.get('model_id')
+    )
+    close_session(read_session)
     
-    if not learning_session:
-        close_session(db_session)
+    if not context:
         return jsonify({'error': 'Session not found'}), 404
     
     # Check if user has permission to access this session
-    if learning_session.user_id != user_id:
-        close_session(db_session)
+    if context.owner_id != user_id:
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    # Get user profile for personalization
-    user = db_session.query(User).filter_by(id=user_id).first()
-    user_profile = user.profile.to_dict() if user.profile else {}
-    
     # Read audio file
     audio_file = request.files['audio']
     audio_data = audio_file.read()
@@ -195,67 +210,21 @@ def voice_interaction():
     user_message = nlp_processor.speech_to_text(audio_data)
     
     if not user_message:
-        close_session(db_session)
         return jsonify({'error': 'Could not understand the audio'}), 400
     
-    # Extract topics from message
-    topics = nlp_processor.extract_topics(user_message)
-    
-    # Calculate sentiment score
-    sentiment_score = nlp_processor.analyze_sentiment(user_message)
-    
-    # Calculate engagement score
-    engagement_score = nlp_processor.calculate_engagement_score(user_message)
-    
-    # Get previous conversations for context
-    previous_conversations = db_session.query(Conversation).filter_by(
-        learning_session_id=session_id
-    ).order_by(Conversation.timestamp.desc()).limit(5).all()
-    
-    conversation_history = [
-        {
-            'user_message': conv.user_message,
-            'ai_response': conv.ai_response,
-            'timestamp': conv.timestamp.isoformat()
-        }
-        for conv in previous_conversations
-    ]
-    conversation_history.reverse()  # Chronological order
-    
-    # Get user's preferred AI model if available
-    ai_model = None
-    ai_model_preference = None
-    
-    # Check if specific model requested
-    model_id = request.form.get('model_id')
-    if model_id:
-        ai_model = db_session.query(AIModel).filter_by(id=model_id, is_active=True).first()
-        if ai_model:
-            ai_model_preference = db_session.query(UserAIModelPreference).filter_by(
-                user_id=user_id, 
-                ai_model_id=ai_model.id
-            ).first()
-    
-    # If no model specified, use user's default model
-    if not ai_model and user.profile and user.profile.default_ai_model_id:
-        ai_model = db_session.query(AIModel).filter_by(
-            id=user.profile.default_ai_model_id, 
-            is_active=True
-        ).first()
-        
-        if ai_model:
-            ai_model_preference = db_session.query(UserAIModelPreference).filter_by(
-                user_id=user_id, 
-                ai_model_id=ai_model.id
-            ).first()
+    # Topics, sentiment and engagement from a single tokenization
+    analysis = nlp_processor.analyze_message(user_message)
     
     # Generate personalized AI response
     ai_response = nlp_processor.generate_personalized_response(
         user_message, 
-        user_profile,
-        conversation_history,
-        ai_model,
-        ai_model_preference
+        context.user_profile,
+        list(context.conversation_history),
+        context.ai_model,
+        context.ai_model_preference,
+        topics=analysis.topics,
+        tokens=analysis.tokens,
+        fallback_models=context.fallback_models
     )
     
     # Convert text response to speech
@@ -272,46 +241,11 @@ def voice_interaction():
     with open(media_path, 'wb') as f:
         f.write(response_audio_data)
     
-    # Create new conversation
-    conversation = Conversation(
-        learning_session_id=session_id,
+    return jsonify(_store_conversation(
+        session_id, user_id, user_message, ai_response, analysis, context.ai_model_info,
         communication_type=CommunicationType.VOICE,
-        user_message=user_message,
-        ai_response=ai_response,
-        media_url=f"/media/{media_filename}",
-        sentiment_score=sentiment_score,
-        topics_covered=json.dumps(topics),
-        user_engagement_score=engagement_score
-    )
-    
-    # Store conversation data hash on blockchain
-    conversation_data = {
-        'session_id': session_id,
-        'user_id': user_id,
-        'user_message': user_message,
-        'ai_response': ai_response,
-        'media_url': f"/media/{media_filename}",
-        'timestamp': datetime.datetime.utcnow().isoformat()
-    }
-    data_hash = blockchain_handler.get_hash(conversation_data)
-    conversation.content_hash = data_hash
-    
-    db_session.add(conversation)
-    db_session.commit()
-    
-    conversation_data = conversation.to_dict()
-    
-    # Add AI model info if used
-    if ai_model:
-        conversation_data['ai_model'] = {
-            'id': ai_model.id,
-            'name': ai_model.name,
-            'model_type': ai_model.model_type.value
-        }
-    
-    close_session(db_session)
-    
-    return jsonify(conversation_data)
+        media_url=f"/media/{media_filename}"
+    ))
 
 @tutor_bp.route('/video', methods=['POST'])
 @jwt_required()
@@ -328,22 +262,18 @@ def video_interaction():
     if not session_id:
         return jsonify({'error': 'Missing session_id'}), 400
     
-    db_session = get_session()
-    learning_session = db_session.query(LearningSession).filter_by(id=session_id).first()
+    # Load session and profile; video messages do not use history
+    read_session = get_read_session()
+    context = load_tutor_context(read_session, session_id, user_id, history_limit=0)
+    close_session(read_session)
     
-    if not learning_session:
-        close_session(db_session)
+    if not context:
         return jsonify({'error': 'Session not found'}), 404
     
     # Check if user has permission to access this session
-    if learning_session.user_id != user_id:
-        close_session(db_session)
+    if context.owner_id != user_id:
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    # Get user profile for personalization
-    user = db_session.query(User).filter_by(id=user_id).first()
-    user_profile = user.profile.to_dict() if user.profile else {}
-    
     # Save video file
     video_file = request.files['video']
     filename = f"{uuid.uuid4()}.mp4"
@@ -356,49 +286,18 @@ def video_interaction():
     # For now, we'll use a placeholder message
     user_message = "This is a video message that would be processed for content."
     
-    # Extract topics from message
-    topics = nlp_processor.extract_topics(user_message)
-    
-    # Calculate sentiment score
-    sentiment_score = nlp_processor.analyze_sentiment(user_message)
-    
-    # Calculate engagement score
-    engagement_score = nlp_processor.calculate_engagement_score(user_message)
+    # Topics, sentiment and engagement from a single tokenization
+    analysis = nlp_processor.analyze_message(user_message)
     
     # Generate personalized AI response
-    ai_response = nlp_processor.generate_personalized_response(user_message, user_profile)
+    ai_response = nlp_processor.generate_personalized_response(user_message, context.user_profile, topics=analysis.topics, tokens=analysis.tokens)
     
-    # Create new conversation
-    conversation = Conversation(
-        learning_session_id=session_id,
+    # No AI model generates video answers, so no model info is attached
+    return jsonify(_store_conversation(
+        session_id, user_id, user_message, ai_response, analysis,
         communication_type=CommunicationType.VIDEO,
-        user_message=user_message,
-        ai_response=ai_response,
-        media_url=filename,
-        sentiment_score=sentiment_score,
-        topics_covered=json.dumps(topics),
-        user_engagement_score=engagement_score
-    )
-    
-    # Store conversation data hash on blockchain
-    conversation_data = {
-        'session_id': session_id,
-        'user_id': user_id,
-        'user_message': user_message,
-        'ai_response': ai_response,
-        'media_url': filename,
-        'timestamp': datetime.datetime.utcnow().isoformat()
-    }
-    data_hash = blockchain_handler.get_hash(conversation_data)
-    conversation.content_hash = data_hash
-    
-    db_session.add(conversation)
-    db_session.commit()
-    
-    conversation_data = conversation.to_dict()
-    close_session(db_session)
-    
-    return jsonify(conversation_data)
+        media_url=filename
+    ))
 
 @tutor_bp.route('/generate-assessment', methods=['POST'])
 @jwt_required()
@@ -411,7 +310,8 @@ def generate_assessment():
     if 'session_id' not in data:
         return jsonify({'error': 'Missing required field: session_id'}), 400
     
-    db_session = get_session()
+    # Reads go through the reader pool; the writer is only taken for the insert
+    db_session = get_read_session()
     learning_session = db_session.query(LearningSession).filter_by(id=data['session_id']).first()
     
     if not learning_session:
@@ -423,26 +323,31 @@ def generate_assessment():
         close_session(db_session)
         return jsonify({'error': 'Unauthorized access'}), 403
     
-    # Get conversations from the session
-    conversations = db_session.query(Conversation).filter_by(
-        learning_session_id=data['session_id']
-    ).all()
+    # Check the session has conversations
+    has_conversations = db_session.query(
+        db_session.query(Conversation.id).filter_by(learning_session_id=data['session_id']).exists()
+    ).scalar()
     
-    if not conversations:
+    if not has_conversations:
         close_session(db_session)
         return jsonify({'error': 'No conversations found in this session'}), 400
     
-    # Extract topics from conversations
-    all_topics = set()
-    for conv in conversations:
-        if conv.topics_covered:
-            all_topics.update(json.loads(conv.topics_covered))
+    # Most discussed topics of the session
+    top_topics = db_session.query(ConversationTopic.topic).filter_by(
+        learning_session_id=data['session_id']
+    ).group_by(
+        ConversationTopic.topic
+    ).order_by(
+        func.count(ConversationTopic.id).desc(), ConversationTopic.topic
+    ).limit(5).all()
+    session_subject, session_topic = learning_session.subject, learning_session.topic
+    close_session(db_session)
     
     # Generate assessment questions based on topics
     # This is a simplified example - in a real system, you would use more sophisticated
     # question generation techniques
     questions = []
-    for i, topic in enumerate(list(all_topics)[:5]):  # Limit to 5 questions
+    for i, (topic,) in enumerate(top_topics):  # Limit to 5 questions
         questions.append({
             "id": i + 1,
             "question": f"Explain the concept of {topic} in your own words.",
@@ -453,16 +358,15 @@ def generate_assessment():
     assessment = Assessment(
         learning_session_id=data['session_id'],
         assessment_type="quiz",
-        title=f"Assessment for {learning_session.subject}: {learning_session.topic}",
-        description=f"This assessment covers the topics discussed in your learning session on {learning_session.topic}.",
+        title=f"Assessment for {session_subject}: {session_topic}",
+        description=f"This assessment covers the topics discussed in your learning session on {session_topic}.",
         questions=json.dumps(questions)
     )
     
-    db_session.add(assessment)
-    db_session.commit()
-    
-    assessment_data = assessment.to_dict()
-    close_session(db_session)
+    with writer_session() as db_session:
+        db_session.add(assessment)
+        db_session.flush()
+        assessment_data = assessment.to_dict()
     
     return jsonify(assessment_data)
 
@@ -504,8 +408,10 @@ def submit_assessment():
     
     # Generate feedback
     assessment.feedback = "Great job on the assessment! You demonstrated a good understanding of the key concepts."
-    assessment.strengths = json.dumps(["Clear explanations", "Good use of examples"])
-    assessment.areas_for_improvement = json.dumps(["Could provide more detail in some answers"])
+    assessment.set_feedback_tags(
+        ["Clear explanations", "Good use of examples"],
+        ["Could provide more detail in some answers"]
+    )
     
     db_session.commit()
     
@@ -0,0 +1,164 @@
+"""
+Backfill of the normalized topic and tag tables for the Smart Learning with Personalized AI Tutor application
+
+Conversations and assessments written before migration 2 only carry their
+topics, strengths and areas for improvement as JSON strings. This fills
+conversation_topics and assessment_tags from those columns. Rows that already
+have normalized entries are skipped, so the backfill can be re-run safely.
+A table without the JSON columns (as created from app.models.learning_session,
+whose conversations keep message/response only) has nothing to backfill and
+is skipped.
+
+Usage:
+    python -m app.database.backfill [--database-uri sqlite:///app.db] [--batch-size 500]
+"""
+
+import argparse
+import json
+import logging
+import os
+from sqlalchemy import create_engine, inspect, text
+from app.models.learning import AssessmentTag
+
+def _parse_list(value):
+    """Decode a JSON list column, dropping empty and duplicate entries"""
+    if not value:
+        return []
+    try:
+        values = json.loads(value)
+    except ValueError:
+        return []
+    if not isinstance(values, list):
+        return []
+    return list(dict.fromkeys(str(item) for item in values if item))
+
+def _has_columns(engine, table, columns):
+    """Check that a table exists and has all the given columns"""
+    inspector = inspect(engine)
+    if not inspector.has_table(table):
+        return False
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    return set(columns) <= existing
+
+def backfill_conversation_topics(engine, batch_size=500):
+    """
+    Fill conversation_topics from Conversation.topics_covered
+    
+    Args:
+        engine (Engine): Database engine
+        batch_size (int): Conversations per transaction
+    
+    Returns:
+        int: Number of topic rows inserted
+    """
+    if not _has_columns(engine, 'conversations', ['topics_covered']):
+        logging.info("conversations has no topics_covered column, skipping topic backfill")
+        return 0
+    
+    inserted = 0
+    last_id = 0
+    
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(text(
+                "SELECT id, learning_session_id, topics_covered FROM conversations "
+                "WHERE id > :last_id AND topics_covered IS NOT NULL "
+                "AND NOT EXISTS (SELECT 1 FROM conversation_topics "
+                "WHERE conversation_topics.conversation_id = conversations.id) "
+                "ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+            if not rows:
+                return inserted
+            
+            values = [
+                {'conversation_id': conversation_id, 'learning_session_id': session_id, 'topic': topic}
+                for conversation_id, session_id, topics_covered in rows
+                for topic in _parse_list(topics_covered)
+            ]
+            if values:
+                connection.execute(text(
+                    "INSERT INTO conversation_topics (conversation_id, learning_session_id, topic) "
+                    "VALUES (:conversation_id, :learning_session_id, :topic)"
+                ), values)
+        
+        inserted += len(values)
+        last_id = rows[-1][0]
+
+def backfill_assessment_tags(engine, batch_size=500):
+    """
+    Fill assessment_tags from Assessment.strengths and areas_for_improvement
+    
+    Args:
+        engine (Engine): Database engine
+        batch_size (int): Assessments per transaction
+    
+    Returns:
+        int: Number of tag rows inserted
+    """
+    if not _has_columns(engine, 'assessments', ['strengths', 'areas_for_improvement']):
+        logging.info("assessments has no strengths/areas_for_improvement columns, skipping tag backfill")
+        return 0
+    
+    inserted = 0
+    last_id = 0
+    
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(text(
+                "SELECT id, learning_session_id, strengths, areas_for_improvement FROM assessments "
+                "WHERE id > :last_id "
+                "AND (strengths IS NOT NULL OR areas_for_improvement IS NOT NULL) "
+                "AND NOT EXISTS (SELECT 1 FROM assessment_tags "
+                "WHERE assessment_tags.assessment_id = assessments.id) "
+                "ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+            if not rows:
+                return inserted
+            
+            values = []
+            for assessment_id, session_id, strengths, areas_for_improvement in rows:
+                for kind, column in ((AssessmentTag.STRENGTH, strengths), (AssessmentTag.IMPROVEMENT, areas_for_improvement)):
+                    values += [
+                        {'assessment_id': assessment_id, 'learning_session_id': session_id, 'kind': kind, 'tag': tag}
+                        for tag in _parse_list(column)
+                    ]
+            if values:
+                connection.execute(text(
+                    "INSERT INTO assessment_tags (assessment_id, learning_session_id, kind, tag) "
+                    "VALUES (:assessment_id, :learning_session_id, :kind, :tag)"
+                ), values)
+        
+        inserted += len(values)
+        last_id = rows[-1][0]
+
+def backfill(engine, batch_size=500):
+    """
+    Run every backfill
+    
+    Args:
+        engine (Engine): Database engine
+        batch_size (int): Source rows per transaction
+    
+    Returns:
+        dict: Number of rows inserted per table
+    """
+    counts = {
+        'conversation_topics': backfill_conversation_topics(engine, batch_size),
+        'assessment_tags': backfill_assessment_tags(engine, batch_size)
+    }
+    logging.info(f"Backfilled normalized tables: {counts}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill conversation topics and assessment tags")
+    parser.add_argument('--database-uri', default=os.environ.get('DATABASE_URI', 'sqlite:///app.db'))
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    
+    engine = create_engine(args.database_uri)
+    counts = backfill(engine, args.batch_size)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows inserted")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
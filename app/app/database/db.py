@@ -2,9 +2,13 @@
 Database configuration for the Smart Learning with Personalized AI Tutor application
 """
 
+import threading
+import time
+from contextlib import contextmanager
 from flask import current_app
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from app.models.base import Base
 from app.models.user import User
 from app.models.ai_model import AIModel, AIModelType
@@ -12,22 +16,363 @@ from app.models.learning_session import LearningSession
 from werkzeug.security import generate_password_hash
 import json
 
-# Create database engine
+# Process-wide engines and session registries, created once by init_app()
+_engine = None
+_session_registry = None
+_read_engine = None
+_read_session_registry = None
+_lock = threading.Lock()
+
+SQLITE_PRODUCTION_PROFILE = 'sqlite-production'
+
+class PoolMetrics:
+    """Connection pool checkout/wait counters for one engine"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Reset all counters"""
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+    
+    def record_wait(self, seconds, timed_out=False):
+        """Record the time a caller spent waiting for a pooled connection"""
+        with self._lock:
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+    
+    def increment(self, counter):
+        """Increment one of the event counters"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def to_dict(self):
+        """Convert metrics to dictionary"""
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000
+            }
+
+pool_metrics = PoolMetrics()
+read_pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+    
+    metrics = pool_metrics
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+class ReaderQueuePool(InstrumentedQueuePool):
+    """Instrumented pool for the read-only SQLite connections"""
+    
+    metrics = read_pool_metrics
+
+def _is_memory_sqlite(uri):
+    return uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite:/', 'sqlite://'))
+
+def _use_sqlite_production(config):
+    uri = config['DATABASE_URI']
+    return (config.get('DATABASE_PROFILE') == SQLITE_PRODUCTION_PROFILE
+            and uri.startswith('sqlite') and not _is_memory_sqlite(uri))
+
+def _instrument(engine, metrics):
+    """Attach pool event listeners that feed the given metrics"""
+    event.listen(engine, 'connect', lambda dbapi_conn, record: metrics.increment('connects'))
+    event.listen(engine, 'checkout', lambda dbapi_conn, record, proxy: metrics.increment('checkouts'))
+    event.listen(engine, 'checkin', lambda dbapi_conn, record: metrics.increment('checkins'))
+    return engine
+
+def _sqlite_pragma_listener(config, read_only=False):
+    """
+    Build a connect listener applying the sqlite-production pragmas
+    
+    Args:
+        config (dict): Mapping with the SQLITE_* settings
+        read_only (bool): Whether connections only serve reads
+    
+    Returns:
+        function: Listener for the engine 'connect' event
+    """
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 65536))}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        'PRAGMA temp_store=MEMORY'
+    ]
+    if read_only:
+        pragmas.append('PRAGMA query_only=ON')
+    
+    def set_pragmas(dbapi_conn, record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    
+    return set_pragmas
+
+def build_engine(config):
+    """
+    Build the primary (read/write) engine from configuration values
+    
+    Args:
+        config (dict): Mapping with DATABASE_URI and DATABASE_POOL_* settings
+    
+    Returns:
+        Engine: Configured SQLAlchemy engine
+    """
+    uri = config['DATABASE_URI']
+    
+    if _is_memory_sqlite(uri):
+        # A single shared connection, otherwise every checkout sees an empty database
+        return _instrument(create_engine(
+            uri,
+            poolclass=StaticPool,
+            connect_args={'check_same_thread': False}
+        ), pool_metrics)
+    
+    connect_args = {}
+    if uri.startswith('sqlite'):
+        # Pooled connections are handed between request threads
+        connect_args['check_same_thread'] = False
+    
+    pool_options = {
+        'pool_size': config.get('DATABASE_POOL_SIZE', 5),
+        'max_overflow': config.get('DATABASE_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 30)
+    }
+    
+    if _use_sqlite_production(config):
+        # SQLite allows one writer at a time, so writes queue on a single
+        # connection instead of contending for the database lock. Routes
+        # hold it only for a write unit of work (writer_session) and read
+        # through the reader pool.
+        pool_options = {
+            'pool_size': 1,
+            'max_overflow': 0,
+            'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 30)
+        }
+    
+    engine = create_engine(
+        uri,
+        poolclass=InstrumentedQueuePool,
+        pool_recycle=config.get('DATABASE_POOL_RECYCLE', 1800),
+        pool_pre_ping=config.get('DATABASE_POOL_PRE_PING', True),
+        connect_args=connect_args,
+        **pool_options
+    )
+    
+    if _use_sqlite_production(config):
+        event.listen(engine, 'connect', _sqlite_pragma_listener(config))
+    
+    return _instrument(engine, pool_metrics)
+
+def build_read_engine(config):
+    """
+    Build the read-only engine used by the sqlite-production profile
+    
+    Args:
+        config (dict): Mapping with DATABASE_URI, DATABASE_PROFILE and SQLITE_* settings
+    
+    Returns:
+        Engine: Read-only engine, or None when the profile is not enabled
+    """
+    if not _use_sqlite_production(config):
+        return None
+    
+    read_pool_size = config.get('DATABASE_READ_POOL_SIZE', 8)
+    engine = create_engine(
+        config['DATABASE_URI'],
+        poolclass=ReaderQueuePool,
+        pool_size=read_pool_size,
+        max_overflow=0,
+        pool_timeout=config.get('DATABASE_POOL_TIMEOUT', 30),
+        pool_recycle=config.get('DATABASE_POOL_RECYCLE', 1800),
+        connect_args={'check_same_thread': False}
+    )
+    event.listen(engine, 'connect', _sqlite_pragma_listener(config, read_only=True))
+    
+    return _instrument(engine, read_pool_metrics)
+
+def init_app(app):
+    """
+    Create the process-wide engines and session registries for the app
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _engine, _session_registry, _read_engine, _read_session_registry
+    
+    with _lock:
+        for registry in (_session_registry, _read_session_registry):
+            if registry is not None:
+                registry.remove()
+        for engine in (_engine, _read_engine):
+            if engine is not None:
+                engine.dispose()
+        
+        _engine = build_engine(app.config)
+        _session_registry = scoped_session(
+            sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+        )
+        
+        _read_engine = build_read_engine(app.config)
+        _read_session_registry = None
+        if _read_engine is not None:
+            _read_session_registry = scoped_session(
+                sessionmaker(autocommit=False, autoflush=False, bind=_read_engine)
+            )
+    
+    # init_app may run again to rebuild the engines; the teardown is registered once per app
+    if app.extensions.get('database'):
+        return
+    app.extensions['database'] = True
+    
+    @app.teardown_appcontext
+    def remove_db_session(exception=None):
+        for registry in (_session_registry, _read_session_registry):
+            if registry is not None:
+                registry.remove()
+
+# Get the shared database engine
 def get_engine():
-    return create_engine(current_app.config['DATABASE_URI'])
+    if _engine is None:
+        # Registering setup on the app from inside a request is rejected by Flask
+        raise RuntimeError("Database is not initialized: call app.database.db.init_app(app) when creating the app")
+    return _engine
 
-# Create database session
+# Get the shared database session registry
 def get_db_session():
-    engine = get_engine()
-    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return scoped_session(session_factory)
+    get_engine()
+    return _session_registry
+
+def get_session_factory():
+    """Get the sessionmaker behind the shared registry, for sessions owned by background threads"""
+    get_engine()
+    return _session_registry.session_factory
+
+def get_session():
+    """
+    Get the session for the current thread from the shared registry
+    
+    With the sqlite-production profile its connection is the only writer
+    connection, held from the first query until close_session. Routes that
+    do slow work (model calls) read through get_read_session and write with
+    writer_session instead.
+    """
+    return get_db_session()()
+
+@contextmanager
+def writer_session():
+    """
+    Open a session for one write unit of work
+    
+    Commits when the block completes and rolls back if it raises. The
+    session is closed either way, so the writer connection goes back to the
+    pool as soon as the write is done.
+    
+    Yields:
+        Session: Session owned by the block
+    """
+    db_session = get_session_factory()()
+    try:
+        yield db_session
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    finally:
+        db_session.close()
+
+def get_read_session():
+    """
+    Get a session for read-only endpoints
+    
+    Uses the reader pool when the sqlite-production profile is enabled,
+    otherwise the shared read/write registry.
+    """
+    get_engine()
+    if _read_session_registry is not None:
+        return _read_session_registry()
+    return _session_registry()
+
+def close_session(session):
+    """Release the current thread's session back to its registry"""
+    for registry in (_session_registry, _read_session_registry):
+        if registry is not None and registry.registry.has() and registry() is session:
+            registry.remove()
+
+def get_pool_metrics():
+    """
+    Get connection pool metrics for the shared engine
+    
+    Returns:
+        dict: Pool status and checkout/wait counters
+    """
+    metrics = _engine_metrics(_engine, pool_metrics)
+    if _read_engine is not None:
+        metrics['reader'] = _engine_metrics(_read_engine, read_pool_metrics)
+    return metrics
+
+def _engine_metrics(engine, metrics):
+    result = metrics.to_dict()
+    if engine is not None:
+        pool = engine.pool
+        result['pool_class'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            result['pool_size'] = pool.size()
+            result['checked_out'] = pool.checkedout()
+            result['overflow'] = pool.overflow()
+    return result
 
 # Initialize database
 def init_db():
     """Initialize the database with tables"""
+    from app.database.migrations import upgrade
+    
+    from app.models.learning import Base as LearningBase, ConversationTopic, AssessmentTag
+    
     engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # The normalized topic and tag tables are declared with app.models.learning
+    LearningBase.metadata.create_all(bind=engine, tables=[ConversationTopic.__table__, AssessmentTag.__table__])
     current_app.logger.info("Database tables created")
+    
+    applied = upgrade(engine)
+    if applied:
+        current_app.logger.info(f"Applied database migrations: {applied}")
+    
+    # Fill the normalized topic and tag tables from existing JSON columns
+    if 2 in applied:
+        from app.database.backfill import backfill
+        backfill(engine)
 
 # Add sample data for development
 def add_sample_data():
@@ -105,4 +450,4 @@ def add_sample_data():
         db_session.rollback()
         current_app.logger.error(f"Error adding sample data: {str(e)}")
     finally:
-        db_session.remove() 
\ No newline at end of file
+        db_session.remove()
\ No newline at end of file
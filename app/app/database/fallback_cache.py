@@ -0,0 +1,92 @@
+"""
+Fallback chain cache for the Smart Learning with Personalized AI Tutor application
+
+load_tutor_context resolves the fallback chain of a routing policy, with the
+user's preference for each model, once per model and user and keeps it in a
+bounded LRU cache. A commit that changes an AIModel or a
+UserAIModelPreference clears the cache of its process; entries also expire
+after FALLBACK_CHAIN_CACHE_TTL seconds, so changes made by other workers or
+raw SQL are picked up.
+"""
+
+import itertools
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.ai_model import AIModel, UserAIModelPreference
+from app.models.response_cache import LRUCache
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 60.0
+
+# (expires at, chain) per (primary model ID, fallback references, user ID)
+_cache = LRUCache(DEFAULT_SIZE)
+_ttl = DEFAULT_TTL
+
+def get(key):
+    """
+    Look up a fallback chain
+    
+    Args:
+        key (tuple): (primary model ID, fallback references, user ID)
+    
+    Returns:
+        tuple: Cached chain, or None on a miss or expired entry
+    """
+    cached = _cache.get(key)
+    if cached is None or cached[0] <= time.monotonic():
+        return None
+    return cached[1]
+
+def put(key, chain):
+    """
+    Store a resolved fallback chain
+    
+    Args:
+        key (tuple): (primary model ID, fallback references, user ID)
+        chain (tuple): (AIModelSnapshot, PreferenceSnapshot or None) entries
+    """
+    _cache.put(key, (time.monotonic() + _ttl, chain))
+
+def invalidate():
+    """Drop every cached fallback chain of this process"""
+    _cache.clear()
+
+def cache_info():
+    """
+    Get statistics of the fallback chain cache
+    
+    Returns:
+        dict: LRU cache metrics plus the entry TTL in seconds
+    """
+    return dict(_cache.metrics(), ttl=_ttl)
+
+@event.listens_for(Session, 'after_flush')
+def _note_model_changes(session, flush_context):
+    # The new/dirty/deleted sets still hold the flushed objects here
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, (AIModel, UserAIModelPreference)):
+            session.info['ai_models_changed'] = True
+            return
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    # Cleared only once committed, so no request re-caches the old rows
+    if session.info.pop('ai_models_changed', False):
+        invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_model_changes(session):
+    session.info.pop('ai_models_changed', None)
+
+def init_app(app):
+    """
+    Size the fallback chain cache from the app config
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _cache, _ttl
+    
+    _cache = LRUCache(app.config.get('FALLBACK_CHAIN_CACHE_SIZE', DEFAULT_SIZE))
+    _ttl = app.config.get('FALLBACK_CHAIN_CACHE_TTL', DEFAULT_TTL)
\ No newline at end of file
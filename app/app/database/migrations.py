@@ -0,0 +1,214 @@
+"""
+Versioned schema migrations for the Smart Learning with Personalized AI Tutor application
+
+Each migration is applied once and recorded in the schema_migrations table.
+Statements must be idempotent so that databases created by create_all(),
+which already carry the indexes declared on the models, upgrade cleanly.
+
+Usage:
+    python -m app.database.migrations upgrade [--database-uri sqlite:///app.db]
+    python -m app.database.migrations check [--database-uri sqlite:///app.db]
+"""
+
+import argparse
+import datetime
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+# (version, description, statements)
+MIGRATIONS = [
+    (1, "Composite indexes for tutor, dashboard and assessment hot paths", [
+        "CREATE INDEX IF NOT EXISTS ix_conversations_session_timestamp "
+        "ON conversations (learning_session_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_learning_sessions_user_start_time "
+        "ON learning_sessions (user_id, start_time)",
+        "CREATE INDEX IF NOT EXISTS ix_learning_sessions_user_subject "
+        "ON learning_sessions (user_id, subject)",
+        "CREATE INDEX IF NOT EXISTS ix_assessments_learning_session_id "
+        "ON assessments (learning_session_id)"
+    ]),
+    # Existing rows are filled in by app.database.backfill
+    (2, "Normalized conversation topics and assessment tags", [
+        "CREATE TABLE IF NOT EXISTS conversation_topics ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "conversation_id INTEGER NOT NULL REFERENCES conversations (id), "
+        "learning_session_id INTEGER NOT NULL REFERENCES learning_sessions (id), "
+        "topic VARCHAR(128) NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_conversation_topics_session_topic "
+        "ON conversation_topics (learning_session_id, topic)",
+        "CREATE INDEX IF NOT EXISTS ix_conversation_topics_conversation_id "
+        "ON conversation_topics (conversation_id)",
+        "CREATE TABLE IF NOT EXISTS assessment_tags ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "assessment_id INTEGER NOT NULL REFERENCES assessments (id), "
+        "learning_session_id INTEGER NOT NULL REFERENCES learning_sessions (id), "
+        "kind VARCHAR(16) NOT NULL, "
+        "tag VARCHAR(255) NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_assessment_tags_session_kind_tag "
+        "ON assessment_tags (learning_session_id, kind, tag)",
+        "CREATE INDEX IF NOT EXISTS ix_assessment_tags_assessment_id "
+        "ON assessment_tags (assessment_id)"
+    ])
+]
+
+# Queries run on every tutor message or dashboard load: (name, sql, params)
+HOT_QUERIES = [
+    ("tutor recent conversations",
+     "SELECT * FROM conversations WHERE learning_session_id = :session_id "
+     "ORDER BY timestamp DESC LIMIT 5",
+     {'session_id': 1}),
+    ("dashboard recent sessions",
+     "SELECT * FROM learning_sessions WHERE user_id = :user_id "
+     "ORDER BY start_time DESC LIMIT 5",
+     {'user_id': 1}),
+    ("dashboard subjects",
+     "SELECT subject, count(id) FROM learning_sessions WHERE user_id = :user_id "
+     "GROUP BY subject",
+     {'user_id': 1}),
+    ("dashboard conversation count",
+     "SELECT count(conversations.id) FROM conversations "
+     "JOIN learning_sessions ON learning_sessions.id = conversations.learning_session_id "
+     "WHERE learning_sessions.user_id = :user_id",
+     {'user_id': 1}),
+    ("dashboard assessment count",
+     "SELECT count(assessments.id) FROM assessments "
+     "JOIN learning_sessions ON learning_sessions.id = assessments.learning_session_id "
+     "WHERE learning_sessions.user_id = :user_id",
+     {'user_id': 1}),
+    ("session assessments",
+     "SELECT * FROM assessments WHERE learning_session_id = :session_id",
+     {'session_id': 1}),
+    ("session topic counts",
+     "SELECT topic, count(id) FROM conversation_topics WHERE learning_session_id = :session_id "
+     "GROUP BY topic ORDER BY count(id) DESC",
+     {'session_id': 1}),
+    ("progress assessment tag counts",
+     "SELECT assessment_tags.kind, assessment_tags.tag, count(assessment_tags.id) FROM assessment_tags "
+     "JOIN learning_sessions ON learning_sessions.id = assessment_tags.learning_session_id "
+     "JOIN assessments ON assessments.id = assessment_tags.assessment_id "
+     "WHERE learning_sessions.user_id = :user_id AND assessments.score IS NOT NULL "
+     "GROUP BY assessment_tags.kind, assessment_tags.tag",
+     {'user_id': 1})
+]
+
+def _ensure_version_table(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(255), "
+        "applied_at VARCHAR(32))"
+    ))
+
+def current_version(engine):
+    """
+    Get the latest applied migration version
+    
+    Args:
+        engine (Engine): Database engine
+    
+    Returns:
+        int: Applied version, 0 for an unmigrated database
+    """
+    with engine.begin() as connection:
+        _ensure_version_table(connection)
+        version = connection.execute(text("SELECT max(version) FROM schema_migrations")).scalar()
+    return version or 0
+
+def upgrade(engine, target=None):
+    """
+    Apply pending migrations up to the target version
+    
+    Args:
+        engine (Engine): Database engine
+        target (int): Version to stop at, defaults to the latest
+    
+    Returns:
+        list: Versions applied by this call
+    """
+    applied = []
+    version = current_version(engine)
+    
+    for migration_version, description, statements in MIGRATIONS:
+        if migration_version <= version or (target is not None and migration_version > target):
+            continue
+        
+        # One transaction per migration so a failure leaves the previous version intact
+        with engine.begin() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {
+                    'version': migration_version,
+                    'description': description,
+                    'applied_at': datetime.datetime.utcnow().isoformat()
+                }
+            )
+        applied.append(migration_version)
+    
+    return applied
+
+def check_query_plans(engine):
+    """
+    Check that the schema is migrated and no hot query falls back to a full table scan
+    
+    Only SQLite query plans are inspected. The database is not modified.
+    
+    Args:
+        engine (Engine): Database engine
+    
+    Returns:
+        list: (query name, problem) for a missing migration, a hot query that
+            cannot be planned (its tables do not exist yet) and every full
+            table scan found
+    """
+    if engine.dialect.name != 'sqlite':
+        return []
+    
+    problems = []
+    latest = MIGRATIONS[-1][0]
+    with engine.connect() as connection:
+        version = 0
+        if inspect(connection).has_table('schema_migrations'):
+            version = connection.execute(text("SELECT max(version) FROM schema_migrations")).scalar() or 0
+        if version < latest:
+            problems.append(("schema", f"at migration {version} of {latest}, run upgrade"))
+        
+        for name, sql, params in HOT_QUERIES:
+            try:
+                rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+            except OperationalError as e:
+                problems.append((name, f"not migrated ({e.orig})"))
+                continue
+            for row in rows:
+                detail = row[-1]
+                if detail.startswith('SCAN') and 'USING' not in detail:
+                    problems.append((name, f"full table scan: {detail}"))
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or verify database migrations")
+    parser.add_argument('command', choices=['upgrade', 'check', 'version'])
+    parser.add_argument('--database-uri', default=os.environ.get('DATABASE_URI', 'sqlite:///app.db'))
+    args = parser.parse_args()
+    
+    engine = create_engine(args.database_uri)
+    
+    if args.command == 'upgrade':
+        applied = upgrade(engine)
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+    elif args.command == 'version':
+        print(current_version(engine))
+    else:
+        problems = check_query_plans(engine)
+        for name, problem in problems:
+            print(f"'{name}': {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"All {len(HOT_QUERIES)} hot queries use indexes")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+Tutor context loader for the Smart Learning with Personalized AI Tutor application
+
+Loads everything a tutor route needs before NLP processing in two round trips:
+one joined query for the learning session, user profile, AI model and model
+preference, and one query for the recent conversation history.
+
+The fallback chain of a routing policy is resolved once per model and user
+and then served from app.database.fallback_cache.
+
+The context holds plain values only (the AI model and preference are copied
+into namedtuples), so it stays usable after its session is closed.
+"""
+
+from collections import namedtuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
+from app.models.user import User, UserProfile
+from app.models.learning import LearningSession, Conversation
+from app.models.ai_model import AIModel, UserAIModelPreference
+from app.models.provider_router import routing_policy
+from app.database import fallback_cache
+from app.database.write_behind import get_write_queue
+
+TutorContext = namedtuple('TutorContext', [
+    'session_id',
+    'owner_id',
+    'subject',
+    'topic',
+    'user_profile',
+    'ai_model',
+    'ai_model_preference',
+    'ai_model_info',
+    'conversation_history',
+    'fallback_models'
+])
+TutorContext.__doc__ = """Immutable snapshot of the data a tutor route needs for one message"""
+
+AIModelSnapshot = namedtuple('AIModelSnapshot', [
+    'id',
+    'name',
+    'model_type',
+    'api_endpoint',
+    'api_key_required',
+    'parameters'
+])
+AIModelSnapshot.__doc__ = """Columns of an AIModel used by the model handlers, detached from the session"""
+
+PreferenceSnapshot = namedtuple('PreferenceSnapshot', [
+    'id',
+    'ai_model_id',
+    'api_key',
+    'custom_parameters'
+])
+PreferenceSnapshot.__doc__ = """Columns of a UserAIModelPreference used by the model handlers, detached from the session"""
+
+def snapshot_model(ai_model):
+    """Copy an AIModel into an AIModelSnapshot (None stays None)"""
+    if ai_model is None:
+        return None
+    return AIModelSnapshot(
+        id=ai_model.id,
+        name=ai_model.name,
+        model_type=ai_model.model_type,
+        api_endpoint=ai_model.api_endpoint,
+        api_key_required=ai_model.api_key_required,
+        parameters=ai_model.parameters
+    )
+
+def snapshot_preference(preference):
+    """Copy a UserAIModelPreference into a PreferenceSnapshot (None stays None)"""
+    if preference is None:
+        return None
+    return PreferenceSnapshot(
+        id=preference.id,
+        ai_model_id=preference.ai_model_id,
+        api_key=preference.api_key,
+        custom_parameters=preference.custom_parameters
+    )
+
+def load_tutor_context(db_session, session_id, user_id, model_id=None, history_limit=5):
+    """
+    Load the tutor context for a learning session
+    
+    The requested model is used when it exists and is active, otherwise the
+    user's default model. The history query is skipped when the session
+    belongs to another user or history_limit is 0.
+    
+    Args:
+        db_session (Session): Database session
+        session_id (int): Learning session ID
+        user_id (int): ID of the requesting user
+        model_id (int): Requested AI model ID, if any
+        history_limit (int): Number of recent conversations to load
+    
+    Returns:
+        TutorContext: Loaded context, or None if the session does not exist
+    """
+    requested_model = aliased(AIModel)
+    requested_preference = aliased(UserAIModelPreference)
+    default_model = aliased(AIModel)
+    default_preference = aliased(UserAIModelPreference)
+    
+    entities = [LearningSession, UserProfile, default_model, default_preference]
+    if model_id:
+        entities += [requested_model, requested_preference]
+    
+    query = db_session.query(*entities).join(
+        User, User.id == LearningSession.user_id
+    ).outerjoin(
+        UserProfile, UserProfile.user_id == User.id
+    ).outerjoin(
+        default_model, and_(
+            default_model.id == UserProfile.default_ai_model_id,
+            default_model.is_active == True
+        )
+    ).outerjoin(
+        default_preference, and_(
+            default_preference.user_id == User.id,
+            default_preference.ai_model_id == default_model.id
+        )
+    )
+    
+    if model_id:
+        query = query.outerjoin(
+            requested_model, and_(
+                requested_model.id == model_id,
+                requested_model.is_active == True
+            )
+        ).outerjoin(
+            requested_preference, and_(
+                requested_preference.user_id == User.id,
+                requested_preference.ai_model_id == requested_model.id
+            )
+        )
+    
+    row = query.filter(LearningSession.id == session_id).first()
+    if not row:
+        return None
+    
+    learning_session, profile, ai_model, ai_model_preference = row[:4]
+    if model_id and row[4] is not None:
+        ai_model, ai_model_preference = row[4], row[5]
+    
+    ai_model_info = None
+    if ai_model:
+        ai_model_info = {
+            'id': ai_model.id,
+            'name': ai_model.name,
+            'model_type': ai_model.model_type.value
+        }
+    
+    conversation_history = ()
+    if history_limit and learning_session.user_id == user_id:
+        conversation_history = load_conversation_history(db_session, session_id, history_limit)
+    
+    fallback_models = ()
+    policy = routing_policy(ai_model)
+    if policy and policy.fallback:
+        fallback_models = cached_fallback_models(db_session, ai_model.id, policy.fallback, user_id)
+    
+    return TutorContext(
+        session_id=learning_session.id,
+        owner_id=learning_session.user_id,
+        subject=learning_session.subject,
+        topic=learning_session.topic,
+        user_profile=profile.to_dict() if profile else {},
+        ai_model=snapshot_model(ai_model),
+        ai_model_preference=snapshot_preference(ai_model_preference),
+        ai_model_info=ai_model_info,
+        conversation_history=conversation_history,
+        fallback_models=fallback_models
+    )
+
+def cached_fallback_models(db_session, model_id, references, user_id):
+    """
+    Get the fallback chain of a model for a user, loading it on a cache miss
+    
+    Args:
+        db_session (Session): Database session
+        model_id (int): ID of the primary model
+        references (tuple): AI model names or IDs in fallback order
+        user_id (int): ID of the requesting user
+    
+    Returns:
+        tuple: (AIModelSnapshot, PreferenceSnapshot or None) for each active model found, in order
+    """
+    key = (model_id, references, user_id)
+    chain = fallback_cache.get(key)
+    if chain is None:
+        chain = load_fallback_models(db_session, references, user_id, exclude_id=model_id)
+        fallback_cache.put(key, chain)
+    return chain
+
+def load_fallback_models(db_session, references, user_id, exclude_id=None):
+    """
+    Load the fallback chain of a routing policy in one query
+    
+    Args:
+        db_session (Session): Database session
+        references (tuple): AI model names or IDs in fallback order
+        user_id (int): ID of the requesting user, whose preferences are loaded
+        exclude_id (int): ID of the primary model, skipped if listed
+    
+    Returns:
+        tuple: (AIModelSnapshot, PreferenceSnapshot or None) for each active model found, in order
+    """
+    ids = [reference for reference in references if isinstance(reference, int)]
+    names = [reference for reference in references if isinstance(reference, str)]
+    rows = db_session.query(AIModel, UserAIModelPreference).outerjoin(
+        UserAIModelPreference, and_(
+            UserAIModelPreference.user_id == user_id,
+            UserAIModelPreference.ai_model_id == AIModel.id
+        )
+    ).filter(
+        or_(AIModel.id.in_(ids), AIModel.name.in_(names)),
+        AIModel.is_active == True
+    ).all()
+    
+    by_reference = {}
+    for model, preference in rows:
+        by_reference[model.id] = by_reference[model.name] = (snapshot_model(model), snapshot_preference(preference))
+    
+    chain, seen = [], {exclude_id}
+    for reference in references:
+        entry = by_reference.get(reference)
+        if entry and entry[0].id not in seen:
+            seen.add(entry[0].id)
+            chain.append(entry)
+    return tuple(chain)
+
+def load_conversation_history(db_session, session_id, limit=5):
+    """
+    Load the most recent conversations of a session in chronological order
+    
+    Conversations still waiting in the write-behind queue are included so a
+    follow-up message sees the previous answer before it is committed.
+    
+    Args:
+        db_session (Session): Database session
+        session_id (int): Learning session ID
+        limit (int): Number of conversations to load
+    
+    Returns:
+        tuple: Conversation history entries
+    """
+    rows = db_session.query(
+        Conversation.user_message,
+        Conversation.ai_response,
+        Conversation.timestamp
+    ).filter(
+        Conversation.learning_session_id == session_id
+    ).order_by(
+        Conversation.timestamp.desc()
+    ).limit(limit).all()
+    
+    history = [
+        {
+            'user_message': user_message,
+            'ai_response': ai_response,
+            'timestamp': timestamp.isoformat()
+        }
+        for user_message, ai_response, timestamp in reversed(rows)
+    ]
+    
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        # A row may be committed between the query and this check, so skip duplicates
+        seen = {(entry['timestamp'], entry['user_message']) for entry in history}
+        history += [
+            entry for entry in write_queue.pending_history(session_id)
+            if (entry['timestamp'], entry['user_message']) not in seen
+        ]
+        history.sort(key=lambda entry: entry['timestamp'])
+    
+    return tuple(history[-limit:])
\ No newline at end of file
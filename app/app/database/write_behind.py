@@ -0,0 +1,360 @@
+"""
+Write-behind persistence for tutor conversations
+
+When CONVERSATION_WRITE_BEHIND is enabled, tutor routes hand fully built
+Conversation rows to a bounded in-process queue instead of committing them
+on the request thread. The queue copies their column values and topics, and
+a background writer builds fresh rows from them and inserts them in batched
+transactions, so no ORM object is shared between threads. Pending rows stay
+visible to the history loader until they are committed, and the queue is
+drained when the process exits.
+
+A row that still fails on its own after a failed batch is counted as failed
+and appended to a JSON-lines dead-letter file, since its request already
+got a successful response.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from app.models.learning import Conversation, ConversationTopic
+
+_write_queue = None
+
+class QueueFullError(Exception):
+    """Raised when the write-behind queue stays full past the enqueue timeout"""
+
+class ConversationWriteQueue:
+    """Bounded queue with a background writer for Conversation inserts"""
+    
+    _STOP = object()
+    
+    def __init__(self, session_factory, max_size=1000, batch_size=100, flush_interval_ms=50, dead_letter_path=None,
+                 enqueue_timeout_ms=500):
+        """
+        Initialize the write queue
+        
+        Args:
+            session_factory (sessionmaker): Factory for the writer's sessions
+            max_size (int): Maximum number of queued conversations
+            batch_size (int): Maximum rows per transaction
+            flush_interval_ms (int): Maximum time a row waits before a flush
+            dead_letter_path (str): JSON-lines file for rows that could not be
+                written; None only logs them
+            enqueue_timeout_ms (int): Longest save_conversation waits for space
+                in a full queue before committing synchronously
+        """
+        self.session_factory = session_factory
+        self.dead_letter_path = dead_letter_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self._queue = queue.Queue(maxsize=max_size)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._dead_letter_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.last_error = None
+        self.rejected = 0
+        self.batches = 0
+    
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='conversation-writer', daemon=True)
+            self._thread.start()
+    
+    def enqueue(self, conversation, timeout=None):
+        """
+        Queue a conversation for insertion
+        
+        Only copies of its column values and topics are queued; the object
+        itself stays with the caller and is never added to a session.
+        
+        Args:
+            conversation (Conversation): Fully built, unsaved conversation
+            timeout (float): Seconds to wait for space in the queue
+        
+        Raises:
+            QueueFullError: If the queue is still full after the timeout
+        """
+        if self._closed:
+            raise QueueFullError("Write-behind queue is closed")
+        
+        if conversation.timestamp is None:
+            conversation.timestamp = datetime.datetime.utcnow()
+        
+        # The writer thread builds its own row from these values
+        values = {
+            column.key: getattr(conversation, column.key)
+            for column in Conversation.__table__.columns
+            if column.key != 'id'
+        }
+        topics = [topic.topic for topic in conversation.topics]
+        session_id = int(conversation.learning_session_id)
+        entry = {
+            'user_message': conversation.user_message,
+            'ai_response': conversation.ai_response,
+            'timestamp': conversation.timestamp.isoformat()
+        }
+        with self._pending_lock:
+            self._pending.setdefault(session_id, []).append(entry)
+        
+        try:
+            self._queue.put(((values, topics), session_id, entry), timeout=timeout)
+        except queue.Full:
+            self._discard_pending(session_id, entry)
+            with self._metrics_lock:
+                self.rejected += 1
+            raise QueueFullError("Write-behind queue is full")
+        
+        with self._metrics_lock:
+            self.enqueued += 1
+    
+    def pending_history(self, session_id):
+        """
+        Get conversations of a session that are queued but not yet committed
+        
+        Args:
+            session_id (int): Learning session ID
+        
+        Returns:
+            list: History entries in enqueue order
+        """
+        with self._pending_lock:
+            return [dict(entry) for entry in self._pending.get(int(session_id), ())]
+    
+    def close(self, timeout=10):
+        """
+        Stop accepting rows and flush everything still queued
+        
+        Args:
+            timeout (float): Seconds to wait for the writer thread
+        """
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+        
+        # Writer never started or did not finish in time: drain on this thread
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            self._flush(remaining[start:start + self.batch_size])
+    
+    def metrics(self):
+        """
+        Get queue metrics
+        
+        Returns:
+            dict: Queue depth, row counters, the dead-letter file and the last write error
+        """
+        with self._metrics_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'failed': self.failed,
+                'dead_lettered': self.dead_lettered,
+                'dead_letter_path': self.dead_letter_path,
+                'last_error': self.last_error,
+                'rejected': self.rejected,
+                'batches': self.batches
+            }
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._flush(batch)
+            if stop:
+                return
+    
+    def _flush(self, batch):
+        db_session = self.session_factory()
+        try:
+            db_session.add_all([_build_conversation(*row) for row, _, _ in batch])
+            db_session.commit()
+            written = batch
+        except Exception as e:
+            db_session.rollback()
+            logging.error(f"Write-behind batch of {len(batch)} failed, retrying rows individually: {str(e)}")
+            written = self._flush_individually(db_session, batch)
+        finally:
+            db_session.close()
+        
+        for _, session_id, entry in batch:
+            self._discard_pending(session_id, entry)
+        
+        with self._metrics_lock:
+            self.batches += 1
+            self.written += len(written)
+            self.failed += len(batch) - len(written)
+    
+    def _flush_individually(self, db_session, batch):
+        written = []
+        for item in batch:
+            try:
+                db_session.add(_build_conversation(*item[0]))
+                db_session.commit()
+                written.append(item)
+            except Exception as e:
+                db_session.rollback()
+                logging.error(f"Could not write conversation for session {item[1]}: {str(e)}")
+                self._dead_letter(item[0], e)
+        return written
+    
+    def _dead_letter(self, row, error):
+        """Keep a row that could not be written where it can be found and replayed"""
+        values, topics = row
+        # The driver error, without the statement and parameters SQLAlchemy adds
+        message = str(getattr(error, 'orig', None) or error)
+        record = json.dumps({
+            'failed_at': datetime.datetime.utcnow().isoformat(),
+            'error': message,
+            'conversation': values,
+            'topics': topics
+        }, default=_json_value)
+        
+        with self._metrics_lock:
+            self.last_error = message
+        if self.dead_letter_path:
+            try:
+                with self._dead_letter_lock:
+                    with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                        f.write(record + '\n')
+                with self._metrics_lock:
+                    self.dead_lettered += 1
+                return
+            except OSError as e:
+                logging.error(f"Could not write dead-letter file {self.dead_letter_path}: {str(e)}")
+        logging.error(f"Lost conversation: {record}")
+    
+    def _discard_pending(self, session_id, entry):
+        with self._pending_lock:
+            entries = self._pending.get(session_id)
+            if entries is None:
+                return
+            # Identical messages may be queued twice, so match by identity
+            entries[:] = [pending for pending in entries if pending is not entry]
+            if not entries:
+                del self._pending[session_id]
+
+def _build_conversation(values, topics):
+    """Build a new Conversation row, with its topic rows, from queued values"""
+    conversation = Conversation(**values)
+    conversation.topics = [
+        ConversationTopic(learning_session_id=conversation.learning_session_id, topic=topic)
+        for topic in topics
+    ]
+    return conversation
+
+def _json_value(value):
+    """Encode the datetime and enum column values of a dead-lettered row"""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return getattr(value, 'value', str(value))
+
+def init_app(app):
+    """
+    Start the write-behind queue if CONVERSATION_WRITE_BEHIND is enabled
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _write_queue
+    from app.database.db import get_session_factory
+    
+    if _write_queue is not None:
+        _write_queue.close()
+        _write_queue = None
+    
+    if not app.config.get('CONVERSATION_WRITE_BEHIND', False):
+        return
+    
+    _write_queue = ConversationWriteQueue(
+        get_session_factory(),
+        max_size=app.config.get('WRITE_BEHIND_MAX_QUEUE', 1000),
+        batch_size=app.config.get('WRITE_BEHIND_BATCH_SIZE', 100),
+        flush_interval_ms=app.config.get('WRITE_BEHIND_FLUSH_INTERVAL_MS', 50),
+        dead_letter_path=app.config.get('WRITE_BEHIND_DEAD_LETTER_PATH'),
+        enqueue_timeout_ms=app.config.get('WRITE_BEHIND_ENQUEUE_TIMEOUT_MS', 500)
+    )
+    _write_queue.start()
+    atexit.register(_write_queue.close)
+
+def get_write_queue():
+    """Get the process-wide write queue, or None when write-behind is disabled"""
+    return _write_queue
+
+def save_conversation(conversation):
+    """
+    Persist a tutor conversation and serialize it for the response
+    
+    Uses the write-behind queue when enabled; the returned id is then None
+    until the background writer commits the row. The queue only takes copies
+    of the values, so the conversation is serialized here on the request
+    thread. Falls back to a synchronous commit when the queue is disabled or
+    full.
+    
+    Args:
+        conversation (Conversation): Fully built, unsaved conversation
+    
+    Returns:
+        dict: Serialized conversation
+    """
+    from app.database.db import writer_session
+    
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        try:
+            write_queue.enqueue(conversation, timeout=write_queue.enqueue_timeout)
+            return conversation.to_dict()
+        except QueueFullError:
+            logging.warning("Write-behind queue full, committing conversation synchronously")
+    
+    with writer_session() as db_session:
+        db_session.add(conversation)
+        db_session.flush()
+        
+        # Serialize before commit so the row is not reloaded after expiry
+        conversation_data = conversation.to_dict()
+    
+    return conversation_data
\ No newline at end of file
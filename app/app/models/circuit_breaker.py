@@ -0,0 +1,456 @@
+"""
+Circuit breakers and adaptive concurrency limits per AI model for the Smart Learning with Personalized AI Tutor application
+
+When a provider degrades, every tutor message would otherwise wait on a
+failing or stalled call. Each AI model gets a ModelGuard:
+
+- A circuit breaker over the outcomes of its last calls. It opens when the
+  share of failed calls or of calls slower than the latency threshold
+  reaches its limit, rejects calls while open, lets a few probe calls
+  through (half-open) once the open period has passed, and closes again
+  when a probe succeeds.
+- An AIMD concurrency limiter: calls beyond the current limit are rejected,
+  each fast success raises the limit by 1/limit (about one per round of
+  calls), and a failure or slow call halves it, at most once per round trip.
+
+A rejected call costs a lock and a comparison, and the caller moves on to
+the next model of the fallback chain or the rule-based response. Admitted
+calls go through ModelGuard.run or run_stream, which record their outcome
+and latency.
+
+A call only counts once it reached the provider: handlers that return
+without a request (no API key, no endpoint) leave the guard untouched. It
+fails when it raised, or when it gave no answer after the transport saw a
+connection error, a timeout, 429 or 5xx (see provider_transport.track_requests).
+"""
+
+import threading
+import time
+from collections import deque
+from app.models.provider_transport import track_requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_SETTINGS = {
+    'window': 20,
+    'min_calls': 10,
+    'error_rate': 0.5,
+    'slow_call_ms': 10000.0,
+    'slow_call_rate': 0.5,
+    'open_seconds': 30.0,
+    'half_open_calls': 1,
+    'initial_limit': 16,
+    'min_limit': 1,
+    'max_limit': 64
+}
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a window of recent call outcomes"""
+    
+    def __init__(self, window=20, min_calls=10, error_rate=0.5, slow_call_ms=10000.0, slow_call_rate=0.5,
+                 open_seconds=30.0, half_open_calls=1, clock=time.monotonic):
+        """
+        Initialize the breaker
+        
+        Args:
+            window (int): Recent calls the rates are computed over
+            min_calls (int): Calls in the window before the breaker can open
+            error_rate (float): Share of failed calls that opens the breaker
+            slow_call_ms (float): Latency above which a call counts as slow
+            slow_call_rate (float): Share of slow calls that opens the breaker
+            open_seconds (float): Time calls are rejected before probing
+            half_open_calls (int): Probe calls allowed at once while half-open
+            clock (callable): Monotonic time source
+        """
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_s = slow_call_ms / 1000
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+    
+    def allow(self):
+        """
+        Check whether a call may go ahead, starting a probe when the open period is over
+        
+        Returns:
+            bool: False while open, or while half-open with all probes running
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+    
+    def record(self, success, latency_s):
+        """
+        Record the outcome of an allowed call
+        
+        Args:
+            success (bool): Whether the call gave an answer
+            latency_s (float): Call latency
+        """
+        slow = latency_s > self.slow_call_s
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if success and not slow:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            if self.state == OPEN:
+                # A call started before the breaker opened
+                return
+            
+            self._outcomes.append((not success, slow))
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for failed, _ in self._outcomes if failed)
+                slow_calls = sum(1 for _, was_slow in self._outcomes if was_slow)
+                if failures >= self.error_rate * len(self._outcomes) or slow_calls >= self.slow_call_rate * len(self._outcomes):
+                    self._open()
+    
+    def release(self):
+        """End an allowed call that did not reach the provider"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+    
+    def reset(self):
+        """Close the breaker and forget the recorded outcomes"""
+        with self._lock:
+            self.state = CLOSED
+            self._outcomes.clear()
+            self._probes = 0
+    
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.opened += 1
+    
+    def snapshot(self):
+        """
+        Get the breaker state
+        
+        Returns:
+            dict: State, failure and slow-call rates over the window, seconds until
+                probing (while open), and open/rejection counts
+        """
+        with self._lock:
+            calls = len(self._outcomes)
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.open_seconds - (self.clock() - self._opened_at))
+            return {
+                'state': self.state,
+                'calls': calls,
+                'error_rate': (sum(1 for failed, _ in self._outcomes if failed) / calls) if calls else 0.0,
+                'slow_call_rate': (sum(1 for _, slow in self._outcomes if slow) / calls) if calls else 0.0,
+                'retry_in_s': retry_in,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
+class AIMDLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease"""
+    
+    def __init__(self, initial_limit=16, min_limit=1, max_limit=64, slow_call_ms=10000.0, backoff=0.5, clock=time.monotonic):
+        """
+        Initialize the limiter
+        
+        Args:
+            initial_limit (int): Concurrent calls allowed at first
+            min_limit (int): Lowest limit
+            max_limit (int): Highest limit
+            slow_call_ms (float): Latency above which a success lowers the limit
+            backoff (float): Factor the limit is multiplied by on a failure or slow call
+            clock (callable): Monotonic time source
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slow_call_s = slow_call_ms / 1000
+        self.backoff = backoff
+        self.clock = clock
+        self.in_flight = 0
+        self._last_decrease = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    def acquire(self):
+        """
+        Take a slot for a call
+        
+        Returns:
+            bool: False if the limit is reached
+        """
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+    
+    def release(self, success=None, latency_s=0.0):
+        """
+        Free a slot and adapt the limit
+        
+        Args:
+            success (bool): Outcome of the call, or None if it did not reach the provider
+            latency_s (float): Call latency
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if success is None:
+                return
+            if success and latency_s <= self.slow_call_s:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                return
+            # Calls overlapping this one saw the same overload; decrease once per round trip
+            now = self.clock()
+            if self._last_decrease is None or now - self._last_decrease >= latency_s:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+    
+    def snapshot(self):
+        """
+        Get the limiter state
+        
+        Returns:
+            dict: Current limit, calls in flight and rejection count
+        """
+        with self._lock:
+            return {'limit': int(self.limit), 'in_flight': self.in_flight, 'rejected': self.rejected}
+
+def call_outcome(answered, raised, tracker):
+    """
+    Classify a finished call for ModelGuard.finish
+    
+    Args:
+        answered (bool): Whether the call gave an answer
+        raised (bool): Whether it raised
+        tracker (RequestTracker): Provider requests made by the call
+    
+    Returns:
+        bool: True if answered, False if the provider failed, None if it was not called
+            or refused the request itself (e.g. a 401 for a wrong API key)
+    """
+    if answered:
+        return True
+    if not tracker.requests:
+        return None
+    if raised or tracker.errors:
+        return False
+    return None
+
+class ModelGuard:
+    """Circuit breaker and concurrency limiter of one AI model"""
+    
+    def __init__(self, key, settings):
+        """
+        Initialize the guard
+        
+        Args:
+            key (str): Model key, see provider_router.model_key
+            settings (dict): Breaker and limiter settings, as DEFAULT_SETTINGS
+        """
+        self.key = key
+        self.breaker = CircuitBreaker(
+            window=settings['window'],
+            min_calls=settings['min_calls'],
+            error_rate=settings['error_rate'],
+            slow_call_ms=settings['slow_call_ms'],
+            slow_call_rate=settings['slow_call_rate'],
+            open_seconds=settings['open_seconds'],
+            half_open_calls=settings['half_open_calls']
+        )
+        self.limiter = AIMDLimiter(
+            initial_limit=settings['initial_limit'],
+            min_limit=settings['min_limit'],
+            max_limit=settings['max_limit'],
+            slow_call_ms=settings['slow_call_ms']
+        )
+    
+    def admit(self):
+        """
+        Admit a call to the model
+        
+        Returns:
+            bool: True if the call may go ahead; it must then be ended with finish()
+        """
+        if not self.breaker.allow():
+            return False
+        if not self.limiter.acquire():
+            self.breaker.release()
+            return False
+        return True
+    
+    def finish(self, success=None, latency_s=0.0):
+        """
+        End an admitted call
+        
+        Args:
+            success (bool): Whether it gave an answer, or None if it did not reach the provider
+            latency_s (float): Call latency
+        """
+        self.limiter.release(success, latency_s)
+        if success is None:
+            self.breaker.release()
+        else:
+            self.breaker.record(success, latency_s)
+    
+    def run(self, handler, **kwargs):
+        """
+        Run an admitted call and record its outcome
+        
+        Args:
+            handler (callable): Model handler
+            **kwargs: Handler arguments
+        
+        Returns:
+            str: Handler answer
+        """
+        start = time.perf_counter()
+        response, raised = None, False
+        with track_requests() as tracker:
+            try:
+                response = handler(**kwargs)
+            except Exception:
+                raised = True
+                raise
+            finally:
+                self.finish(call_outcome(bool(response), raised, tracker), time.perf_counter() - start)
+        return response
+    
+    def run_stream(self, handler, **kwargs):
+        """
+        Run an admitted streaming call and record its outcome once it ends
+        
+        The call is only recorded once the returned generator has started; a
+        stream closed by the caller before its end is not counted against
+        the model.
+        
+        Args:
+            handler (callable): Model stream handler
+            **kwargs: Handler arguments
+        
+        Yields:
+            str: Next part of the answer
+        """
+        start = time.perf_counter()
+        answered, raised, completed = False, False, False
+        with track_requests() as tracker:
+            stream = handler(**kwargs)
+            try:
+                for part in stream:
+                    answered = answered or bool(part)
+                    yield part
+                completed = True
+            except Exception:
+                raised = True
+                raise
+            finally:
+                stream.close()
+                if completed or raised:
+                    success = call_outcome(answered, raised, tracker)
+                else:
+                    success = None
+                self.finish(success, time.perf_counter() - start)
+    
+    def snapshot(self):
+        """
+        Get the guard state
+        
+        Returns:
+            dict: Breaker and limiter state
+        """
+        return {'breaker': self.breaker.snapshot(), 'limiter': self.limiter.snapshot()}
+
+_settings = dict(DEFAULT_SETTINGS)
+_guards = {}
+_guards_lock = threading.Lock()
+
+def init_app(app):
+    """
+    Configure the model guards from the app config
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _settings
+    
+    _settings = {
+        'window': app.config.get('NLP_BREAKER_WINDOW', DEFAULT_SETTINGS['window']),
+        'min_calls': app.config.get('NLP_BREAKER_MIN_CALLS', DEFAULT_SETTINGS['min_calls']),
+        'error_rate': app.config.get('NLP_BREAKER_ERROR_RATE', DEFAULT_SETTINGS['error_rate']),
+        'slow_call_ms': app.config.get('NLP_BREAKER_SLOW_CALL_MS', DEFAULT_SETTINGS['slow_call_ms']),
+        'slow_call_rate': app.config.get('NLP_BREAKER_SLOW_CALL_RATE', DEFAULT_SETTINGS['slow_call_rate']),
+        'open_seconds': app.config.get('NLP_BREAKER_OPEN_SECONDS', DEFAULT_SETTINGS['open_seconds']),
+        'half_open_calls': app.config.get('NLP_BREAKER_HALF_OPEN_CALLS', DEFAULT_SETTINGS['half_open_calls']),
+        'initial_limit': app.config.get('NLP_CONCURRENCY_INITIAL_LIMIT', DEFAULT_SETTINGS['initial_limit']),
+        'min_limit': app.config.get('NLP_CONCURRENCY_MIN_LIMIT', DEFAULT_SETTINGS['min_limit']),
+        'max_limit': app.config.get('NLP_CONCURRENCY_MAX_LIMIT', DEFAULT_SETTINGS['max_limit'])
+    }
+    with _guards_lock:
+        _guards.clear()
+
+def get_guard(key):
+    """
+    Get the guard of a model, creating it on first use
+    
+    Args:
+        key (str): Model key, see provider_router.model_key
+    
+    Returns:
+        ModelGuard: Guard shared by all requests of the process
+    """
+    guard = _guards.get(key)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(key)
+            if guard is None:
+                guard = _guards[key] = ModelGuard(key, _settings)
+    return guard
+
+def guard_state(key):
+    """
+    Get the state of a model guard without creating it
+    
+    Args:
+        key (str): Model key, see provider_router.model_key
+    
+    Returns:
+        dict: ModelGuard.snapshot(), or the state of a new guard (closed, no
+            calls) for a model this process has not called yet
+    """
+    guard = _guards.get(key)
+    if guard is None:
+        guard = ModelGuard(key, _settings)
+    return guard.snapshot()
+
+def guard_states():
+    """
+    Get the state of every model guard
+    
+    Returns:
+        dict: Model key -> ModelGuard.snapshot()
+    """
+    return {key: guard.snapshot() for key, guard in list(_guards.items())}
\ No newline at end of file
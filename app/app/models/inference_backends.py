@@ -0,0 +1,146 @@
+"""
+CPU inference backends for the Smart Learning with Personalized AI Tutor application
+
+The sentiment, NER and question-answering pipelines can be served by:
+    
+    pytorch    the fp32 Hugging Face pipeline (default)
+    int8       the same checkpoint with its Linear layers dynamically
+               quantized to int8 by PyTorch, no extra dependency
+    onnx       the checkpoint exported to ONNX and run by ONNX Runtime,
+               needs optimum[onnxruntime]
+    onnx-int8  the ONNX export with dynamic int8 quantization
+
+Every backend builds a regular transformers pipeline, so NLPProcessor, the
+micro-batcher and the model server use them unchanged. ONNX exports are
+written once to a cache directory and loaded from there afterwards. When the
+libraries a backend needs are missing the fp32 pipeline is loaded instead.
+"""
+
+import logging
+import os
+import shutil
+from app.models.model_registry import SENTIMENT_MODEL, NER_MODEL, QA_MODEL
+
+BACKENDS = ('pytorch', 'int8', 'onnx', 'onnx-int8')
+
+DEFAULT_ONNX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'onnx')
+
+# Checkpoints pipeline(task) picks by default; quantized and exported models
+# have to name them, so every backend pins the same ones
+DEFAULT_CHECKPOINTS = {
+    SENTIMENT_MODEL: 'distilbert/distilbert-base-uncased-finetuned-sst-2-english',
+    NER_MODEL: 'dbmdz/bert-large-cased-finetuned-conll03-english',
+    QA_MODEL: 'distilbert/distilbert-base-cased-distilled-squad'
+}
+
+# transformers and optimum.onnxruntime model classes per task
+MODEL_CLASSES = {
+    SENTIMENT_MODEL: ('AutoModelForSequenceClassification', 'ORTModelForSequenceClassification'),
+    NER_MODEL: ('AutoModelForTokenClassification', 'ORTModelForTokenClassification'),
+    QA_MODEL: ('AutoModelForQuestionAnswering', 'ORTModelForQuestionAnswering')
+}
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+
+def _fp32_pipeline(task, checkpoint):
+    from transformers import pipeline
+    return pipeline(task, model=checkpoint)
+
+def _int8_pipeline(task, checkpoint):
+    import torch
+    import transformers
+    
+    model = getattr(transformers, MODEL_CLASSES[task][0]).from_pretrained(checkpoint)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = transformers.AutoTokenizer.from_pretrained(checkpoint)
+    return transformers.pipeline(task, model=model, tokenizer=tokenizer)
+
+def _publish(temporary, directory):
+    """Move a finished export into place unless another worker got there first"""
+    try:
+        os.replace(temporary, directory)
+    except OSError:
+        shutil.rmtree(temporary, ignore_errors=True)
+
+def _onnx_pipeline(task, checkpoint, cache_dir, quantize):
+    import optimum.onnxruntime as ort
+    from transformers import AutoTokenizer, pipeline
+    
+    model_class = getattr(ort, MODEL_CLASSES[task][1])
+    export_dir = os.path.join(cache_dir, checkpoint.replace('/', '--'))
+    
+    # Exports are built in a private directory and renamed into place, so
+    # workers starting together never load a half-written model
+    if not os.path.exists(os.path.join(export_dir, 'model.onnx')):
+        temporary = f"{export_dir}.tmp-{os.getpid()}"
+        model_class.from_pretrained(checkpoint, export=True).save_pretrained(temporary)
+        AutoTokenizer.from_pretrained(checkpoint).save_pretrained(temporary)
+        os.makedirs(cache_dir, exist_ok=True)
+        _publish(temporary, export_dir)
+    
+    file_name = 'model.onnx'
+    if quantize:
+        file_name = 'model_quantized.onnx'
+        if not os.path.exists(os.path.join(export_dir, file_name)):
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            temporary = f"{export_dir}.quantize-{os.getpid()}"
+            quantizer = ort.ORTQuantizer.from_pretrained(export_dir, file_name='model.onnx')
+            quantizer.quantize(
+                save_dir=temporary,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            )
+            os.replace(os.path.join(temporary, file_name), os.path.join(export_dir, file_name))
+            shutil.rmtree(temporary, ignore_errors=True)
+    
+    model = model_class.from_pretrained(export_dir, file_name=file_name)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(export_dir))
+
+def pipeline_loader(task, backend='pytorch', checkpoint=None, cache_dir=None):
+    """
+    Build a registry loader for a pipeline on an inference backend
+    
+    Args:
+        task (str): SENTIMENT_MODEL, NER_MODEL or QA_MODEL
+        backend (str): One of BACKENDS
+        checkpoint (str): Hugging Face model id, the task's default if None
+        cache_dir (str): Directory for ONNX exports
+    
+    Returns:
+        callable: Loader returning the pipeline
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    _check_backend(backend)
+    checkpoint = checkpoint or DEFAULT_CHECKPOINTS[task]
+    cache_dir = cache_dir or DEFAULT_ONNX_CACHE_DIR
+    
+    def load():
+        if backend == 'pytorch':
+            return _fp32_pipeline(task, checkpoint)
+        try:
+            if backend == 'int8':
+                return _int8_pipeline(task, checkpoint)
+            return _onnx_pipeline(task, checkpoint, cache_dir, quantize=backend == 'onnx-int8')
+        except ImportError as e:
+            logging.warning(f"Inference backend '{backend}' unavailable for {task} ({str(e)}), using the fp32 pipeline")
+            return _fp32_pipeline(task, checkpoint)
+    return load
+
+def use_inference_backend(registry, backend, cache_dir=None):
+    """
+    Serve the sentiment, NER and question-answering pipelines of a registry from a backend
+    
+    Args:
+        registry (ModelRegistry): Registry used by NLPProcessor
+        backend (str): One of BACKENDS
+        cache_dir (str): Directory for ONNX exports
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    _check_backend(backend)
+    for task in MODEL_CLASSES:
+        registry.register(task, pipeline_loader(task, backend, cache_dir=cache_dir))
\ No newline at end of file
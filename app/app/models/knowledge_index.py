@@ -0,0 +1,202 @@
+"""
+Knowledge base index for the Smart Learning with Personalized AI Tutor application
+
+Built once when the knowledge base is loaded so that finding the entries
+relevant to a message no longer scans every subject and topic:
+
+- a postings map from each normalized word of a topic name to the topics
+  that contain it, looked up with the topics extracted from the message
+- an Aho-Corasick automaton over the lowercased topic names, which finds
+  every topic named in the message in one pass over the message
+
+Lookup cost depends on the message and the number of matches, not on the
+size of the knowledge base.
+"""
+
+from array import array
+from collections import deque
+
+class PhraseMatcher:
+    """Aho-Corasick automaton finding every occurrence of a set of phrases in a text"""
+    
+    def __init__(self, phrases):
+        """
+        Build the automaton
+        
+        Args:
+            phrases (iterable): (phrase, value) pairs; value is reported when phrase occurs
+        """
+        # Most trie states have a single child, so that transition is kept in
+        # flat arrays and only branching states get a dict
+        self._child_char = array('l', [-1])
+        self._child_state = array('l', [0])
+        self._branches = {}
+        self._fail = array('l', [0])
+        self._output_link = array('l', [0])
+        self._values = {}
+        
+        for phrase, value in phrases:
+            state = 0
+            for char in phrase:
+                next_state = self._transition(state, char)
+                if next_state < 0:
+                    next_state = self._add_state(state, char)
+                state = next_state
+            self._values.setdefault(state, []).append(value)
+        
+        # Failure links in breadth-first order
+        queue = deque(state for _, state in self._children(0))
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._children(state):
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and self._transition(fail, char) < 0:
+                    fail = self._fail[fail]
+                fail = max(self._transition(fail, char), 0)
+                self._fail[next_state] = fail
+                self._output_link[next_state] = fail if fail in self._values else self._output_link[fail]
+    
+    def __len__(self):
+        return len(self._fail)
+    
+    def _transition(self, state, char):
+        branch = self._branches.get(state)
+        if branch is not None:
+            return branch.get(char, -1)
+        return self._child_state[state] if self._child_char[state] == ord(char) else -1
+    
+    def _children(self, state):
+        branch = self._branches.get(state)
+        if branch is not None:
+            return list(branch.items())
+        if self._child_char[state] >= 0:
+            return [(chr(self._child_char[state]), self._child_state[state])]
+        return []
+    
+    def _add_state(self, parent, char):
+        state = len(self._fail)
+        self._child_char.append(-1)
+        self._child_state.append(0)
+        self._fail.append(0)
+        self._output_link.append(0)
+        
+        if parent in self._branches:
+            self._branches[parent][char] = state
+        elif self._child_char[parent] >= 0:
+            self._branches[parent] = {chr(self._child_char[parent]): self._child_state[parent], char: state}
+            self._child_char[parent] = -1
+        else:
+            self._child_char[parent] = ord(char)
+            self._child_state[parent] = state
+        return state
+    
+    def find(self, text):
+        """
+        Find the phrases occurring in a text
+        
+        Args:
+            text (str): Text to search
+        
+        Returns:
+            set: Values of the phrases found
+        """
+        branches, child_char, child_state = self._branches, self._child_char, self._child_state
+        fail, values, output_link = self._fail, self._values, self._output_link
+        found = set()
+        state = 0
+        for char in text:
+            code = ord(char)
+            while True:
+                branch = branches.get(state)
+                if branch is not None:
+                    next_state = branch.get(char, -1)
+                else:
+                    next_state = child_state[state] if child_char[state] == code else -1
+                if next_state >= 0 or not state:
+                    break
+                state = fail[state]
+            state = max(next_state, 0)
+            
+            match = state if state in values else output_link[state]
+            while match:
+                found.update(values[match])
+                match = output_link[match]
+        return found
+
+class KnowledgeIndex:
+    """Postings and phrase index over the topics of a knowledge base"""
+    
+    def __init__(self, knowledge_base, normalize):
+        """
+        Build the index
+        
+        Args:
+            knowledge_base (dict or CompiledKnowledgeBase): Knowledge base with a "subjects"
+                mapping of subject -> topic -> info
+            normalize (callable): Turns a topic name into the tokens extract_topics would produce
+        """
+        # Topics are numbered in knowledge base order so results keep that
+        # order; infos are read from the knowledge base only when returned
+        self._knowledge_base = knowledge_base
+        self._entries = []
+        self._postings = {}
+        self._always = []
+        phrases = []
+        
+        for subject, subject_data in knowledge_base.get("subjects", {}).items():
+            for topic in subject_data:
+                topic_id = len(self._entries)
+                self._entries.append((subject, topic))
+                
+                for token in set(normalize(topic)):
+                    self._postings.setdefault(token, []).append(topic_id)
+                
+                name = topic.lower()
+                if name:
+                    phrases.append((name, topic_id))
+                else:
+                    # An empty name is contained in every message
+                    self._always.append(topic_id)
+        
+        self._matcher = PhraseMatcher(phrases)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats(self):
+        """
+        Get index sizes
+        
+        Returns:
+            dict: Topic, posting term and automaton state counts
+        """
+        return {
+            'topics': len(self._entries),
+            'terms': len(self._postings),
+            'automaton_states': len(self._matcher)
+        }
+    
+    def lookup(self, user_message, topics):
+        """
+        Find knowledge base entries for a message
+        
+        Args:
+            user_message (str): User's message
+            topics (list): Topics extracted from the message
+        
+        Returns:
+            dict: subject -> topic -> info for topics sharing a word with the
+                extracted topics or named in the message, in knowledge base order
+        """
+        topic_ids = self._matcher.find(user_message.lower())
+        topic_ids.update(self._always)
+        for topic in topics:
+            topic_ids.update(self._postings.get(topic, ()))
+        
+        subjects = self._knowledge_base.get("subjects", {})
+        relevant_info = {}
+        for topic_id in sorted(topic_ids):
+            subject, topic = self._entries[topic_id]
+            relevant_info.setdefault(subject, {})[topic] = subjects[subject][topic]
+        return relevant_info
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+TF-IDF retrieval over the knowledge base for the Smart Learning with Personalized AI Tutor application
+
+Every knowledge base entry (subject, topic name and text) is one document.
+The TF-IDF weights are fitted with scikit-learn's TfidfVectorizer over the
+tokens preprocess_text produces and saved with the vocabulary, keyed by a
+fingerprint of the knowledge base, so a restart with an unchanged knowledge
+base loads them instead of refitting (and does not import scikit-learn).
+
+Queries are vectorized here with the saved vocabulary and idf weights exactly
+as TfidfVectorizer.transform would, and scored against the L2-normalized
+document vectors with a sparse dot product. The matrix is stored term-major,
+so a query only reads the postings of its own terms.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+import numpy as np
+from app.models.knowledge_store import knowledge_base_digest
+
+RETRIEVER_VERSION = 2
+
+DEFAULT_RETRIEVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge_tfidf.npz')
+
+def knowledge_base_fingerprint(knowledge_base, max_features):
+    """
+    Fingerprint the inputs of a fit
+    
+    Args:
+        knowledge_base (dict or CompiledKnowledgeBase): Knowledge base
+        max_features (int): Vocabulary size limit
+    
+    Returns:
+        str: Hex digest that changes whenever the fitted weights could
+    """
+    payload = json.dumps({
+        'version': RETRIEVER_VERSION,
+        'max_features': max_features,
+        'knowledge_base': knowledge_base_digest(knowledge_base)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def knowledge_base_entries(knowledge_base):
+    """
+    List the knowledge base entries in order
+    
+    Args:
+        knowledge_base (dict or CompiledKnowledgeBase): Knowledge base with a "subjects"
+            mapping of subject -> topic -> info
+    
+    Returns:
+        list: (subject, topic) tuples
+    """
+    return [
+        (subject, topic)
+        for subject, subject_data in knowledge_base.get("subjects", {}).items()
+        for topic in subject_data
+    ]
+
+def info_text(info):
+    """Plain text of a knowledge base info, which may also be structured"""
+    return info if isinstance(info, str) else json.dumps(info, sort_keys=True)
+
+def entry_document(subject, topic, info):
+    """Text indexed for one knowledge base entry"""
+    return f"{subject} {topic} {info_text(info)}"
+
+class KnowledgeRetriever:
+    """Top-k TF-IDF search over the knowledge base entries"""
+    
+    def __init__(self, knowledge_base, entries, vocabulary, idf, indptr, indices, data, fingerprint):
+        """
+        Initialize the retriever
+        
+        Args:
+            knowledge_base (dict or CompiledKnowledgeBase): Knowledge base the infos are read from
+            entries (list): (subject, topic) tuples, one per document
+            vocabulary (list): Terms in column order
+            idf (numpy.ndarray): Inverse document frequency of each term
+            indptr (numpy.ndarray): Term-major CSR row pointers
+            indices (numpy.ndarray): Document of each posting
+            data (numpy.ndarray): L2-normalized TF-IDF weight of each posting
+            fingerprint (str): Fingerprint of the knowledge base the weights were fitted on
+        """
+        self.knowledge_base = knowledge_base
+        self.entries = entries
+        self.vocabulary = list(vocabulary)
+        self._columns = {term: column for column, term in enumerate(self.vocabulary)}
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.fingerprint = fingerprint
+    
+    @classmethod
+    def fit(cls, knowledge_base, analyzer, max_features=1000):
+        """
+        Fit the TF-IDF weights on the knowledge base
+        
+        Args:
+            knowledge_base (dict or CompiledKnowledgeBase): Knowledge base
+            analyzer (callable): Turns a text into tokens (NLPProcessor.preprocess_text)
+            max_features (int): Vocabulary size limit
+        
+        Returns:
+            KnowledgeRetriever: Fitted retriever
+        
+        Raises:
+            ImportError: If scikit-learn is not installed
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        entries = knowledge_base_entries(knowledge_base)
+        fingerprint = knowledge_base_fingerprint(knowledge_base, max_features)
+        if not entries:
+            return cls(knowledge_base, entries, [], np.zeros(0), np.zeros(1, dtype=np.int32),
+                       np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), fingerprint)
+        
+        vectorizer = TfidfVectorizer(max_features=max_features, analyzer=analyzer)
+        documents = [
+            entry_document(subject, topic, info)
+            for subject, subject_data in knowledge_base["subjects"].items()
+            for topic, info in subject_data.items()
+        ]
+        try:
+            matrix = vectorizer.fit_transform(documents)
+        except ValueError:
+            # Every document is empty after preprocessing
+            return cls(knowledge_base, entries, [], np.zeros(0), np.zeros(1, dtype=np.int32),
+                       np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), fingerprint)
+        
+        term_major = matrix.T.tocsr()
+        term_major.sort_indices()
+        return cls(
+            knowledge_base,
+            entries,
+            vectorizer.get_feature_names_out().tolist(),
+            vectorizer.idf_.astype(np.float64),
+            term_major.indptr.astype(np.int32),
+            term_major.indices.astype(np.int32),
+            term_major.data.astype(np.float32),
+            fingerprint
+        )
+    
+    @classmethod
+    def load(cls, path, knowledge_base, max_features=1000):
+        """
+        Load saved weights if they were fitted on this knowledge base
+        
+        Args:
+            path (str): File written by save()
+            knowledge_base (dict or CompiledKnowledgeBase): Current knowledge base
+            max_features (int): Vocabulary size limit
+        
+        Returns:
+            KnowledgeRetriever: Loaded retriever, or None if the file is missing or stale
+        """
+        fingerprint = knowledge_base_fingerprint(knowledge_base, max_features)
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['fingerprint']) != fingerprint:
+                    return None
+                return cls(
+                    knowledge_base,
+                    knowledge_base_entries(knowledge_base),
+                    saved['vocabulary'].tolist(),
+                    saved['idf'],
+                    saved['indptr'],
+                    saved['indices'],
+                    saved['data'],
+                    fingerprint
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+    
+    def save(self, path):
+        """
+        Write the weights atomically
+        
+        Args:
+            path (str): Output file
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez(
+                f,
+                fingerprint=np.array(self.fingerprint),
+                vocabulary=np.array(self.vocabulary, dtype=str),
+                idf=self.idf,
+                indptr=self.indptr,
+                indices=self.indices,
+                data=self.data
+            )
+        os.replace(temporary, path)
+    
+    def term_weight(self, term):
+        """
+        Inverse document frequency of a term
+        
+        Args:
+            term (str): Preprocessed token
+        
+        Returns:
+            float: idf weight; terms outside the vocabulary get the largest one
+        """
+        column = self._columns.get(term)
+        if column is not None:
+            return float(self.idf[column])
+        return float(self.idf.max()) if len(self.idf) else 1.0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def stats(self):
+        """
+        Get retriever sizes
+        
+        Returns:
+            dict: Document, term and posting counts
+        """
+        return {
+            'documents': len(self.entries),
+            'terms': len(self.vocabulary),
+            'postings': int(len(self.data))
+        }
+    
+    def search(self, tokens, top_k=3, min_score=0.0):
+        """
+        Find the entries most similar to a query
+        
+        Args:
+            tokens (list): Preprocessed query tokens
+            top_k (int): Maximum number of entries returned
+            min_score (float): Minimum cosine similarity
+        
+        Returns:
+            list: (score, subject, topic, info) tuples, best first
+        """
+        weights = {}
+        for term, count in Counter(tokens).items():
+            column = self._columns.get(term)
+            if column is not None:
+                weights[column] = count * self.idf[column]
+        if not weights or top_k <= 0:
+            return []
+        
+        # One weighted bincount over the postings of the query terms is the
+        # sparse dot product with every document vector
+        columns = np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))
+        query = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        query /= np.sqrt(np.dot(query, query))
+        starts, ends = self.indptr[columns], self.indptr[columns + 1]
+        documents = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        postings = np.concatenate([self.data[start:end] for start, end in zip(starts, ends)])
+        scores = np.bincount(documents, weights=postings * np.repeat(query, ends - starts), minlength=len(self.entries))
+        
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        
+        results = []
+        for position in best:
+            score = float(scores[position])
+            if score <= 0 or score < min_score:
+                break
+            subject, topic = self.entries[position]
+            results.append((score, subject, topic, self.knowledge_base["subjects"][subject][topic]))
+        return results
+
+def load_knowledge_retriever(knowledge_base, analyzer, path=DEFAULT_RETRIEVER_PATH, max_features=1000):
+    """
+    Load the saved retriever, refitting and saving it when the knowledge base changed
+    
+    Args:
+        knowledge_base (dict or CompiledKnowledgeBase): Knowledge base
+        analyzer (callable): Turns a text into tokens (NLPProcessor.preprocess_text)
+        path (str): Saved weights
+        max_features (int): Vocabulary size limit
+    
+    Returns:
+        KnowledgeRetriever: The retriever, or None if it has to be fitted and scikit-learn is not installed
+    """
+    retriever = KnowledgeRetriever.load(path, knowledge_base, max_features)
+    if retriever is not None:
+        return retriever
+    
+    try:
+        retriever = KnowledgeRetriever.fit(knowledge_base, analyzer, max_features)
+    except ImportError:
+        logging.warning("scikit-learn is not installed; TF-IDF knowledge retrieval is disabled")
+        return None
+    
+    try:
+        retriever.save(path)
+    except OSError as e:
+        logging.warning(f"Could not save TF-IDF weights to {path}: {str(e)}")
+    return retriever
\ No newline at end of file
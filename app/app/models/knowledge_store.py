@@ -0,0 +1,410 @@
+"""
+Compiled knowledge base storage for the Smart Learning with Personalized AI Tutor application
+
+knowledge_base.json is compiled once into a binary file that every worker
+maps read-only, so the subject texts live in shared page cache instead of
+being parsed into a dict by each process. Layout (little-endian):
+    
+    header    magic, format version, build generation, counts, section
+              offsets and the SHA-256 digest of the source knowledge base
+    subjects  name offset/length, first topic and topic count per subject
+    topics    subject, name offset/length, info offset/length and info kind
+              per topic, grouped by subject in source order
+    index     open-addressing hash table of topic ids keyed by
+              crc32(subject NUL topic)
+    strings   UTF-8 string table holding every name and info
+
+CompiledKnowledgeBase exposes the file with the same shape as the JSON
+(knowledge_base["subjects"][subject][topic] -> info), decoding only the
+entries that are read. KnowledgeBaseWatcher polls the files for changes so
+a new build can be swapped in without restarting the workers.
+
+Usage:
+    python -m app.models.knowledge_store [--input app/models/knowledge_base.json] [--output app/models/knowledge_base.kb]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+
+KB_MAGIC = b'SLKB'
+KB_FORMAT_VERSION = 1
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_KNOWLEDGE_BASE_SOURCE = os.path.join(MODELS_DIR, 'knowledge_base.json')
+DEFAULT_KNOWLEDGE_BASE_PATH = os.path.join(MODELS_DIR, 'knowledge_base.kb')
+
+# magic, version, generation, subject count, topic count, index slots,
+# subjects/topics/index/strings offsets, source digest
+HEADER = struct.Struct('<4sHQIII4Q32s')
+SUBJECT = struct.Struct('<QIII')
+TOPIC = struct.Struct('<IQIQII')
+SLOT = struct.Struct('<I')
+
+# How a topic's info is stored in the string table
+INFO_TEXT = 0
+INFO_JSON = 1
+
+class KnowledgeBaseFormatError(Exception):
+    """Raised when a compiled knowledge base file is invalid or from another format version"""
+
+def knowledge_base_digest(knowledge_base):
+    """
+    Digest of a knowledge base's content, the same for the JSON and compiled forms
+    
+    Args:
+        knowledge_base (dict or CompiledKnowledgeBase): Knowledge base
+    
+    Returns:
+        str: Hex SHA-256 of the canonical JSON
+    """
+    if isinstance(knowledge_base, CompiledKnowledgeBase):
+        return knowledge_base.digest
+    canonical = json.dumps(knowledge_base, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _index_key(subject_bytes, topic_bytes):
+    return zlib.crc32(topic_bytes, zlib.crc32(subject_bytes + b'\0'))
+
+def read_generation(path):
+    """
+    Read the build generation of a compiled knowledge base
+    
+    Args:
+        path (str): Compiled file
+    
+    Returns:
+        int: Generation, or 0 if the file is missing or not a compiled knowledge base
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return 0
+    if len(header) < HEADER.size or header[:4] != KB_MAGIC:
+        return 0
+    return HEADER.unpack(header)[2]
+
+def compile_knowledge_base(knowledge_base, path=DEFAULT_KNOWLEDGE_BASE_PATH, generation=None):
+    """
+    Write a knowledge base in the compiled format, atomically
+    
+    Args:
+        knowledge_base (dict): Knowledge base with a "subjects" mapping of subject -> topic -> info
+        path (str): Output file
+        generation (int): Build generation, one more than the existing file's by default
+    
+    Returns:
+        int: Generation written
+    """
+    if generation is None:
+        generation = read_generation(path) + 1
+    
+    strings = bytearray()
+    
+    def add_string(text):
+        data = text.encode('utf-8')
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+    
+    subjects = bytearray()
+    topics = bytearray()
+    keys = []
+    for subject_id, (subject, subject_data) in enumerate(knowledge_base.get("subjects", {}).items()):
+        name_offset, name_length = add_string(subject)
+        subjects += SUBJECT.pack(name_offset, name_length, len(keys), len(subject_data))
+        for topic, info in subject_data.items():
+            topic_offset, topic_length = add_string(topic)
+            if isinstance(info, str):
+                kind, text = INFO_TEXT, info
+            else:
+                kind, text = INFO_JSON, json.dumps(info, sort_keys=True)
+            info_offset, info_length = add_string(text)
+            topics += TOPIC.pack(subject_id, topic_offset, topic_length, info_offset, info_length, kind)
+            keys.append(_index_key(subject.encode('utf-8'), topic.encode('utf-8')))
+    
+    # Load factor of at most one half keeps probe sequences short
+    slot_count = 1
+    while slot_count < 2 * len(keys):
+        slot_count *= 2
+    slots = [0] * slot_count
+    for topic_id, key in enumerate(keys):
+        slot = key & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = topic_id + 1
+    index = struct.pack(f'<{slot_count}I', *slots)
+    
+    subjects_offset = HEADER.size
+    topics_offset = subjects_offset + len(subjects)
+    index_offset = topics_offset + len(topics)
+    strings_offset = index_offset + len(index)
+    header = HEADER.pack(
+        KB_MAGIC, KB_FORMAT_VERSION, generation,
+        len(subjects) // SUBJECT.size, len(keys), slot_count,
+        subjects_offset, topics_offset, index_offset, strings_offset,
+        bytes.fromhex(knowledge_base_digest(knowledge_base))
+    )
+    
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        for section in (header, subjects, topics, index, strings):
+            f.write(section)
+    os.replace(temporary, path)
+    return generation
+
+class CompiledKnowledgeBase(Mapping):
+    """Read-only, memory-mapped view of a compiled knowledge base"""
+    
+    def __init__(self, path):
+        """
+        Map a compiled knowledge base
+        
+        Args:
+            path (str): Compiled file
+        
+        Raises:
+            KnowledgeBaseFormatError: If the file is not a compiled knowledge base of this version
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise KnowledgeBaseFormatError(f"{path} is empty")
+        
+        if len(self._map) < HEADER.size or self._map[:4] != KB_MAGIC:
+            raise KnowledgeBaseFormatError(f"{path} is not a compiled knowledge base")
+        (_, version, self.generation, subject_count, self.topic_count, self._slot_count,
+         self._subjects_offset, self._topics_offset, self._index_offset, self._strings_offset,
+         digest) = HEADER.unpack_from(self._map)
+        if version != KB_FORMAT_VERSION:
+            raise KnowledgeBaseFormatError(f"{path} has format version {version}, expected {KB_FORMAT_VERSION}")
+        self.digest = digest.hex()
+        
+        # Subjects are few, so their names are decoded up front
+        self._subjects = {}
+        for subject_id in range(subject_count):
+            name_offset, name_length, first_topic, topic_count = SUBJECT.unpack_from(
+                self._map, self._subjects_offset + subject_id * SUBJECT.size)
+            name = self._string(name_offset, name_length)
+            self._subjects[name] = _Topics(self, subject_id, name, first_topic, topic_count)
+        self._subject_view = _Subjects(self._subjects)
+    
+    def __getitem__(self, key):
+        if key == "subjects":
+            return self._subject_view
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(("subjects",))
+    
+    def __len__(self):
+        return 1
+    
+    def stats(self):
+        """
+        Get file details
+        
+        Returns:
+            dict: Path, generation, size and counts
+        """
+        return {
+            'path': self.path,
+            'generation': self.generation,
+            'bytes': len(self._map),
+            'subjects': len(self._subjects),
+            'topics': self.topic_count
+        }
+    
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode('utf-8')
+    
+    def _topic(self, topic_id):
+        return TOPIC.unpack_from(self._map, self._topics_offset + topic_id * TOPIC.size)
+    
+    def _topic_name(self, topic_id):
+        _, name_offset, name_length, _, _, _ = self._topic(topic_id)
+        return self._string(name_offset, name_length)
+    
+    def _info(self, topic_id):
+        _, _, _, info_offset, info_length, kind = self._topic(topic_id)
+        text = self._string(info_offset, info_length)
+        return json.loads(text) if kind == INFO_JSON else text
+    
+    def _find(self, subject_id, subject_bytes, topic):
+        """Topic id of a topic name within a subject, or None"""
+        topic_bytes = topic.encode('utf-8')
+        mask = self._slot_count - 1
+        slot = _index_key(subject_bytes, topic_bytes) & mask
+        while True:
+            value, = SLOT.unpack_from(self._map, self._index_offset + slot * SLOT.size)
+            if not value:
+                return None
+            topic_subject, name_offset, name_length, _, _, _ = self._topic(value - 1)
+            if topic_subject == subject_id and name_length == len(topic_bytes):
+                start = self._strings_offset + name_offset
+                if self._map[start:start + name_length] == topic_bytes:
+                    return value - 1
+            slot = (slot + 1) & mask
+
+class _Subjects(Mapping):
+    """subject -> topics view of a compiled knowledge base"""
+    
+    def __init__(self, subjects):
+        self._subjects = subjects
+    
+    def __getitem__(self, subject):
+        return self._subjects[subject]
+    
+    def __iter__(self):
+        return iter(self._subjects)
+    
+    def __len__(self):
+        return len(self._subjects)
+
+class _Topics(Mapping):
+    """topic -> info view of one subject, decoding infos on access"""
+    
+    def __init__(self, knowledge_base, subject_id, subject, first_topic, topic_count):
+        self._knowledge_base = knowledge_base
+        self._subject_id = subject_id
+        self._subject_bytes = subject.encode('utf-8')
+        self._range = range(first_topic, first_topic + topic_count)
+    
+    def _id(self, topic):
+        if not isinstance(topic, str):
+            return None
+        return self._knowledge_base._find(self._subject_id, self._subject_bytes, topic)
+    
+    def __getitem__(self, topic):
+        topic_id = self._id(topic)
+        if topic_id is None:
+            raise KeyError(topic)
+        return self._knowledge_base._info(topic_id)
+    
+    def __contains__(self, topic):
+        return self._id(topic) is not None
+    
+    def __iter__(self):
+        for topic_id in self._range:
+            yield self._knowledge_base._topic_name(topic_id)
+    
+    def __len__(self):
+        return len(self._range)
+    
+    def items(self):
+        for topic_id in self._range:
+            yield self._knowledge_base._topic_name(topic_id), self._knowledge_base._info(topic_id)
+
+def open_knowledge_base(path):
+    """
+    Open a knowledge base file, compiled or JSON
+    
+    Args:
+        path (str): Knowledge base file
+    
+    Returns:
+        dict or CompiledKnowledgeBase: The knowledge base
+    
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    with open(path, 'rb') as f:
+        compiled = f.read(len(KB_MAGIC)) == KB_MAGIC
+    if compiled:
+        return CompiledKnowledgeBase(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def file_signature(path):
+    """Identity of a file's current content as far as stat can tell, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class KnowledgeBaseWatcher:
+    """Polls knowledge base files and reports changes from a background thread"""
+    
+    def __init__(self, paths, on_change, interval=5.0):
+        """
+        Initialize the watcher
+        
+        Args:
+            paths (list): Files to watch
+            on_change (callable): Called without arguments after any of them changes
+            interval (float): Seconds between polls
+        """
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._signature = self._current_signature()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _current_signature(self):
+        return tuple(file_signature(path) for path in self.paths)
+    
+    def start(self):
+        """Start polling"""
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._watch, name='knowledge-base-watcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+    
+    def check(self):
+        """
+        Poll once
+        
+        Returns:
+            bool: True if a change was reported
+        """
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            self.on_change()
+        except Exception as e:
+            logging.error(f"Knowledge base reload failed: {str(e)}")
+        return True
+    
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the knowledge base for memory-mapped loading")
+    parser.add_argument('--input', default=DEFAULT_KNOWLEDGE_BASE_SOURCE)
+    parser.add_argument('--output', default=os.environ.get('NLP_KNOWLEDGE_BASE_PATH') or DEFAULT_KNOWLEDGE_BASE_PATH)
+    parser.add_argument('--generation', type=int, help="Generation to write instead of the previous one plus one")
+    args = parser.parse_args()
+    
+    with open(args.input, 'r', encoding='utf-8') as f:
+        knowledge_base = json.load(f)
+    generation = compile_knowledge_base(knowledge_base, args.output, args.generation)
+    
+    start = time.perf_counter()
+    compiled = CompiledKnowledgeBase(args.output)
+    open_ms = (time.perf_counter() - start) * 1000
+    print(f"Wrote {args.output} generation {generation} ({os.path.getsize(args.output) / 1024:.0f} KB): "
+          f"{len(compiled['subjects'])} subjects, {compiled.topic_count} topics; opens in {open_ms:.1f} ms")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -4,7 +4,7 @@ Learning models for the Smart Learning with Personalized AI Tutor application
 
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, Text, ForeignKey, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import json
@@ -20,6 +20,10 @@ class CommunicationType(Enum):
 class LearningSession(Base):
     """Learning session model"""
     __tablename__ = 'learning_sessions'
+    __table_args__ = (
+        Index('ix_learning_sessions_user_start_time', 'user_id', 'start_time'),
+        Index('ix_learning_sessions_user_subject', 'user_id', 'subject'),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -61,6 +65,9 @@ class LearningSession(Base):
 class Conversation(Base):
     """Conversation model for tracking interactions"""
     __tablename__ = 'conversations'
+    __table_args__ = (
+        Index('ix_conversations_session_timestamp', 'learning_session_id', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True)
     learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
@@ -85,6 +92,23 @@ class Conversation(Base):
     
     # Relationships
     learning_session = relationship("LearningSession", back_populates="conversations")
+    topics = relationship("ConversationTopic", back_populates="conversation", cascade="all, delete-orphan")
+    
+    def set_topics(self, topics):
+        """
+        Set the topics covered by this conversation
+        
+        Keeps the JSON column for API responses and writes one
+        ConversationTopic row per distinct topic for SQL aggregation.
+        
+        Args:
+            topics (list): Topic names
+        """
+        self.topics_covered = json.dumps(topics)
+        self.topics = [
+            ConversationTopic(learning_session_id=self.learning_session_id, topic=topic)
+            for topic in _distinct(topics)
+        ]
     
     def to_dict(self):
         """Convert conversation to dictionary"""
@@ -106,6 +130,9 @@ class Conversation(Base):
 class Assessment(Base):
     """Assessment model for tracking learning progress"""
     __tablename__ = 'assessments'
+    __table_args__ = (
+        Index('ix_assessments_learning_session_id', 'learning_session_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
@@ -127,6 +154,26 @@ class Assessment(Base):
     
     # Relationships
     learning_session = relationship("LearningSession", back_populates="assessments")
+    tags = relationship("AssessmentTag", back_populates="assessment", cascade="all, delete-orphan")
+    
+    def set_feedback_tags(self, strengths, areas_for_improvement):
+        """
+        Set the strengths and areas for improvement of this assessment
+        
+        Keeps the JSON columns for API responses and writes one AssessmentTag
+        row per distinct entry for SQL aggregation.
+        
+        Args:
+            strengths (list): Strength descriptions
+            areas_for_improvement (list): Improvement area descriptions
+        """
+        self.strengths = json.dumps(strengths)
+        self.areas_for_improvement = json.dumps(areas_for_improvement)
+        self.tags = [
+            AssessmentTag(learning_session_id=self.learning_session_id, kind=kind, tag=tag)
+            for kind, values in ((AssessmentTag.STRENGTH, strengths), (AssessmentTag.IMPROVEMENT, areas_for_improvement))
+            for tag in _distinct(values)
+        ]
     
     def to_dict(self):
         """Convert assessment to dictionary"""
@@ -144,4 +191,46 @@ class Assessment(Base):
             'feedback': self.feedback,
             'strengths': json.loads(self.strengths) if self.strengths else None,
             'areas_for_improvement': json.loads(self.areas_for_improvement) if self.areas_for_improvement else None
-        } 
\ No newline at end of file
+        } 
+
+class ConversationTopic(Base):
+    """Topic covered by a conversation, one row per topic"""
+    __tablename__ = 'conversation_topics'
+    __table_args__ = (
+        Index('ix_conversation_topics_session_topic', 'learning_session_id', 'topic'),
+        Index('ix_conversation_topics_conversation_id', 'conversation_id'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey('conversations.id'), nullable=False)
+    # Denormalized from the conversation so session aggregates skip the join
+    learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
+    topic = Column(String(128), nullable=False)
+    
+    # Relationships
+    conversation = relationship("Conversation", back_populates="topics")
+
+class AssessmentTag(Base):
+    """Strength or area for improvement noted in an assessment, one row per entry"""
+    __tablename__ = 'assessment_tags'
+    __table_args__ = (
+        Index('ix_assessment_tags_session_kind_tag', 'learning_session_id', 'kind', 'tag'),
+        Index('ix_assessment_tags_assessment_id', 'assessment_id'),
+    )
+    
+    STRENGTH = 'strength'
+    IMPROVEMENT = 'improvement'
+    
+    id = Column(Integer, primary_key=True)
+    assessment_id = Column(Integer, ForeignKey('assessments.id'), nullable=False)
+    # Denormalized from the assessment so progress aggregates skip the join
+    learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
+    kind = Column(String(16), nullable=False)  # strength, improvement
+    tag = Column(String(255), nullable=False)
+    
+    # Relationships
+    assessment = relationship("Assessment", back_populates="tags")
+
+def _distinct(values):
+    """Drop empty and duplicate entries, keeping the first occurrence order"""
+    return list(dict.fromkeys(str(value) for value in values if value))
\ No newline at end of file
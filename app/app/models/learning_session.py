@@ -2,7 +2,7 @@
 Learning session models for the Smart Learning with Personalized AI Tutor application
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import json
@@ -11,7 +11,11 @@ from app.models.base import Base
 class LearningSession(Base):
     """Learning session model"""
     __tablename__ = 'learning_sessions'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_learning_sessions_user_start_time', 'user_id', 'start_time'),
+        Index('ix_learning_sessions_user_subject', 'user_id', 'subject'),
+        {'extend_existing': True}
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -45,7 +49,10 @@ class LearningSession(Base):
 class Conversation(Base):
     """Conversation model for learning sessions"""
     __tablename__ = 'conversations'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_conversations_session_timestamp', 'learning_session_id', 'timestamp'),
+        {'extend_existing': True}
+    )
     
     id = Column(Integer, primary_key=True)
     learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
@@ -69,7 +76,10 @@ class Conversation(Base):
 class Assessment(Base):
     """Assessment model for learning sessions"""
     __tablename__ = 'assessments'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_assessments_learning_session_id', 'learning_session_id'),
+        {'extend_existing': True}
+    )
     
     id = Column(Integer, primary_key=True)
     learning_session_id = Column(Integer, ForeignKey('learning_sessions.id'), nullable=False)
@@ -0,0 +1,207 @@
+"""
+Prebuilt NLP lexicon for the Smart Learning with Personalized AI Tutor application
+
+Text preprocessing needs three things from the NLTK data: the English stopword
+list, the WordNet noun lemmas and exceptions (all WordNetLemmatizer.lemmatize
+uses with its default part of speech) and the Punkt parameters for sentence
+boundaries. They are extracted once at build time into a compact pickle that
+loads in milliseconds, so web workers neither import NLTK nor look for (and
+download) its data when they start.
+
+Usage:
+    python -m app.models.lexicon [--output app/models/nlp_lexicon.pickle]
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import time
+from app.models.tokenizers import SentenceParameters
+
+LEXICON_VERSION = 1
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nlp_lexicon.pickle')
+
+# NLTK data used by the full-NLTK mode and by the build
+NLTK_RESOURCES = (
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet')
+)
+
+# WordNet's detachment rules for nouns (nltk.corpus.reader.wordnet)
+NOUN_SUBSTITUTIONS = (
+    ('s', ''),
+    ('ses', 's'),
+    ('ves', 'f'),
+    ('xes', 'x'),
+    ('zes', 'z'),
+    ('ches', 'ch'),
+    ('shes', 'sh'),
+    ('men', 'man'),
+    ('ies', 'y')
+)
+
+class LexiconError(Exception):
+    """Raised when the lexicon file is missing or was built by another version"""
+
+class Lexicon:
+    """Stopwords, noun lemmatization and sentence parameters without NLTK"""
+    
+    def __init__(self, stop_words, noun_lemmas, noun_exceptions, sentence_parameters):
+        """
+        Initialize the lexicon
+        
+        Args:
+            stop_words (frozenset): English stopwords
+            noun_lemmas (frozenset): Alphanumeric WordNet noun lemmas
+            noun_exceptions (dict): Irregular noun form to its lemmas
+            sentence_parameters (SentenceParameters): Punkt parameters for English
+        """
+        self.stop_words = stop_words
+        self.noun_lemmas = noun_lemmas
+        self.noun_exceptions = noun_exceptions
+        self.sentence_parameters = sentence_parameters
+    
+    def lemmatize(self, word):
+        """
+        Lemmatize a lowercase word as WordNetLemmatizer().lemmatize(word) does
+        
+        Args:
+            word (str): Word to lemmatize
+        
+        Returns:
+            str: Shortest noun lemma found in WordNet, or the word itself
+        """
+        if word in self.noun_exceptions:
+            forms = self.noun_exceptions[word]
+        else:
+            forms = [word[:-len(old)] + new for old, new in NOUN_SUBSTITUTIONS if word.endswith(old)]
+        
+        lemmas = [form for form in [word] + list(forms) if form in self.noun_lemmas]
+        return min(lemmas, key=len) if lemmas else word
+
+def ensure_nltk_data(download=True):
+    """
+    Make sure the NLTK data used by the tutor is installed
+    
+    Args:
+        download (bool): Download missing resources instead of failing
+    
+    Raises:
+        LookupError: If a resource is missing and download is False
+    """
+    import nltk
+    
+    for path, package in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if not download:
+                raise
+            nltk.download(package)
+
+def build_lexicon(download=True):
+    """
+    Extract the lexicon from the NLTK data
+    
+    Args:
+        download (bool): Download missing NLTK resources first
+    
+    Returns:
+        Lexicon: The extracted lexicon
+    """
+    ensure_nltk_data(download)
+    
+    from nltk.corpus import stopwords, wordnet
+    from app.models.tokenizers import load_sentence_parameters
+    
+    # Tokens are alphanumeric, so other lemmas can only be reached through
+    # the exception list
+    noun_exceptions = {
+        form: tuple(lemmas) for form, lemmas in wordnet._exception_map['n'].items()
+        if form.isalnum()
+    }
+    reachable = set(form for forms in noun_exceptions.values() for form in forms)
+    noun_lemmas = frozenset(
+        lemma for lemma, parts in wordnet._lemma_pos_offset_map.items()
+        if 'n' in parts and (lemma.isalnum() or lemma in reachable)
+    )
+    return Lexicon(
+        frozenset(stopwords.words('english')),
+        noun_lemmas,
+        noun_exceptions,
+        load_sentence_parameters()
+    )
+
+def save_lexicon(lexicon, path=DEFAULT_LEXICON_PATH):
+    """
+    Write the lexicon file atomically
+    
+    Args:
+        lexicon (Lexicon): Lexicon to write
+        path (str): Output file
+    """
+    payload = {
+        'version': LEXICON_VERSION,
+        'stop_words': lexicon.stop_words,
+        'noun_lemmas': lexicon.noun_lemmas,
+        'noun_exceptions': lexicon.noun_exceptions,
+        'sentence_parameters': tuple(lexicon.sentence_parameters)
+    }
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+def load_lexicon(path=DEFAULT_LEXICON_PATH):
+    """
+    Load the lexicon file
+    
+    Args:
+        path (str): Lexicon file written by save_lexicon
+    
+    Returns:
+        Lexicon: The loaded lexicon
+    
+    Raises:
+        LexiconError: If the file is missing or was built by another version
+    """
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        raise LexiconError(f"NLP lexicon not found at {path}, build it with 'python -m app.models.lexicon'")
+    
+    if payload.get('version') != LEXICON_VERSION:
+        raise LexiconError(f"NLP lexicon at {path} has version {payload.get('version')}, expected {LEXICON_VERSION}")
+    
+    return Lexicon(
+        payload['stop_words'],
+        payload['noun_lemmas'],
+        payload['noun_exceptions'],
+        SentenceParameters(*payload['sentence_parameters'])
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the NLP lexicon used by the web workers")
+    parser.add_argument('--output', default=os.environ.get('NLP_LEXICON_PATH') or DEFAULT_LEXICON_PATH)
+    parser.add_argument('--no-download', action='store_true', help="Fail instead of downloading missing NLTK data")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    lexicon = build_lexicon(download=not args.no_download)
+    save_lexicon(lexicon, args.output)
+    
+    start = time.perf_counter()
+    load_lexicon(args.output)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB): "
+          f"{len(lexicon.stop_words)} stopwords, {len(lexicon.noun_lemmas)} noun lemmas, "
+          f"{len(lexicon.noun_exceptions)} noun exceptions, "
+          f"{len(lexicon.sentence_parameters.abbrev_types)} abbreviations; loads in {load_ms:.1f} ms")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Dynamic micro-batching for model inference in the Smart Learning with Personalized AI Tutor application
+
+Concurrent request threads submit single inputs and get a future back. A
+worker thread gathers up to max_batch_size inputs, or whatever arrived within
+max_wait_ms of the first one, and runs them through the model in one call.
+On CPU this turns many batch-size-1 forward passes into a few larger ones.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_sentiment_batcher = None
+
+class BatcherFullError(Exception):
+    """Raised when the batching queue is full"""
+
+class MicroBatcher:
+    """Gathers concurrent single-item calls into batched calls"""
+    
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5, max_queue=1024, timeout=None, name='batcher'):
+        """
+        Initialize the batcher
+        
+        Args:
+            batch_fn (callable): Takes a list of inputs, returns a list of outputs in the same order
+            max_batch_size (int): Largest batch passed to batch_fn
+            max_wait_ms (float): Longest time the first item of a batch waits for company
+            max_queue (int): Maximum number of waiting items
+            timeout (float): Default seconds a caller waits for its result
+            name (str): Worker thread name
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._metrics_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.total_queue_wait = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def submit(self, item):
+        """
+        Queue one input
+        
+        Args:
+            item (object): Model input
+        
+        Returns:
+            Future: Resolves to the model output for this input
+        
+        Raises:
+            BatcherFullError: If the queue is full
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except queue.Full:
+            raise BatcherFullError("Micro-batcher queue is full")
+        return future
+    
+    def __call__(self, item, timeout=None):
+        """Submit one input and wait for its output"""
+        return self.submit(item).result(timeout if timeout is not None else self.timeout)
+    
+    def metrics(self):
+        """
+        Get batching metrics
+        
+        Returns:
+            dict: Queue depth, batch counts and sizes, average queue wait
+        """
+        with self._metrics_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'items': self.items,
+                'errors': self.errors,
+                'avg_batch_size': (self.items / self.batches) if self.batches else 0.0,
+                'largest_batch': self.max_batch_seen,
+                'avg_queue_wait_ms': (self.total_queue_wait / self.items * 1000) if self.items else 0.0
+            }
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Take what is already queued without waiting, then wait out the deadline
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+    
+    def _process(self, batch):
+        started = time.perf_counter()
+        inputs = [item for item, _, _ in batch]
+        try:
+            outputs = self.batch_fn(inputs)
+            if len(outputs) != len(inputs):
+                raise ValueError(f"Batch function returned {len(outputs)} results for {len(inputs)} inputs")
+        except Exception as e:
+            logging.error(f"Micro-batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            with self._metrics_lock:
+                self.errors += 1
+            return
+        
+        for (_, future, _), output in zip(batch, outputs):
+            future.set_result(output)
+        
+        with self._metrics_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.total_queue_wait += sum(started - queued for _, _, queued in batch)
+
+def _run_sentiment_batch(texts):
+    from app.models.model_registry import model_registry, SENTIMENT_MODEL
+    
+    sentiment_analyzer = model_registry.get(SENTIMENT_MODEL)
+    if sentiment_analyzer is None:
+        raise RuntimeError("Sentiment model is not available")
+    return sentiment_analyzer(texts, batch_size=len(texts))
+
+def init_app(app):
+    """
+    Create the shared sentiment micro-batcher if batching is enabled
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _sentiment_batcher
+    
+    batch_size = app.config.get('NLP_SENTIMENT_BATCH_SIZE', 0)
+    if batch_size <= 1:
+        _sentiment_batcher = None
+        return
+    
+    _sentiment_batcher = MicroBatcher(
+        _run_sentiment_batch,
+        max_batch_size=batch_size,
+        max_wait_ms=app.config.get('NLP_SENTIMENT_BATCH_WAIT_MS', 5),
+        max_queue=app.config.get('NLP_SENTIMENT_BATCH_MAX_QUEUE', 1024),
+        timeout=app.config.get('NLP_SENTIMENT_BATCH_TIMEOUT', 5.0),
+        name='sentiment-batcher'
+    )
+
+def get_sentiment_batcher():
+    """Get the shared sentiment micro-batcher, or None when batching is disabled"""
+    return _sentiment_batcher
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Process-wide model registry for the Smart Learning with Personalized AI Tutor application
+
+Heavy models (Hugging Face pipelines, the speech recognizer) are registered
+by name with a loader function. Each one is built on first use and shared by
+every NLPProcessor in the process. A model that fails to load is remembered
+so later calls fall back immediately instead of retrying the import. Models
+can be preloaded with warmup() and dropped again after a period without use.
+"""
+
+import logging
+import threading
+import time
+
+# Names of the models registered by default
+SENTIMENT_MODEL = 'sentiment-analysis'
+NER_MODEL = 'ner'
+QA_MODEL = 'question-answering'
+SPEECH_RECOGNIZER = 'speech-recognizer'
+
+class _Entry:
+    """Load state of one registered model"""
+    
+    def __init__(self, loader):
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.model = None
+        self.loaded = False
+        self.error = None
+        self.load_seconds = None
+        self.last_used = None
+
+class ModelRegistry:
+    """Lazily loaded, shared models keyed by name"""
+    
+    def __init__(self, idle_timeout=0, clock=time.monotonic):
+        """
+        Initialize the registry
+        
+        Args:
+            idle_timeout (float): Seconds without use after which a model is
+                unloaded, 0 to keep models for the life of the process
+            clock (callable): Monotonic clock, replaceable for benchmarks
+        """
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._reaper = None
+        self.idle_timeout = idle_timeout
+    
+    def register(self, name, loader):
+        """
+        Register a model loader, replacing any previous one
+        
+        Args:
+            name (str): Model name
+            loader (callable): Builds and returns the model
+        """
+        with self._lock:
+            self._entries[name] = _Entry(loader)
+    
+    def get(self, name):
+        """
+        Get a model, loading it on first use
+        
+        Args:
+            name (str): Model name
+        
+        Returns:
+            object: The model, or None if it failed to load
+        """
+        entry = self._entries[name]
+        entry.last_used = self._clock()
+        model = entry.model
+        if model is not None:
+            return model
+        
+        # Only one thread builds a given model; the others wait for it
+        with entry.lock:
+            if not entry.loaded:
+                self._load(name, entry)
+            return entry.model
+    
+    def is_loaded(self, name):
+        """Check whether a model is currently in memory"""
+        entry = self._entries.get(name)
+        return bool(entry and entry.loaded and entry.model is not None)
+    
+    def warmup(self, names=None):
+        """
+        Load models ahead of the first request
+        
+        Args:
+            names (list): Model names, defaults to every registered model
+        
+        Returns:
+            dict: Whether each model is available after warmup
+        """
+        names = list(self._entries) if names is None else names
+        return {name: self.get(name) is not None for name in names}
+    
+    def unload(self, name):
+        """
+        Drop a loaded model so it is rebuilt on next use
+        
+        Requests already holding the model keep their reference until they finish.
+        
+        Args:
+            name (str): Model name
+        """
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is not None:
+                logging.info(f"Unloading model '{name}'")
+            entry.loaded = False
+            entry.model = None
+            entry.error = None
+    
+    def unload_idle(self):
+        """
+        Unload every model unused for longer than idle_timeout
+        
+        Returns:
+            list: Names of the unloaded models
+        """
+        if not self.idle_timeout:
+            return []
+        
+        now = self._clock()
+        unloaded = []
+        for name, entry in list(self._entries.items()):
+            if entry.loaded and entry.model is not None and now - entry.last_used > self.idle_timeout:
+                self.unload(name)
+                unloaded.append(name)
+        return unloaded
+    
+    def start_reaper(self):
+        """Start the background thread applying the idle unload policy"""
+        if self._reaper is not None or not self.idle_timeout:
+            return
+        self._reaper = threading.Thread(target=self._reap, name='model-reaper', daemon=True)
+        self._reaper.start()
+    
+    def stats(self):
+        """
+        Get the load state of every registered model
+        
+        Returns:
+            dict: Per-model load state, load time and idle time
+        """
+        now = self._clock()
+        return {
+            name: {
+                'loaded': entry.loaded and entry.model is not None,
+                'error': entry.error,
+                'load_seconds': entry.load_seconds,
+                'idle_seconds': (now - entry.last_used) if entry.last_used is not None else None
+            }
+            for name, entry in self._entries.items()
+        }
+    
+    def _load(self, name, entry):
+        start = time.perf_counter()
+        try:
+            entry.model = entry.loader()
+            entry.error = None
+            logging.info(f"Loaded model '{name}' in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            # Remember the failure; callers use their fallback from now on
+            entry.model = None
+            entry.error = str(e)
+            logging.warning(f"Model '{name}' unavailable: {str(e)}")
+        entry.load_seconds = time.perf_counter() - start
+        entry.loaded = True
+    
+    def _reap(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            self.unload_idle()
+
+def _pipeline_loader(task):
+    def load():
+        from transformers import pipeline
+        return pipeline(task)
+    return load
+
+def _load_speech_recognizer():
+    import speech_recognition as sr
+    return sr.Recognizer()
+
+model_registry = ModelRegistry()
+for _task in (SENTIMENT_MODEL, NER_MODEL, QA_MODEL):
+    model_registry.register(_task, _pipeline_loader(_task))
+model_registry.register(SPEECH_RECOGNIZER, _load_speech_recognizer)
+
+def init_app(app):
+    """
+    Apply the NLP model settings of the app to the shared registry
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    model_registry.idle_timeout = app.config.get('NLP_MODEL_IDLE_TIMEOUT', 0)
+    model_registry.start_reaper()
+    
+    # Quantized or ONNX Runtime pipelines instead of the fp32 ones
+    backend = app.config.get('NLP_INFERENCE_BACKEND', 'pytorch')
+    if backend != 'pytorch':
+        from app.models.inference_backends import use_inference_backend
+        use_inference_backend(model_registry, backend, app.config.get('NLP_ONNX_CACHE_DIR'))
+    
+    # Pipelines hosted by the shared model server instead of this worker
+    socket = app.config.get('NLP_MODEL_SERVER_SOCKET')
+    if socket:
+        from app.models.model_server import use_model_server, default_socket_path
+        use_model_server(
+            model_registry,
+            default_socket_path() if socket == 'default' else socket,
+            app.config.get('NLP_MODEL_SERVER_AUTHKEY'),
+            timeout=app.config.get('NLP_MODEL_SERVER_TIMEOUT', 2.0)
+        )
+    
+    warmup = app.config.get('NLP_WARMUP_MODELS', '')
+    if warmup:
+        names = None if warmup == 'all' else [name.strip() for name in warmup.split(',') if name.strip()]
+        app.logger.info(f"Warming up NLP models: {model_registry.warmup(names)}")
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Local model server for the Smart Learning with Personalized AI Tutor application
+
+One process hosts the transformer pipelines and serves them to every web
+worker over a Unix socket, so model memory no longer grows with the number of
+workers. Web workers register RemotePipeline proxies in the model registry in
+place of the local pipelines; NLPProcessor calls them exactly like a Hugging
+Face pipeline and falls back to its keyword paths when the server is slow or
+down.
+
+Server and clients must share NLP_MODEL_SERVER_AUTHKEY; neither side runs
+without it. The socket defaults to $XDG_RUNTIME_DIR, or a 0700 directory of
+the current user under the system temp directory, and is created with no
+access for other users.
+
+Usage:
+    NLP_MODEL_SERVER_AUTHKEY=... python -m app.models.model_server [--socket PATH] [--warmup all] [--backend pytorch]
+"""
+
+import argparse
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+from app.models.model_registry import model_registry, SENTIMENT_MODEL, NER_MODEL, QA_MODEL
+
+SOCKET_NAME = 'tutor-models.sock'
+
+# Models the server will run on behalf of clients
+SERVED_MODELS = (SENTIMENT_MODEL, NER_MODEL, QA_MODEL)
+
+class ModelServerError(Exception):
+    """Raised when the model server cannot answer a request in time"""
+
+def default_socket_path():
+    """
+    Get the socket path used when none is configured
+    
+    Returns:
+        str: Socket in $XDG_RUNTIME_DIR, or in a private per-user directory
+            under the system temp directory
+    
+    Raises:
+        RuntimeError: If the per-user directory is accessible to other users
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    
+    runtime_dir = os.path.join(tempfile.gettempdir(), f"tutor-models-{os.getuid()}")
+    os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+    # Someone else may have created the directory first
+    info = os.lstat(runtime_dir)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{runtime_dir} must be a directory owned by this user with mode 0700")
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+def _require_authkey(authkey):
+    if not authkey:
+        raise ValueError("The model server needs a shared secret: set NLP_MODEL_SERVER_AUTHKEY")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+class ModelServer:
+    """Serves registry models over a Unix socket, one thread per client connection"""
+    
+    def __init__(self, address, authkey, registry=model_registry):
+        """
+        Initialize the server
+        
+        Args:
+            address (str): Unix socket path
+            authkey (bytes): Shared secret clients must present
+            registry (ModelRegistry): Registry holding the served models
+        
+        Raises:
+            ValueError: If no authkey is given
+        """
+        self.address = address
+        self.authkey = _require_authkey(authkey)
+        self.registry = registry
+        self._listener = None
+    
+    def serve_forever(self):
+        """Accept client connections until the process is stopped"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        
+        # Only the owning user (the web workers) may connect; the socket is
+        # created with these permissions instead of being opened up until a chmod
+        previous_umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(previous_umask)
+        logging.info(f"Model server listening on {self.address}")
+        
+        try:
+            while True:
+                try:
+                    connection = self._listener.accept()
+                except Exception as e:
+                    logging.warning(f"Rejected model server client: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+        finally:
+            self.close()
+    
+    def close(self):
+        """Stop listening and remove the socket file"""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+    
+    def handle(self, request):
+        """
+        Run one request
+        
+        Args:
+            request (tuple): (model name or None for a ping, args, kwargs)
+        
+        Returns:
+            tuple: ('ok', result) or ('error', message)
+        """
+        name, args, kwargs = request
+        if name is None:
+            return ('ok', 'pong')
+        if name not in SERVED_MODELS:
+            return ('error', f"Unknown model '{name}'")
+        
+        model = self.registry.get(name)
+        if model is None:
+            return ('error', f"Model '{name}' is not available on the server")
+        try:
+            return ('ok', model(*args, **kwargs))
+        except Exception as e:
+            return ('error', str(e))
+    
+    def _serve_client(self, connection):
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    return
+                connection.send(self.handle(request))
+        except Exception as e:
+            logging.error(f"Model server connection error: {str(e)}")
+        finally:
+            connection.close()
+
+class ModelServerClient:
+    """Client for the model server with per-thread connections and timeouts"""
+    
+    def __init__(self, address, authkey, timeout=2.0, retry_after=5.0):
+        """
+        Initialize the client
+        
+        Args:
+            address (str): Unix socket path of the server
+            authkey (bytes): Shared secret of the server
+            timeout (float): Seconds to wait for a response
+            retry_after (float): Seconds to skip the server after a failure
+        
+        Raises:
+            ValueError: If no authkey is given
+        """
+        self.address = address
+        self.timeout = timeout
+        self.authkey = _require_authkey(authkey)
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+    
+    def call(self, name, *args, **kwargs):
+        """
+        Run a model on the server
+        
+        Args:
+            name (str): Model name, None to ping
+        
+        Returns:
+            object: Model output
+        
+        Raises:
+            ModelServerError: If the server is unreachable, times out or fails
+        """
+        if time.monotonic() < self._down_until:
+            raise ModelServerError("Model server marked unavailable")
+        
+        try:
+            connection = self._connection()
+            connection.send((name, args, kwargs))
+            if not connection.poll(self.timeout):
+                raise ModelServerError(f"Model server did not answer within {self.timeout}s")
+            status, result = connection.recv()
+        except ModelServerError:
+            self._fail()
+            raise
+        except Exception as e:
+            self._fail()
+            raise ModelServerError(f"Model server unreachable: {str(e)}")
+        
+        if status != 'ok':
+            raise ModelServerError(result)
+        return result
+    
+    def ping(self):
+        """Check that the server is reachable"""
+        return self.call(None) == 'pong'
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            self._local.connection = connection
+        return connection
+    
+    def _fail(self):
+        # A late answer would be read by the next request, so drop the connection
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+        self._down_until = time.monotonic() + self.retry_after
+
+class RemotePipeline:
+    """Callable stand-in for a pipeline hosted by the model server"""
+    
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+    
+    def __call__(self, *args, **kwargs):
+        return self.client.call(self.name, *args, **kwargs)
+
+def use_model_server(registry, address, authkey, timeout=2.0):
+    """
+    Serve the pipelines of a registry from the model server
+    
+    Args:
+        registry (ModelRegistry): Registry used by NLPProcessor
+        address (str): Unix socket path of the server
+        authkey (bytes): Shared secret of the server
+        timeout (float): Seconds to wait for each response
+    
+    Returns:
+        ModelServerClient: Client shared by the remote pipelines
+    
+    Raises:
+        ValueError: If no authkey is given
+    """
+    client = ModelServerClient(address, authkey, timeout=timeout)
+    for name in SERVED_MODELS:
+        registry.register(name, lambda name=name: RemotePipeline(client, name))
+    return client
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the NLP pipelines to local web workers")
+    parser.add_argument('--socket', default=os.environ.get('NLP_MODEL_SERVER_SOCKET'),
+                        help="Unix socket path (default: tutor-models.sock in $XDG_RUNTIME_DIR or a private temp directory)")
+    parser.add_argument('--warmup', default='all', help="Comma-separated model names, 'all' or 'none'")
+    parser.add_argument('--backend', default=os.environ.get('NLP_INFERENCE_BACKEND') or 'pytorch',
+                        help="Inference backend: pytorch, int8, onnx or onnx-int8")
+    args = parser.parse_args()
+    
+    authkey = os.environ.get('NLP_MODEL_SERVER_AUTHKEY')
+    if not authkey:
+        parser.error("NLP_MODEL_SERVER_AUTHKEY must be set to the secret shared with the web workers")
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.backend != 'pytorch':
+        from app.models.inference_backends import use_inference_backend
+        use_inference_backend(model_registry, args.backend, os.environ.get('NLP_ONNX_CACHE_DIR'))
+    
+    if args.warmup != 'none':
+        names = list(SERVED_MODELS) if args.warmup == 'all' else args.warmup.split(',')
+        logging.info(f"Warmed up models: {model_registry.warmup(names)}")
+    
+    ModelServer(args.socket or default_socket_path(), authkey).serve_forever()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
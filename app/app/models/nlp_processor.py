@@ -5,36 +5,100 @@ NLP processor for intelligent conversation handling in the Smart Learning with P
 import json
 import re
 import numpy as np
-from collections import Counter
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
-import requests
+from collections import Counter, namedtuple
 import os
 import tempfile
 import base64
 import logging
-import speech_recognition as sr
-from gtts import gTTS
+import threading
+import time
+from functools import lru_cache
 from app.models.ai_model import AIModelType
+from app.models.model_registry import model_registry, SENTIMENT_MODEL, NER_MODEL, QA_MODEL, SPEECH_RECOGNIZER
+from app.models.micro_batcher import get_sentiment_batcher
+from app.models.provider_transport import get_transport, iter_sse_data, iter_ndjson
+from app.models.provider_router import get_router, routing_policy, model_key, Route
+from app.models.circuit_breaker import get_guard
+from app.models.tokenizers import get_tokenizer
+from app.models.knowledge_index import KnowledgeIndex
+from app.models.knowledge_retriever import load_knowledge_retriever, DEFAULT_RETRIEVER_PATH
+from app.models.qa_engine import QAEngine, DEFAULT_TOP_K as DEFAULT_QA_TOP_K, DEFAULT_CHUNK_WORDS, DEFAULT_CACHE_SIZE
+from app.models.response_cache import LRUCache, skill_bucket, length_bucket
+from app.models.semantic_cache import (
+    SemanticCache, CacheScope, question_vector,
+    DEFAULT_SIZE as DEFAULT_SEMANTIC_CACHE_SIZE, DEFAULT_THRESHOLD, DEFAULT_TTL
+)
+from app.models import response_templates
+from app.models.knowledge_store import (
+    open_knowledge_base, knowledge_base_digest, CompiledKnowledgeBase, KnowledgeBaseWatcher,
+    DEFAULT_KNOWLEDGE_BASE_PATH, DEFAULT_KNOWLEDGE_BASE_SOURCE
+)
+from app.models.lexicon import load_lexicon, ensure_nltk_data, LexiconError, DEFAULT_LEXICON_PATH
 
-# Download NLTK resources if not already downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet')
+# Distinct tokens whose stopword check and lemma are memoized per processor
+TOKEN_CACHE_SIZE = int(os.environ.get('NLP_TOKEN_CACHE_SIZE') or 20000)
+
+# Word tokenizer backend: 'regex' (default) or 'nltk' (see app.models.tokenizers)
+TOKENIZER = os.environ.get('NLP_TOKENIZER') or 'regex'
+
+# Stopwords, lemmas and sentence parameters come from the prebuilt lexicon
+# (see app.models.lexicon); full-NLTK mode reads the NLTK corpora instead
+FULL_NLTK = os.environ.get('NLP_FULL_NLTK', 'false').lower() == 'true'
+LEXICON_PATH = os.environ.get('NLP_LEXICON_PATH') or DEFAULT_LEXICON_PATH
+
+# TF-IDF retrieval adds the top entries similar to the message to the
+# topic matches (see app.models.knowledge_retriever); a top-k of 0 disables it
+RETRIEVAL_TOP_K = int(os.environ.get('NLP_RETRIEVAL_TOP_K') or 3)
+RETRIEVAL_MIN_SCORE = float(os.environ.get('NLP_RETRIEVAL_MIN_SCORE') or 0.15)
+RETRIEVER_PATH = os.environ.get('NLP_TFIDF_PATH') or DEFAULT_RETRIEVER_PATH
+
+# Compiled knowledge base (see app.models.knowledge_store), or the JSON source
+# while it has not been compiled. Both are polled for changes every
+# NLP_KNOWLEDGE_BASE_RELOAD_INTERVAL seconds; 0 disables hot reload
+KNOWLEDGE_BASE_PATH = os.environ.get('NLP_KNOWLEDGE_BASE_PATH') or DEFAULT_KNOWLEDGE_BASE_PATH
+KNOWLEDGE_BASE_SOURCE = os.environ.get('NLP_KNOWLEDGE_BASE_SOURCE') or DEFAULT_KNOWLEDGE_BASE_SOURCE
+KNOWLEDGE_BASE_RELOAD_INTERVAL = float(os.environ.get('NLP_KNOWLEDGE_BASE_RELOAD_INTERVAL') or 5)
+
+# The BERT handler answers from the top-k chunks of the relevant passages in
+# one forward pass (see app.models.qa_engine)
+QA_TOP_K = int(os.environ.get('NLP_QA_TOP_K') or DEFAULT_QA_TOP_K)
+QA_CHUNK_WORDS = int(os.environ.get('NLP_QA_CHUNK_WORDS') or DEFAULT_CHUNK_WORDS)
+QA_CACHE_SIZE = int(os.environ.get('NLP_QA_CACHE_SIZE') or DEFAULT_CACHE_SIZE)
+
+# Rule-based responses kept per knowledge base entries, learning style, skill
+# and length range (see app.models.response_cache); 0 disables the cache
+RESPONSE_CACHE_SIZE = int(os.environ.get('NLP_RESPONSE_CACHE_SIZE') or 4096)
+
+# Answers of the remote LLMs are reused for similar questions in the same
+# model, subjects, learning style and skill range (see app.models.semantic_cache);
+# a size of 0 disables the cache
+SEMANTIC_CACHE_SIZE = int(os.environ.get('NLP_SEMANTIC_CACHE_SIZE') or DEFAULT_SEMANTIC_CACHE_SIZE)
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('NLP_SEMANTIC_CACHE_THRESHOLD') or DEFAULT_THRESHOLD)
+SEMANTIC_CACHE_TTL = float(os.environ.get('NLP_SEMANTIC_CACHE_TTL') or DEFAULT_TTL)
+
+# Model types whose answers are cached; the custom endpoint receives the whole
+# profile and conversation, so its answers may be specific to one student
+SEMANTIC_CACHE_MODEL_TYPES = (AIModelType.GPT, AIModelType.LLAMA, AIModelType.CLAUDE)
+
+MessageAnalysis = namedtuple('MessageAnalysis', [
+    'tokens',
+    'topics',
+    'sentiment',
+    'engagement',
+    'learning_style',
+    'learning_style_scores'
+])
+MessageAnalysis.__doc__ = """Everything the tutor routes derive from one user message, computed from a single tokenization"""
+
+KnowledgeSnapshot = namedtuple('KnowledgeSnapshot', [
+    'generation',
+    'path',
+    'knowledge_base',
+    'index',
+    'retriever',
+    'qa'
+])
+KnowledgeSnapshot.__doc__ = """A loaded knowledge base and the lookup structures built over it, replaced as a whole on reload"""
 
 class NLPProcessor:
     """NLP processor for intelligent conversation handling"""
@@ -46,33 +110,48 @@ class NLPProcessor:
         Args:
             model_path (str): Path to the NLP model
         """
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        sentence_parameters = None
+        if FULL_NLTK:
+            self._load_nltk_corpora()
+        else:
+            try:
+                lexicon = load_lexicon(LEXICON_PATH)
+            except LexiconError as e:
+                logging.warning(f"{str(e)}; using the NLTK corpora")
+                self._load_nltk_corpora()
+            else:
+                # The lexicon lemmatizes exactly like WordNetLemmatizer
+                self.lemmatizer = lexicon
+                self.stop_words = lexicon.stop_words
+                sentence_parameters = lexicon.sentence_parameters
+        self.tokenizer = get_tokenizer(TOKENIZER, sentence_parameters)
         
-        # Initialize sentiment analysis pipeline
-        try:
-            self.sentiment_analyzer = pipeline("sentiment-analysis")
-        except:
-            # Fallback to a simpler approach if transformers not available
-            self.sentiment_analyzer = None
-            
-        # Initialize named entity recognition
-        try:
-            self.ner = pipeline("ner")
-        except:
-            self.ner = None
-            
-        # Initialize question answering
-        try:
-            self.qa = pipeline("question-answering")
-        except:
-            self.qa = None
-            
-        # Load subject-specific knowledge base
-        self.knowledge_base = self._load_knowledge_base()
+        # Student vocabulary is small and repeats constantly, so the stopword
+        # check and lemma of each distinct token are computed once
+        self._normalize_token = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._normalize_token_uncached)
+        
+        # Rule-based responses repeat for the same entries and profile ranges
+        self._response_cache = LRUCache(RESPONSE_CACHE_SIZE)
         
-        # TF-IDF vectorizer for topic extraction
-        self.vectorizer = TfidfVectorizer(max_features=1000)
+        # LLM answers are reused for reworded questions
+        self._semantic_cache = None
+        if SEMANTIC_CACHE_SIZE > 0:
+            self._semantic_cache = SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL)
+        
+        # Transformer pipelines and the speech recognizer are loaded on first
+        # use through the shared model registry (see the properties below)
+        
+        # Load subject-specific knowledge base. Lookups read self._knowledge
+        # once, so a reload swaps the knowledge base, index and retriever
+        # together; the watcher takes its baseline before the first load
+        self._knowledge_lock = threading.Lock()
+        self._knowledge_watcher = KnowledgeBaseWatcher(
+            [KNOWLEDGE_BASE_PATH, KNOWLEDGE_BASE_SOURCE],
+            self.reload_knowledge_base,
+            KNOWLEDGE_BASE_RELOAD_INTERVAL
+        )
+        self._knowledge = self._build_knowledge(1, *self._load_knowledge_base())
+        self._knowledge_watcher.start()
         
         # Learning style adaptation parameters
         self.learning_style_keywords = {
@@ -82,9 +161,6 @@ class NLPProcessor:
             "kinesthetic": ["do", "feel", "touch", "hold", "experience", "practice", "try", "experiment"]
         }
         
-        # Speech recognition for voice interactions
-        self.recognizer = sr.Recognizer()
-        
         # Initialize model handlers
         self.model_handlers = {
             AIModelType.GPT: self._handle_gpt_model,
@@ -93,6 +169,62 @@ class NLPProcessor:
             AIModelType.CLAUDE: self._handle_claude_model,
             AIModelType.CUSTOM: self._handle_custom_model
         }
+        
+        # Handlers that yield the response as the provider generates it
+        self.stream_handlers = {
+            AIModelType.GPT: self._stream_gpt_model,
+            AIModelType.CLAUDE: self._stream_claude_model,
+            AIModelType.CUSTOM: self._stream_custom_model
+        }
+    
+    @property
+    def knowledge_base(self):
+        """Current knowledge base, a dict or a CompiledKnowledgeBase"""
+        return self._knowledge.knowledge_base
+    
+    @property
+    def knowledge_index(self):
+        """Topic index over the current knowledge base"""
+        return self._knowledge.index
+    
+    @property
+    def knowledge_retriever(self):
+        """TF-IDF retriever over the current knowledge base, or None if disabled"""
+        return self._knowledge.retriever
+    
+    @property
+    def qa_engine(self):
+        """Chunked question answering over the current knowledge base"""
+        return self._knowledge.qa
+    
+    @property
+    def sentiment_analyzer(self):
+        """Sentiment analysis pipeline, or None if transformers is not available"""
+        return model_registry.get(SENTIMENT_MODEL)
+    
+    @property
+    def ner(self):
+        """Named entity recognition pipeline, or None if transformers is not available"""
+        return model_registry.get(NER_MODEL)
+    
+    @property
+    def qa(self):
+        """Question answering pipeline, or None if transformers is not available"""
+        return model_registry.get(QA_MODEL)
+    
+    @property
+    def recognizer(self):
+        """Speech recognizer, or None if speech_recognition is not available"""
+        return model_registry.get(SPEECH_RECOGNIZER)
+    
+    def _load_nltk_corpora(self):
+        """Use NLTK's stopword list and WordNet lemmatizer, downloading missing data"""
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        
+        ensure_nltk_data()
+        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = set(stopwords.words('english'))
     
     def preprocess_text(self, text):
         """
@@ -100,48 +232,128 @@ class NLPProcessor:
         
         Args:
             text (str): Text to preprocess
-            
+        
         Returns:
             list: List of preprocessed tokens
         """
         # Tokenize
-        tokens = word_tokenize(text.lower())
+        tokens = self.tokenizer.tokenize(text.lower())
         
         # Remove stopwords and lemmatize
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token.isalnum() and token not in self.stop_words]
+        return [lemma for lemma in map(self._normalize_token, tokens) if lemma is not None]
+    
+    def _normalize_token_uncached(self, token):
+        """Lemma of a lowercase token, or None if it is dropped as punctuation or a stopword"""
+        if not token.isalnum() or token in self.stop_words:
+            return None
+        return self.lemmatizer.lemmatize(token)
+    
+    def token_cache_info(self):
+        """
+        Get hit statistics of the token normalization cache
+        
+        Returns:
+            dict: Hits, misses, hit rate and current/maximum size
+        """
+        info = self._normalize_token.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': (info.hits / lookups) if lookups else 0.0,
+            'size': info.currsize,
+            'max_size': info.maxsize
+        }
+    
+    def response_cache_info(self):
+        """
+        Get statistics of the rule-based response cache
+        
+        Returns:
+            dict: Hits, misses, hit rate, evictions and current/maximum size
+        """
+        return self._response_cache.metrics()
+    
+    def semantic_cache_info(self):
+        """
+        Get statistics of the LLM answer cache
+        
+        Returns:
+            dict: Hit rate and generation time saved, overall and per model, or None if disabled
+        """
+        return self._semantic_cache.metrics() if self._semantic_cache is not None else None
+    
+    def analyze_message(self, text):
+        """
+        Analyze a user message in one pass
+        
+        The message is tokenized and lemmatized once; topics, keyword
+        sentiment, engagement and learning style signals all reuse the tokens.
+        
+        Args:
+            text (str): User message
         
-        return tokens
+        Returns:
+            MessageAnalysis: Tokens, topics, sentiment, engagement and learning style
+        """
+        tokens = self.preprocess_text(text)
+        learning_style_scores = self._learning_style_scores(tokens)
+        
+        return MessageAnalysis(
+            tokens=tokens,
+            topics=self._topics_from_tokens(tokens),
+            sentiment=self.analyze_sentiment(text, tokens=tokens),
+            engagement=self.calculate_engagement_score(text, tokens=tokens),
+            learning_style=self._dominant_learning_style(learning_style_scores),
+            learning_style_scores=learning_style_scores
+        )
     
-    def analyze_sentiment(self, text):
+    def analyze_sentiment(self, text, tokens=None):
         """
         Analyze sentiment of text
         
         Args:
             text (str): Text to analyze
-            
+            tokens (list): Preprocessed tokens of text, if already available
+        
         Returns:
             float: Sentiment score (-1.0 to 1.0)
         """
-        if self.sentiment_analyzer:
-            result = self.sentiment_analyzer(text)
-            if result[0]['label'] == 'POSITIVE':
-                return result[0]['score']
-            else:
-                return -result[0]['score']
-        else:
-            # Simple fallback sentiment analysis
-            positive_words = ["good", "great", "excellent", "amazing", "wonderful", "fantastic", "helpful", "clear", "understand", "thanks"]
-            negative_words = ["bad", "poor", "terrible", "confusing", "unclear", "difficult", "hard", "not", "don't", "cannot"]
-            
+        sentiment_analyzer = self.sentiment_analyzer
+        if sentiment_analyzer:
+            try:
+                # Concurrent requests share one pipeline call when batching is enabled
+                batcher = get_sentiment_batcher()
+                if batcher is not None:
+                    result = batcher(text)
+                else:
+                    result = sentiment_analyzer(text)[0]
+                
+                if result['label'] == 'POSITIVE':
+                    return result['score']
+                else:
+                    return -result['score']
+            except Exception as e:
+                # Model server timeouts and pipeline errors use the keyword path
+                logging.warning(f"Sentiment model failed, using keyword sentiment: {str(e)}")
+        
+        return self._keyword_sentiment(text, tokens)
+    
+    def _keyword_sentiment(self, text, tokens=None):
+        """Simple fallback sentiment analysis"""
+        positive_words = ["good", "great", "excellent", "amazing", "wonderful", "fantastic", "helpful", "clear", "understand", "thanks"]
+        negative_words = ["bad", "poor", "terrible", "confusing", "unclear", "difficult", "hard", "not", "don't", "cannot"]
+        
+        if tokens is None:
             tokens = self.preprocess_text(text)
-            positive_count = sum(1 for token in tokens if token in positive_words)
-            negative_count = sum(1 for token in tokens if token in negative_words)
-            
-            total = positive_count + negative_count
-            if total == 0:
-                return 0.0
-            
-            return (positive_count - negative_count) / total
+        positive_count = sum(1 for token in tokens if token in positive_words)
+        negative_count = sum(1 for token in tokens if token in negative_words)
+        
+        total = positive_count + negative_count
+        if total == 0:
+            return 0.0
+        
+        return (positive_count - negative_count) / total
     
     def extract_topics(self, text):
         """
@@ -149,12 +361,14 @@ class NLPProcessor:
         
         Args:
             text (str): Text to extract topics from
-            
+        
         Returns:
             list: List of topics
         """
-        tokens = self.preprocess_text(text)
-        
+        return self._topics_from_tokens(self.preprocess_text(text))
+    
+    def _topics_from_tokens(self, tokens):
+        """Most frequent preprocessed tokens, used as topics"""
         # Count token frequencies
         token_counts = Counter(tokens)
         
@@ -162,6 +376,33 @@ class NLPProcessor:
         topics = [topic for topic, count in token_counts.most_common(5) if len(topic) > 3]
         
         return topics
+    
+    def detect_learning_style(self, text, tokens=None):
+        """
+        Detect the learning style suggested by the wording of a text
+        
+        Args:
+            text (str): Text to analyze
+            tokens (list): Preprocessed tokens of text, if already available
+        
+        Returns:
+            str: visual, auditory, reading_writing or kinesthetic, or None without any signal
+        """
+        if tokens is None:
+            tokens = self.preprocess_text(text)
+        return self._dominant_learning_style(self._learning_style_scores(tokens))
+    
+    def _learning_style_scores(self, tokens):
+        """Count learning style keywords among the tokens"""
+        return {
+            style: sum(1 for token in tokens if token in keywords)
+            for style, keywords in self.learning_style_keywords.items()
+        }
+    
+    def _dominant_learning_style(self, scores):
+        """Learning style with the most keyword hits, ties resolved in keyword table order"""
+        style, count = max(scores.items(), key=lambda item: item[1], default=(None, 0))
+        return style if count else None
 
     def speech_to_text(self, audio_data):
         """
@@ -169,11 +410,14 @@ class NLPProcessor:
         
         Args:
             audio_data (bytes): Audio data
-            
+        
         Returns:
             str: Transcribed text
         """
         try:
+            import speech_recognition as sr
+            recognizer = self.recognizer
+            
             # Save audio data to temporary file
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio:
                 temp_audio.write(audio_data)
@@ -181,8 +425,8 @@ class NLPProcessor:
             
             # Process with speech recognition
             with sr.AudioFile(temp_audio_path) as source:
-                audio = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio)
+                audio = recognizer.record(source)
+                text = recognizer.recognize_google(audio)
             
             # Clean up temporary file
             os.unlink(temp_audio_path)
@@ -199,11 +443,13 @@ class NLPProcessor:
         Args:
             text (str): Text to convert
             lang (str): Language code
-            
+        
         Returns:
             bytes: Audio data
         """
         try:
+            from gtts import gTTS
+            
             # Generate speech
             tts = gTTS(text=text, lang=lang, slow=False)
             
@@ -224,25 +470,36 @@ class NLPProcessor:
             logging.error(f"Text to speech error: {str(e)}")
             return None
     
-    def generate_personalized_response(self, user_message, user_profile, conversation_history=None, ai_model=None, ai_model_preference=None):
+    def generate_personalized_response(self, user_message, user_profile, conversation_history=None, ai_model=None, ai_model_preference=None, topics=None, tokens=None, fallback_models=None):
         """
         Generate a personalized response based on user message and profile
         
+        With fallback models (from the AI model's routing policy, see
+        app.models.provider_router) they answer when the model fails and, with
+        hedging, race it when it is slower than its p95 latency. A model whose
+        circuit breaker is open or whose concurrency limit is reached is not
+        called (see app.models.circuit_breaker).
+        
         Args:
             user_message (str): User's message
             user_profile (dict): User's profile data
             conversation_history (list): Previous conversations
             ai_model (AIModel): AI model to use for generation
             ai_model_preference (UserAIModelPreference): User's AI model preferences
-            
+            topics (list): Topics from analyze_message(), extracted here if not given
+            tokens (list): Tokens from analyze_message(), preprocessed here if needed and not given
+            fallback_models (tuple): (AIModel, UserAIModelPreference) pairs in fallback order
+        
         Returns:
             str: Personalized response
         """
         # Extract topics from user message
-        topics = self.extract_topics(user_message)
+        if topics is None:
+            topics = self.extract_topics(user_message)
         
         # Find relevant information from knowledge base
-        relevant_info = self._find_relevant_information(user_message, topics)
+        knowledge = self._knowledge
+        relevant_info = self._find_relevant_information(user_message, topics, tokens, knowledge)
         
         # If an AI model is specified, use it for response generation
         if ai_model:
@@ -250,25 +507,206 @@ class NLPProcessor:
                 # Get handler for the model type
                 handler = self.model_handlers.get(ai_model.model_type)
                 if handler:
+                    # A similar question in the same scope was already answered
+                    cache_scope = None
+                    if self._semantic_cache is not None and ai_model.model_type in SEMANTIC_CACHE_MODEL_TYPES:
+                        cache_scope = self._semantic_scope(ai_model, relevant_info, user_profile)
+                        question = question_vector(tokens if tokens is not None else self.preprocess_text(user_message))
+                        hit = self._semantic_cache.get(cache_scope, question)
+                        if hit:
+                            return hit.response
+                    
                     # Call the appropriate handler with model details
-                    response = handler(
-                        user_message=user_message,
-                        user_profile=user_profile,
-                        conversation_history=conversation_history,
-                        ai_model=ai_model,
-                        ai_model_preference=ai_model_preference,
-                        relevant_info=relevant_info
-                    )
+                    start = time.perf_counter()
+                    if fallback_models:
+                        response = self._route_response(
+                            [(ai_model, ai_model_preference)] + list(fallback_models),
+                            routing_policy(ai_model),
+                            user_message=user_message,
+                            user_profile=user_profile,
+                            conversation_history=conversation_history,
+                            relevant_info=relevant_info
+                        )
+                    else:
+                        response = None
+                        guard = get_guard(model_key(ai_model))
+                        if guard.admit():
+                            response = guard.run(
+                                handler,
+                                user_message=user_message,
+                                user_profile=user_profile,
+                                conversation_history=conversation_history,
+                                ai_model=ai_model,
+                                ai_model_preference=ai_model_preference,
+                                relevant_info=relevant_info
+                            )
                     if response:
+                        if cache_scope is not None:
+                            self._semantic_cache.put(cache_scope, question, response, time.perf_counter() - start)
                         return response
             except Exception as e:
                 logging.error(f"Error using AI model {ai_model.name}: {str(e)}")
                 # Fall back to default processing
         
         # Default processing if no model specified or model processing failed
-        # Adapt response based on learning style
+        return self._rule_based_response(relevant_info, user_profile, knowledge.generation)
+    
+    def _route_response(self, models, policy, **kwargs):
+        """
+        Answer with the first model of a chain that gives an answer
+        
+        Args:
+            models (list): (AIModel, UserAIModelPreference) pairs in fallback order
+            policy (RoutingPolicy): Routing policy of the selected model, or None for plain fallback
+            **kwargs: Handler arguments other than the model and preference
+        
+        Returns:
+            str: Answer, or None if every model failed
+        """
+        routes = [
+            Route(model_key(model), model, preference, self.model_handlers[model.model_type], self.stream_handlers.get(model.model_type))
+            for model, preference in models
+            if model.model_type in self.model_handlers
+        ]
+        hedge = bool(policy and policy.hedge)
+        result = get_router().route(routes, kwargs, hedge=hedge, hedge_after_ms=policy.hedge_after_ms if policy else None)
+        return result.response if result else None
+    
+    def stream_personalized_response(self, user_message, user_profile, conversation_history=None, ai_model=None, ai_model_preference=None, topics=None, tokens=None, fallback_models=None):
+        """
+        Generate a personalized response, yielding it while it is generated
+        
+        Models with a stream handler (GPT, Claude and custom APIs) forward the
+        provider's tokens as they arrive. Semantic cache hits, the other models
+        and the fallback responses yield the whole response at once. A stream
+        that fails before its first token, or is rejected by the model's
+        circuit breaker or concurrency limit, falls back to the fallback
+        models, then to the rule-based response; one that fails later ends
+        early and is not cached.
+        
+        Args:
+            user_message (str): User's message
+            user_profile (dict): User's profile data
+            conversation_history (list): Previous conversations
+            ai_model (AIModel): AI model to use for generation
+            ai_model_preference (UserAIModelPreference): User's AI model preferences
+            topics (list): Topics from analyze_message(), extracted here if not given
+            tokens (list): Tokens from analyze_message(), preprocessed here if needed and not given
+            fallback_models (tuple): (AIModel, UserAIModelPreference) pairs in fallback order
+        
+        Yields:
+            str: Next part of the response
+        """
+        handler = self.stream_handlers.get(ai_model.model_type) if ai_model else None
+        if not handler:
+            yield self.generate_personalized_response(
+                user_message, user_profile, conversation_history, ai_model, ai_model_preference,
+                topics=topics, tokens=tokens, fallback_models=fallback_models
+            )
+            return
+        
+        if topics is None:
+            topics = self.extract_topics(user_message)
+        knowledge = self._knowledge
+        relevant_info = self._find_relevant_information(user_message, topics, tokens, knowledge)
+        
+        parts = []
+        try:
+            # A similar question in the same scope was already answered
+            cache_scope = None
+            if self._semantic_cache is not None and ai_model.model_type in SEMANTIC_CACHE_MODEL_TYPES:
+                cache_scope = self._semantic_scope(ai_model, relevant_info, user_profile)
+                question = question_vector(tokens if tokens is not None else self.preprocess_text(user_message))
+                hit = self._semantic_cache.get(cache_scope, question)
+                if hit:
+                    yield hit.response
+                    return
+            
+            guard = get_guard(model_key(ai_model))
+            if guard.admit():
+                start = time.perf_counter()
+                stream = guard.run_stream(
+                    handler,
+                    user_message=user_message,
+                    user_profile=user_profile,
+                    conversation_history=conversation_history,
+                    ai_model=ai_model,
+                    ai_model_preference=ai_model_preference,
+                    relevant_info=relevant_info
+                )
+                try:
+                    for token in stream:
+                        parts.append(token)
+                        yield token
+                finally:
+                    stream.close()
+            
+            if parts and cache_scope is not None:
+                self._semantic_cache.put(cache_scope, question, "".join(parts), time.perf_counter() - start)
+        except Exception as e:
+            logging.error(f"Error streaming AI model {ai_model.name}: {str(e)}")
+        
+        if parts:
+            return
+        
+        # The rest of the chain answers if the model produced nothing
+        if fallback_models:
+            response = self._route_response(
+                list(fallback_models),
+                routing_policy(ai_model),
+                user_message=user_message,
+                user_profile=user_profile,
+                conversation_history=conversation_history,
+                relevant_info=relevant_info
+            )
+            if response:
+                yield response
+                return
+        
+        # Default processing if no model produced anything
+        yield self._rule_based_response(relevant_info, user_profile, knowledge.generation)
+    
+    def _semantic_scope(self, ai_model, relevant_info, user_profile):
+        """Scope within which answers of a model can be shared between questions"""
+        return CacheScope(
+            namespace=f"{ai_model.model_type.value}:{ai_model.name}",
+            subjects=tuple(sorted(relevant_info)),
+            learning_style=user_profile.get('learning_style', 'reading_writing'),
+            skill=skill_bucket(user_profile.get('skill_level', 5))
+        )
+    
+    def _rule_based_response(self, relevant_info, user_profile, generation):
+        """
+        Build the response from the relevant information and the profile alone
+        
+        The text depends only on the matched entries in order, the learning
+        style and the skill and length ranges, so it is cached under those for
+        the knowledge base generation the entries came from.
+        
+        Args:
+            relevant_info (dict): Relevant information
+            user_profile (dict): User's profile data
+            generation (int): Knowledge base generation relevant_info was read from
+        
+        Returns:
+            str: Personalized response
+        """
         learning_style = user_profile.get('learning_style', 'reading_writing')
+        skill_level = user_profile.get('skill_level', 5)
+        response_time_preference = user_profile.get('response_time_preference', 5)
+        
+        key = (
+            generation,
+            tuple((subject, topic) for subject, topics in relevant_info.items() for topic in topics),
+            learning_style,
+            skill_bucket(skill_level),
+            length_bucket(response_time_preference)
+        )
+        response = self._response_cache.get(key)
+        if response is not None:
+            return response
         
+        # Adapt response based on learning style
         if learning_style == 'visual':
             response = self._adapt_for_visual_learner(relevant_info)
         elif learning_style == 'auditory':
@@ -281,70 +719,74 @@ class NLPProcessor:
             response = self._generate_default_response(relevant_info)
         
         # Adjust response based on skill level
-        skill_level = user_profile.get('skill_level', 5)
         response = self._adjust_for_skill_level(response, skill_level)
         
         # Adjust response length based on preference
-        response_time_preference = user_profile.get('response_time_preference', 5)
         response = self._adjust_response_length(response, response_time_preference)
         
+        self._response_cache.put(key, response)
         return response
     
+    def _gpt_request(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """Build the GPT API request as (url, headers, params), or None without an API key"""
+        # Get API key from user preference or config
+        api_key = None
+        if ai_model_preference and ai_model_preference.api_key:
+            api_key = ai_model_preference.api_key
+        else:
+            from app.config import Config
+            api_key = Config.OPENAI_API_KEY
+        
+        if not api_key:
+            return None
+        
+        # Get custom parameters if available
+        custom_params = {}
+        if ai_model_preference and ai_model_preference.custom_parameters:
+            custom_params = json.loads(ai_model_preference.custom_parameters)
+        
+        # Prepare context from conversation history
+        context = ""
+        if conversation_history:
+            for conv in conversation_history[-5:]:  # Last 5 conversations
+                context += f"User: {conv['user_message']}\nAI: {conv['ai_response']}\n"
+        
+        # Prepare messages
+        messages = [
+            {"role": "system", "content": f"You are an educational AI assistant helping a user with {user_profile.get('preferred_subjects', 'various subjects')}. "
+                                         f"The user's learning style is {user_profile.get('learning_style', 'unknown')}. "
+                                         f"Their skill level is {user_profile.get('skill_level', 5)}/10."},
+            {"role": "user", "content": f"{context}\n\nUser question: {user_message}"}
+        ]
+        
+        # Add relevant information
+        if relevant_info:
+            messages.append({"role": "system", "content": f"Relevant information: {relevant_info}"})
+        
+        # Set up API parameters
+        params = {
+            "model": "gpt-3.5-turbo",  # Default model
+            "messages": messages,
+            "max_tokens": 500,
+            "temperature": 0.7,
+        }
+        
+        # Override with custom parameters
+        params.update(custom_params)
+        
+        headers = {"Authorization": f"Bearer {api_key}"}
+        return ai_model.api_endpoint or "https://api.openai.com/v1/chat/completions", headers, params
+    
     def _handle_gpt_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
         """Handle GPT model API calls"""
         try:
-            # Get API key from user preference or config
-            api_key = None
-            if ai_model_preference and ai_model_preference.api_key:
-                api_key = ai_model_preference.api_key
-            else:
-                from app.config import Config
-                api_key = Config.OPENAI_API_KEY
-            
-            if not api_key:
+            request = self._gpt_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+            if not request:
                 return None
             
-            # Get custom parameters if available
-            custom_params = {}
-            if ai_model_preference and ai_model_preference.custom_parameters:
-                custom_params = json.loads(ai_model_preference.custom_parameters)
-            
-            # Prepare context from conversation history
-            context = ""
-            if conversation_history:
-                for conv in conversation_history[-5:]:  # Last 5 conversations
-                    context += f"User: {conv['user_message']}\nAI: {conv['ai_response']}\n"
-            
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": f"You are an educational AI assistant helping a user with {user_profile.get('preferred_subjects', 'various subjects')}. "
-                                             f"The user's learning style is {user_profile.get('learning_style', 'unknown')}. "
-                                             f"Their skill level is {user_profile.get('skill_level', 5)}/10."},
-                {"role": "user", "content": f"{context}\n\nUser question: {user_message}"}
-            ]
-            
-            # Add relevant information
-            if relevant_info:
-                messages.append({"role": "system", "content": f"Relevant information: {relevant_info}"})
-            
-            # Set up API parameters
-            params = {
-                "model": "gpt-3.5-turbo",  # Default model
-                "messages": messages,
-                "max_tokens": 500,
-                "temperature": 0.7,
-            }
-            
-            # Override with custom parameters
-            params.update(custom_params)
-            
             # Make API request
-            headers = {"Authorization": f"Bearer {api_key}"}
-            response = requests.post(
-                ai_model.api_endpoint or "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=params
-            )
+            url, headers, params = request
+            response = get_transport('openai').post(url, headers=headers, json=params)
             
             response_data = response.json()
             if response.status_code == 200 and "choices" in response_data:
@@ -352,29 +794,50 @@ class NLPProcessor:
             
             logging.error(f"GPT API error: {response_data}")
             return None
-            
+        
         except Exception as e:
             logging.error(f"Error in GPT model processing: {str(e)}")
             return None
+    
+    def _stream_gpt_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """Stream GPT model tokens as they arrive (chat completion chunks over SSE)"""
+        request = self._gpt_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+        if not request:
+            return
+        
+        url, headers, params = request
+        with get_transport('openai').post(url, headers=headers, json={**params, "stream": True}, stream=True) as response:
+            if response.status_code != 200:
+                logging.error(f"GPT API error: {response.text}")
+                return
             
+            for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices")
+                if choices:
+                    token = (choices[0].get("delta") or {}).get("content")
+                    if token:
+                        yield token
+    
     def _handle_bert_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
         """Handle BERT model for response generation"""
         try:
-            # Implement BERT-specific logic here
-            # For now, use a simple implementation with the Hugging Face pipeline
-            if not self.qa:
+            qa = self.qa
+            if not qa:
                 return None
-                
-            # Use question answering if relevant info is available
+            
+            # Extract the answer from the best chunks of the relevant passages
             if relevant_info:
-                answer = self.qa(question=user_message, context=relevant_info)
-                return answer['answer']
-                
+                answer = self.qa_engine.answer(qa, user_message, relevant_info)
+                if answer:
+                    return answer.answer
+            
             return None
         except Exception as e:
             logging.error(f"Error in BERT model processing: {str(e)}")
             return None
-            
+    
     def _handle_llama_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
         """Handle Llama model API calls"""
         # Similar to GPT but with Llama-specific API parameters
@@ -386,139 +849,204 @@ class NLPProcessor:
             else:
                 from app.config import Config
                 api_key = Config.LLAMA_API_KEY
-                
+            
             if not api_key:
                 return None
-                
+            
             # Call Llama API with appropriate parameters
             # Implementation depends on the specific Llama API being used
             return None  # Placeholder
         except Exception as e:
             logging.error(f"Error in Llama model processing: {str(e)}")
             return None
-            
+    
+    def _claude_request(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """Build the Claude API request as (url, headers, request_data), or None without an API key"""
+        # Get API key from user preference or config
+        api_key = None
+        if ai_model_preference and ai_model_preference.api_key:
+            api_key = ai_model_preference.api_key
+        else:
+            from app.config import Config
+            api_key = Config.ANTHROPIC_API_KEY
+        
+        if not api_key:
+            return None
+        
+        # Prepare context
+        context = ""
+        if conversation_history:
+            for conv in conversation_history[-5:]:
+                context += f"Human: {conv['user_message']}\nAssistant: {conv['ai_response']}\n"
+        
+        # Make API request to Claude
+        headers = {
+            "x-api-key": api_key,
+            "Content-Type": "application/json"
+        }
+        
+        # Get custom parameters
+        custom_params = {}
+        if ai_model_preference and ai_model_preference.custom_parameters:
+            custom_params = json.loads(ai_model_preference.custom_parameters)
+        
+        # Build request
+        request_data = {
+            "model": "claude-2.0",  # Default model
+            "prompt": f"{context}\n\nHuman: {user_message}\n\nAssistant:",
+            "max_tokens_to_sample": 500,
+            "temperature": 0.7
+        }
+        
+        # Override with custom parameters
+        request_data.update(custom_params)
+        
+        return ai_model.api_endpoint or "https://api.anthropic.com/v1/complete", headers, request_data
+    
     def _handle_claude_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
         """Handle Claude model API calls"""
         try:
-            # Get API key from user preference or config
-            api_key = None
-            if ai_model_preference and ai_model_preference.api_key:
-                api_key = ai_model_preference.api_key
-            else:
-                from app.config import Config
-                api_key = Config.ANTHROPIC_API_KEY
-                
-            if not api_key:
+            request = self._claude_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+            if not request:
                 return None
-                
-            # Prepare context
-            context = ""
-            if conversation_history:
-                for conv in conversation_history[-5:]:
-                    context += f"Human: {conv['user_message']}\nAssistant: {conv['ai_response']}\n"
-                    
-            # Make API request to Claude
-            headers = {
-                "x-api-key": api_key,
-                "Content-Type": "application/json"
-            }
-            
-            # Get custom parameters
-            custom_params = {}
-            if ai_model_preference and ai_model_preference.custom_parameters:
-                custom_params = json.loads(ai_model_preference.custom_parameters)
-                
-            # Build request
-            request_data = {
-                "model": "claude-2.0",  # Default model
-                "prompt": f"{context}\n\nHuman: {user_message}\n\nAssistant:",
-                "max_tokens_to_sample": 500,
-                "temperature": 0.7
-            }
-            
-            # Override with custom parameters
-            request_data.update(custom_params)
             
             # Make request
-            response = requests.post(
-                ai_model.api_endpoint or "https://api.anthropic.com/v1/complete",
-                headers=headers,
-                json=request_data
-            )
+            url, headers, request_data = request
+            response = get_transport('anthropic').post(url, headers=headers, json=request_data)
             
             if response.status_code == 200:
                 response_data = response.json()
                 return response_data.get("completion", "")
-                
+            
             logging.error(f"Claude API error: {response.text}")
             return None
-            
+        
         except Exception as e:
             logging.error(f"Error in Claude model processing: {str(e)}")
             return None
+    
+    def _stream_claude_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """Stream Claude model tokens as they arrive (completion events over SSE)"""
+        request = self._claude_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+        if not request:
+            return
+        
+        # From this API version on, each streamed completion holds only the new text
+        url, headers, request_data = request
+        headers = {**headers, "anthropic-version": "2023-06-01"}
+        with get_transport('anthropic').post(url, headers=headers, json={**request_data, "stream": True}, stream=True) as response:
+            if response.status_code != 200:
+                logging.error(f"Claude API error: {response.text}")
+                return
             
+            for data in iter_sse_data(response):
+                event = json.loads(data)
+                if event.get("type") == "error":
+                    logging.error(f"Claude API error: {event.get('error')}")
+                    return
+                if event.get("completion"):
+                    yield event["completion"]
+                if event.get("stop_reason"):
+                    break
+    
+    def _custom_request(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """Build the custom model API request as (url, headers, request_data), or None without an endpoint"""
+        # Get API endpoint and parameters from the model
+        api_endpoint = ai_model.api_endpoint
+        if not api_endpoint:
+            return None
+        
+        # Get API key if needed
+        api_key = None
+        if ai_model.api_key_required and ai_model_preference and ai_model_preference.api_key:
+            api_key = ai_model_preference.api_key
+        
+        # Get model parameters
+        model_params = {}
+        if ai_model.parameters:
+            model_params = json.loads(ai_model.parameters)
+        
+        # Override with user's custom parameters if available
+        if ai_model_preference and ai_model_preference.custom_parameters:
+            user_params = json.loads(ai_model_preference.custom_parameters)
+            model_params.update(user_params)
+        
+        # The routing policy is read by the router, not sent to the model
+        model_params.pop("routing", None)
+        
+        # Prepare request data
+        request_data = {
+            "message": user_message,
+            "user_profile": user_profile,
+            "conversation_history": conversation_history,
+            **model_params
+        }
+        
+        # Set up headers
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        
+        return api_endpoint, headers, request_data
+    
     def _handle_custom_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
         """Handle custom model API calls"""
         try:
-            # Get API endpoint and parameters from the model
-            api_endpoint = ai_model.api_endpoint
-            if not api_endpoint:
+            request = self._custom_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+            if not request:
                 return None
-                
-            # Get API key if needed
-            api_key = None
-            if ai_model.api_key_required and ai_model_preference and ai_model_preference.api_key:
-                api_key = ai_model_preference.api_key
-                
-            # Get model parameters
-            model_params = {}
-            if ai_model.parameters:
-                model_params = json.loads(ai_model.parameters)
-                
-            # Override with user's custom parameters if available
-            if ai_model_preference and ai_model_preference.custom_parameters:
-                user_params = json.loads(ai_model_preference.custom_parameters)
-                model_params.update(user_params)
-                
-            # Prepare request data
-            request_data = {
-                "message": user_message,
-                "user_profile": user_profile,
-                "conversation_history": conversation_history,
-                **model_params
-            }
             
-            # Set up headers
-            headers = {"Content-Type": "application/json"}
-            if api_key:
-                headers["Authorization"] = f"Bearer {api_key}"
-                
             # Make API request
-            response = requests.post(
-                api_endpoint,
-                headers=headers,
-                json=request_data
-            )
+            url, headers, request_data = request
+            response = get_transport('custom').post(url, headers=headers, json=request_data)
             
             if response.status_code == 200:
                 response_data = response.json()
                 if "response" in response_data:
                     return response_data["response"]
-                    
+            
             logging.error(f"Custom model API error: {response.text}")
             return None
-            
+        
         except Exception as e:
             logging.error(f"Error in custom model processing: {str(e)}")
             return None
     
-    def calculate_engagement_score(self, user_message):
+    def _stream_custom_model(self, user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info):
+        """
+        Stream custom model output as it arrives
+        
+        The request carries "stream": true. An API answering with NDJSON sends
+        one {"response": <next text>} object per line; any other answer is
+        read as the usual single JSON object.
+        """
+        request = self._custom_request(user_message, user_profile, conversation_history, ai_model, ai_model_preference, relevant_info)
+        if not request:
+            return
+        
+        url, headers, request_data = request
+        with get_transport('custom').post(url, headers=headers, json={**request_data, "stream": True}, stream=True) as response:
+            if response.status_code != 200:
+                logging.error(f"Custom model API error: {response.text}")
+                return
+            
+            if response.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                for chunk in iter_ndjson(response):
+                    if chunk.get("response"):
+                        yield chunk["response"]
+            else:
+                response_data = response.json()
+                if response_data.get("response"):
+                    yield response_data["response"]
+    
+    def calculate_engagement_score(self, user_message, tokens=None):
         """
         Calculate user engagement score based on message
         
         Args:
             user_message (str): User's message
-            
+            tokens (list): Preprocessed tokens of the message, if already available
+        
         Returns:
             float: Engagement score (0.0 to 1.0)
         """
@@ -532,7 +1060,8 @@ class NLPProcessor:
         
         # Check for follow-up indicators
         follow_up_words = ["more", "another", "example", "explain", "understand", "clarify", "continue"]
-        tokens = self.preprocess_text(user_message)
+        if tokens is None:
+            tokens = self.preprocess_text(user_message)
         factors['follow_up_indicators'] = min(sum(1 for token in tokens if token in follow_up_words) * 0.2, 1.0)
         
         # Calculate overall engagement score
@@ -552,60 +1081,115 @@ class NLPProcessor:
         Load knowledge base from file
         
         Returns:
-            dict: Knowledge base
+            tuple: (path loaded or None, dict or CompiledKnowledgeBase knowledge base)
         """
-        try:
-            with open('app/models/knowledge_base.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Return a simple default knowledge base
-            return {
-                "subjects": {
-                    "math": {
-                        "algebra": "Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols.",
-                        "calculus": "Calculus is the mathematical study of continuous change.",
-                        "geometry": "Geometry is a branch of mathematics that studies the sizes, shapes, positions, and dimensions of things."
-                    },
-                    "science": {
-                        "physics": "Physics is the natural science that studies matter, its motion and behavior through space and time.",
-                        "chemistry": "Chemistry is the scientific discipline involved with elements and compounds.",
-                        "biology": "Biology is the natural science that studies life and living organisms."
-                    },
-                    "programming": {
-                        "python": "Python is an interpreted, high-level, general-purpose programming language.",
-                        "java": "Java is a class-based, object-oriented programming language.",
-                        "javascript": "JavaScript is a programming language that conforms to the ECMAScript specification."
-                    }
+        for path in (KNOWLEDGE_BASE_PATH, KNOWLEDGE_BASE_SOURCE):
+            try:
+                return path, open_knowledge_base(path)
+            except FileNotFoundError:
+                continue
+        
+        # Return a simple default knowledge base
+        return None, {
+            "subjects": {
+                "math": {
+                    "algebra": "Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols.",
+                    "calculus": "Calculus is the mathematical study of continuous change.",
+                    "geometry": "Geometry is a branch of mathematics that studies the sizes, shapes, positions, and dimensions of things."
+                },
+                "science": {
+                    "physics": "Physics is the natural science that studies matter, its motion and behavior through space and time.",
+                    "chemistry": "Chemistry is the scientific discipline involved with elements and compounds.",
+                    "biology": "Biology is the natural science that studies life and living organisms."
+                },
+                "programming": {
+                    "python": "Python is an interpreted, high-level, general-purpose programming language.",
+                    "java": "Java is a class-based, object-oriented programming language.",
+                    "javascript": "JavaScript is a programming language that conforms to the ECMAScript specification."
                 }
             }
+        }
+    
+    def _build_knowledge(self, generation, path, knowledge_base):
+        """Build the index and retriever over a knowledge base"""
+        retriever = None
+        if RETRIEVAL_TOP_K > 0:
+            retriever = load_knowledge_retriever(knowledge_base, self.preprocess_text, RETRIEVER_PATH)
+        return KnowledgeSnapshot(
+            generation=generation,
+            path=path,
+            knowledge_base=knowledge_base,
+            index=KnowledgeIndex(knowledge_base, self.preprocess_text),
+            retriever=retriever,
+            qa=QAEngine(self.preprocess_text, retriever, QA_TOP_K, QA_CHUNK_WORDS, QA_CACHE_SIZE)
+        )
+    
+    def reload_knowledge_base(self):
+        """
+        Load the knowledge base files again and swap in the new content
+        
+        The index and retriever are built before the swap, so requests never
+        wait for them; requests already running finish with the knowledge
+        base they started with. Called by the file watcher.
+        
+        Returns:
+            bool: True if a changed knowledge base was swapped in
+        """
+        with self._knowledge_lock:
+            current = self._knowledge
+            path, knowledge_base = self._load_knowledge_base()
+            if path == current.path and knowledge_base_digest(knowledge_base) == knowledge_base_digest(current.knowledge_base):
+                return False
+            self._knowledge = self._build_knowledge(current.generation + 1, path, knowledge_base)
+        
+        logging.info(f"Reloaded knowledge base from {path} (generation {current.generation + 1})")
+        return True
     
-    def _find_relevant_information(self, user_message, topics):
+    def knowledge_base_info(self):
+        """
+        Describe the knowledge base in use
+        
+        Returns:
+            dict: Reload generation, file, format, topic count, question
+                answering cache usage and, for compiled files, the build generation
+        """
+        knowledge = self._knowledge
+        info = {
+            'generation': knowledge.generation,
+            'path': knowledge.path,
+            'format': 'json' if knowledge.path else 'builtin',
+            'topics': len(knowledge.index),
+            'qa_cache': knowledge.qa.stats()
+        }
+        if isinstance(knowledge.knowledge_base, CompiledKnowledgeBase):
+            info['format'] = 'compiled'
+            info['build_generation'] = knowledge.knowledge_base.generation
+        return info
+    
+    def _find_relevant_information(self, user_message, topics, tokens=None, knowledge=None):
         """
         Find relevant information from knowledge base
         
         Args:
             user_message (str): User's message
             topics (list): Extracted topics
-            
+            tokens (list): Preprocessed tokens of the message, if already available
+            knowledge (KnowledgeSnapshot): Knowledge base to search, the current one if None
+        
         Returns:
             dict: Relevant information
         """
-        relevant_info = {}
+        # One snapshot for the whole lookup, even if a reload swaps it meanwhile
+        if knowledge is None:
+            knowledge = self._knowledge
+        relevant_info = knowledge.index.lookup(user_message, topics)
         
-        # Search through knowledge base for relevant information
-        for subject, subject_data in self.knowledge_base.get("subjects", {}).items():
-            for topic, info in subject_data.items():
-                # Check if any extracted topic matches
-                if any(extracted_topic in topic.lower() for extracted_topic in topics):
-                    if subject not in relevant_info:
-                        relevant_info[subject] = {}
-                    relevant_info[subject][topic] = info
-                
-                # Also check if topic is directly mentioned in user message
-                if topic.lower() in user_message.lower():
-                    if subject not in relevant_info:
-                        relevant_info[subject] = {}
-                    relevant_info[subject][topic] = info
+        # Entries similar to the message as a whole, after the topic matches
+        if knowledge.retriever is not None:
+            if tokens is None:
+                tokens = self.preprocess_text(user_message)
+            for _, subject, topic, info in knowledge.retriever.search(tokens, RETRIEVAL_TOP_K, RETRIEVAL_MIN_SCORE):
+                relevant_info.setdefault(subject, {}).setdefault(topic, info)
         
         return relevant_info
     
@@ -615,24 +1199,11 @@ class NLPProcessor:
         
         Args:
             relevant_info (dict): Relevant information
-            
+        
         Returns:
             str: Adapted response
         """
-        response = "Let me show you visually:\n\n"
-        
-        for subject, topics in relevant_info.items():
-            response += f"## {subject.capitalize()}\n\n"
-            
-            for topic, info in topics.items():
-                response += f"### {topic.capitalize()}\n"
-                response += f"{info}\n\n"
-                response += "I would recommend looking at diagrams or videos about this topic. Visualizing the concepts will help you understand them better.\n\n"
-        
-        if not relevant_info:
-            response += "I don't have specific visual information on this topic yet. Would you like me to find some diagrams or visual explanations for you?"
-        
-        return response
+        return response_templates.VISUAL.render(relevant_info)
     
     def _adapt_for_auditory_learner(self, relevant_info):
         """
@@ -640,24 +1211,11 @@ class NLPProcessor:
         
         Args:
             relevant_info (dict): Relevant information
-            
+        
         Returns:
             str: Adapted response
         """
-        response = "Let me explain this to you:\n\n"
-        
-        for subject, topics in relevant_info.items():
-            response += f"About {subject}:\n\n"
-            
-            for topic, info in topics.items():
-                response += f"When we talk about {topic}, here's what it means:\n"
-                response += f"{info}\n\n"
-                response += "Try saying this out loud to yourself to remember it better. Discussing this with others would also help reinforce your understanding.\n\n"
-        
-        if not relevant_info:
-            response += "I don't have specific information on this topic yet. Would you like me to explain the basic concepts verbally?"
-        
-        return response
+        return response_templates.AUDITORY.render(relevant_info)
     
     def _adapt_for_reading_writing_learner(self, relevant_info):
         """
@@ -665,30 +1223,11 @@ class NLPProcessor:
         
         Args:
             relevant_info (dict): Relevant information
-            
+        
         Returns:
             str: Adapted response
         """
-        response = "Here's a detailed explanation:\n\n"
-        
-        for subject, topics in relevant_info.items():
-            response += f"# {subject.capitalize()}\n\n"
-            
-            for topic, info in topics.items():
-                response += f"## {topic.capitalize()}\n"
-                response += f"{info}\n\n"
-                response += "Key points to note:\n"
-                # Extract key points from info
-                sentences = info.split('.')
-                for i, sentence in enumerate(sentences[:3]):
-                    if sentence.strip():
-                        response += f"- {sentence.strip()}.\n"
-                response += "\nTry writing these points down in your own words to better understand and remember them.\n\n"
-        
-        if not relevant_info:
-            response += "I don't have specific textual information on this topic yet. Would you like me to provide some reading materials or written explanations?"
-        
-        return response
+        return response_templates.READING_WRITING.render(relevant_info)
     
     def _adapt_for_kinesthetic_learner(self, relevant_info):
         """
@@ -696,39 +1235,11 @@ class NLPProcessor:
         
         Args:
             relevant_info (dict): Relevant information
-            
+        
         Returns:
             str: Adapted response
         """
-        response = "Let's learn by doing:\n\n"
-        
-        for subject, topics in relevant_info.items():
-            response += f"For {subject}, here are some hands-on activities:\n\n"
-            
-            for topic, info in topics.items():
-                response += f"To understand {topic}:\n"
-                response += f"{info}\n\n"
-                response += "Try this practical exercise:\n"
-                
-                if "math" in subject.lower():
-                    response += "- Work through some example problems step by step\n"
-                    response += "- Create your own problems and solve them\n"
-                elif "science" in subject.lower():
-                    response += "- Design a simple experiment to demonstrate this concept\n"
-                    response += "- Build a model that represents this idea\n"
-                elif "programming" in subject.lower():
-                    response += "- Write a small program that implements this concept\n"
-                    response += "- Debug and modify existing code to see how it works\n"
-                else:
-                    response += "- Create a project that applies this knowledge\n"
-                    response += "- Teach this concept to someone else using examples\n"
-                
-                response += "\nLearning by doing will help you internalize these concepts better.\n\n"
-        
-        if not relevant_info:
-            response += "I don't have specific hands-on activities for this topic yet. Would you like me to suggest some practical exercises or projects?"
-        
-        return response
+        return response_templates.KINESTHETIC.render(relevant_info)
     
     def _generate_default_response(self, relevant_info):
         """
@@ -736,23 +1247,11 @@ class NLPProcessor:
         
         Args:
             relevant_info (dict): Relevant information
-            
+        
         Returns:
             str: Default response
         """
-        response = "Here's what I know about this topic:\n\n"
-        
-        for subject, topics in relevant_info.items():
-            response += f"## {subject.capitalize()}\n\n"
-            
-            for topic, info in topics.items():
-                response += f"### {topic.capitalize()}\n"
-                response += f"{info}\n\n"
-        
-        if not relevant_info:
-            response += "I don't have specific information on this topic yet. Could you provide more details about what you'd like to learn?"
-        
-        return response
+        return response_templates.DEFAULT.render(relevant_info)
     
     def _adjust_for_skill_level(self, response, skill_level):
         """
@@ -761,23 +1260,18 @@ class NLPProcessor:
         Args:
             response (str): Original response
             skill_level (int): User's skill level (1-10)
-            
+        
         Returns:
             str: Adjusted response
         """
-        if skill_level <= 3:
+        bucket = skill_bucket(skill_level)
+        if bucket == 'beginner':
             # Beginner: Simplify language, add more explanations
-            response = response.replace("complex", "step-by-step")
-            response = "Let's start with the basics:\n\n" + response
-            response += "\n\nDon't worry if this seems challenging at first. We'll take it one step at a time."
-        elif skill_level <= 7:
-            # Intermediate: Standard response
-            pass
-        else:
+            return "".join((response_templates.BEGINNER_INTRO, response.replace("complex", "step-by-step"), response_templates.BEGINNER_OUTRO))
+        if bucket == 'advanced':
             # Advanced: Add more technical details
-            response = "Given your advanced understanding, here's a detailed explanation:\n\n" + response
-            response += "\n\nFor a deeper dive into this topic, you might want to explore the underlying principles and advanced applications."
-        
+            return "".join((response_templates.ADVANCED_INTRO, response, response_templates.ADVANCED_OUTRO))
+        # Intermediate: Standard response
         return response
     
     def _adjust_response_length(self, response, preference):
@@ -787,23 +1281,19 @@ class NLPProcessor:
         Args:
             response (str): Original response
             preference (int): User's preference (1-10, 1=quick, 10=detailed)
-            
+        
         Returns:
             str: Adjusted response
         """
-        if preference <= 3:
+        bucket = length_bucket(preference)
+        if bucket == 'quick':
             # User prefers quick responses
             paragraphs = response.split('\n\n')
             if len(paragraphs) > 3:
                 # Keep only the first few paragraphs
-                short_response = '\n\n'.join(paragraphs[:3])
-                short_response += "\n\n(I've provided a concise answer. Let me know if you'd like more details.)"
-                return short_response
-        elif preference >= 8:
+                return '\n\n'.join(paragraphs[:3]) + response_templates.QUICK_OUTRO
+        elif bucket == 'detailed':
             # User prefers detailed responses
-            response += "\n\nSince you prefer detailed explanations, here are some additional insights:\n\n"
-            response += "- The concepts we've discussed connect to broader themes in this field\n"
-            response += "- Understanding these principles will help you tackle more advanced topics\n"
-            response += "- Consider exploring related concepts to deepen your knowledge"
+            return response + response_templates.DETAILED_OUTRO
         
-        return response 
\ No newline at end of file
+        return response
\ No newline at end of file
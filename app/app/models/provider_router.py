@@ -0,0 +1,307 @@
+"""
+AI model routing with fallback and hedged requests for the Smart Learning with Personalized AI Tutor application
+
+An AIModel can carry a routing policy under "routing" in its parameters:
+    
+    {"routing": {"fallback": ["Claude 2", 5, "BERT Q&A"], "hedge": true}}
+
+Fallback entries are AIModel names or IDs, tried in order when the models
+before them fail. With hedging, the next model is also started once the
+running one has taken longer than its own p95 latency (or "hedge_after_ms"),
+and whichever complete answer arrives first is used. Models are called
+through their stream handlers where they have one, so once the race is
+decided the losing request is closed at its next chunk and the provider
+stops generating; a model without a stream handler runs to the end and its
+answer is dropped.
+
+Latencies of successful answers are kept per model in a sliding window for
+the p50/p95 used by hedging and reported in the routing metrics.
+
+Every model is admitted by its circuit breaker and concurrency limiter
+(app.models.circuit_breaker) before it is started; a rejected model is
+skipped without a call, as if it had failed.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.models.circuit_breaker import get_guard
+
+DEFAULT_WORKERS = 32
+DEFAULT_WINDOW = 256
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_HEDGE_MS = 2000.0
+
+RoutingPolicy = namedtuple('RoutingPolicy', ['fallback', 'hedge', 'hedge_after_ms'])
+RoutingPolicy.__doc__ = """Fallback model names or IDs in order, whether to hedge, and an optional fixed hedge delay"""
+
+Route = namedtuple('Route', ['key', 'ai_model', 'ai_model_preference', 'call', 'stream'])
+Route.__doc__ = """One model of a chain: metrics key, model and preference, handler and stream handler (or None)"""
+
+RouteResult = namedtuple('RouteResult', ['response', 'key', 'ai_model', 'latency_s', 'hedged'])
+RouteResult.__doc__ = """Winning answer, the model that gave it, its latency and whether a hedge was fired"""
+
+def model_key(ai_model):
+    """Metrics key of an AI model"""
+    return f"{ai_model.model_type.value}:{ai_model.name}"
+
+def routing_policy(ai_model):
+    """
+    Read the routing policy of an AI model
+    
+    Args:
+        ai_model (AIModel): AI model
+    
+    Returns:
+        RoutingPolicy: Policy from parameters["routing"], or None if there is none
+    """
+    if not ai_model or not ai_model.parameters:
+        return None
+    try:
+        routing = json.loads(ai_model.parameters).get('routing')
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(routing, dict):
+        return None
+    hedge_after_ms = routing.get('hedge_after_ms')
+    return RoutingPolicy(
+        fallback=tuple(routing.get('fallback') or ()),
+        hedge=bool(routing.get('hedge', False)),
+        hedge_after_ms=float(hedge_after_ms) if hedge_after_ms is not None else None
+    )
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls"""
+    
+    def __init__(self, size=DEFAULT_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def __len__(self):
+        return len(self._samples)
+    
+    def percentile(self, fraction):
+        """
+        Get a percentile of the window
+        
+        Args:
+            fraction (float): Percentile as a fraction, e.g. 0.95
+        
+        Returns:
+            float: Latency in seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+class ProviderRouter:
+    """Runs a chain of AI models with fallback and optional hedging"""
+    
+    def __init__(self, max_workers=DEFAULT_WORKERS, window=DEFAULT_WINDOW, min_samples=DEFAULT_MIN_SAMPLES,
+                 default_hedge_ms=DEFAULT_HEDGE_MS):
+        """
+        Initialize the router
+        
+        Args:
+            max_workers (int): Threads running model calls
+            window (int): Latencies kept per model
+            min_samples (int): Latencies needed before a model's own p95 sets its hedge delay
+            default_hedge_ms (float): Hedge delay until then
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.default_hedge_ms = default_hedge_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-route')
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counters = {}
+    
+    def route(self, routes, kwargs, hedge=False, hedge_after_ms=None):
+        """
+        Get an answer from the first model of the chain that gives one
+        
+        Args:
+            routes (list): Route of each model, in fallback order
+            kwargs (dict): Handler arguments other than ai_model and ai_model_preference
+            hedge (bool): Start the next model when the running one exceeds its p95 latency
+            hedge_after_ms (float): Fixed hedge delay instead of the p95
+        
+        Returns:
+            RouteResult: First answer, or None if every model failed
+        """
+        cancelled = threading.Event()
+        running = {}
+        remaining = list(routes)
+        hedged = False
+        
+        def start_next():
+            # Models whose breaker is open or whose limit is reached are skipped
+            while remaining:
+                route = remaining.pop(0)
+                if get_guard(route.key).admit():
+                    running[self._executor.submit(self._call, route, kwargs, cancelled)] = (route, time.perf_counter())
+                    return route
+                self._count(route.key, 'rejected')
+            return None
+        
+        try:
+            while running or remaining:
+                if not running and start_next() is None:
+                    break
+                
+                # The hedge delay runs from the start of the most recent call
+                timeout = None
+                if hedge and remaining:
+                    newest, started = list(running.values())[-1]
+                    timeout = max(0.0, self._hedge_delay(newest.key, hedge_after_ms) - (time.perf_counter() - started))
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    # The running model is slower than usual: race the next one
+                    route = start_next()
+                    if route is not None:
+                        self._count(route.key, 'hedges')
+                        hedged = True
+                    continue
+                
+                for future in done:
+                    route, _ = running.pop(future)
+                    result = future.result()
+                    if result is not None:
+                        response, latency_s = result
+                        self._count(route.key, 'wins')
+                        return RouteResult(response, route.key, route.ai_model, latency_s, hedged)
+                    if remaining or running:
+                        self._count(route.key, 'fallbacks')
+            return None
+        finally:
+            # Close the losers' streams; calls not started yet are dropped
+            cancelled.set()
+            for future, (route, _) in running.items():
+                if future.cancel():
+                    get_guard(route.key).finish()
+    
+    def _hedge_delay(self, key, hedge_after_ms):
+        if hedge_after_ms is not None:
+            return hedge_after_ms / 1000
+        latencies = self._latencies.get(key)
+        if latencies is not None and len(latencies) >= self.min_samples:
+            return latencies.percentile(0.95)
+        return self.default_hedge_ms / 1000
+    
+    def _call(self, route, kwargs, cancelled):
+        """Run one admitted model; returns (response, seconds) or None if it failed or lost"""
+        self._count(route.key, 'calls')
+        guard = get_guard(route.key)
+        start = time.perf_counter()
+        response = None
+        try:
+            if route.stream:
+                parts = []
+                stream = guard.run_stream(route.stream, ai_model=route.ai_model, ai_model_preference=route.ai_model_preference, **kwargs)
+                try:
+                    for part in stream:
+                        if cancelled.is_set():
+                            break
+                        parts.append(part)
+                finally:
+                    stream.close()
+                response = "".join(parts)
+            else:
+                response = guard.run(route.call, ai_model=route.ai_model, ai_model_preference=route.ai_model_preference, **kwargs)
+        except Exception as e:
+            logging.error(f"Error using AI model {route.key}: {str(e)}")
+        
+        elapsed = time.perf_counter() - start
+        if cancelled.is_set():
+            self._count(route.key, 'cancelled')
+            return None
+        if not response:
+            self._count(route.key, 'failures')
+            return None
+        self._latency(route.key).observe(elapsed)
+        return response, elapsed
+    
+    def _latency(self, key):
+        latencies = self._latencies.get(key)
+        if latencies is None:
+            with self._lock:
+                latencies = self._latencies.setdefault(key, LatencyWindow(self.window))
+        return latencies
+    
+    def _count(self, key, name):
+        with self._lock:
+            counters = self._counters.setdefault(key, {
+                'calls': 0, 'wins': 0, 'failures': 0, 'fallbacks': 0, 'hedges': 0, 'cancelled': 0, 'rejected': 0
+            })
+            counters[name] += 1
+    
+    def metrics(self):
+        """
+        Get routing statistics
+        
+        Returns:
+            dict: Per model key: call, win, failure, fallback, hedge,
+                cancellation and rejection counts with the p50/p95 latency in ms
+        """
+        with self._lock:
+            counters = {key: dict(values) for key, values in self._counters.items()}
+        for key, values in counters.items():
+            latencies = self._latencies.get(key)
+            p50 = latencies.percentile(0.50) if latencies is not None else None
+            p95 = latencies.percentile(0.95) if latencies is not None else None
+            values['p50_ms'] = p50 * 1000 if p50 is not None else None
+            values['p95_ms'] = p95 * 1000 if p95 is not None else None
+        return counters
+    
+    def close(self):
+        """Stop the worker threads once the calls already running finish"""
+        self._executor.shutdown(wait=False)
+
+_router = None
+_router_lock = threading.Lock()
+
+def init_app(app):
+    """
+    Create the shared router from the app config
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _router
+    
+    router = ProviderRouter(
+        max_workers=app.config.get('NLP_ROUTING_WORKERS', DEFAULT_WORKERS),
+        min_samples=app.config.get('NLP_HEDGE_MIN_SAMPLES', DEFAULT_MIN_SAMPLES),
+        default_hedge_ms=app.config.get('NLP_HEDGE_DEFAULT_MS', DEFAULT_HEDGE_MS)
+    )
+    with _router_lock:
+        previous, _router = _router, router
+    
+    # Release the threads of the router this one replaces
+    if previous is not None:
+        previous.close()
+
+def get_router():
+    """
+    Get the shared router, creating one with the defaults outside an app
+    
+    Returns:
+        ProviderRouter: Router shared by all NLP processors of the process
+    """
+    global _router
+    
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ProviderRouter()
+    return _router
\ No newline at end of file
@@ -0,0 +1,376 @@
+"""
+Shared HTTP transport to the AI model providers for the Smart Learning with Personalized AI Tutor application
+
+The model handlers used to call requests.post directly: every tutor message
+opened a new TCP and TLS connection, and with no timeout a stalled provider
+held the worker until the socket gave up. ProviderTransport gives each
+provider one requests Session whose connection pools (one per endpoint host)
+keep connections alive between messages, and every request gets a connect
+and a read timeout.
+
+Responses with status 429 or 5xx and failed connections are retried with
+full-jitter exponential backoff (a Retry-After header is honoured up to the
+backoff limit). Read timeouts are not retried, so a stalled provider costs
+at most one read timeout. Latency of every attempt is recorded in a
+histogram per provider; for streamed responses (stream=True) that is the
+time to the response headers, and the read timeout then applies to each
+chunk of the body. iter_sse_data and iter_ndjson read the two streaming
+formats the providers use.
+
+track_requests() counts the requests made and the provider errors seen
+(failed connections, timeouts, 429 and 5xx as final outcome) by the current
+thread, so a caller such as the circuit breaker can tell a handler that
+gave no answer because the provider failed from one that never called it.
+"""
+
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+DEFAULT_SETTINGS = {
+    'connect_timeout': 3.05,
+    'read_timeout': 60.0,
+    'max_retries': 2,
+    'backoff_base': 0.5,
+    'backoff_max': 8.0,
+    'pool_size': 10
+}
+
+_local = threading.local()
+
+class RequestTracker:
+    """Requests made and provider errors seen inside a track_requests() block"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+
+@contextmanager
+def track_requests():
+    """
+    Count the provider requests of the current thread
+    
+    Yields:
+        RequestTracker: Counts of the requests sent in the block
+    """
+    tracker = RequestTracker()
+    outer = getattr(_local, 'tracker', None)
+    _local.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _local.tracker = outer
+        if outer is not None:
+            outer.requests += tracker.requests
+            outer.errors += tracker.errors
+
+def _track(name):
+    tracker = getattr(_local, 'tracker', None)
+    if tracker is not None:
+        setattr(tracker, name, getattr(tracker, name) + 1)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates"""
+    
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds):
+        """
+        Record one latency
+        
+        Args:
+            seconds (float): Observed latency
+        """
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, milliseconds)] += 1
+            self.count += 1
+            self.total_ms += milliseconds
+    
+    def percentile(self, fraction):
+        """
+        Estimate a percentile
+        
+        Args:
+            fraction (float): Percentile as a fraction, e.g. 0.95
+        
+        Returns:
+            float: Upper bound of the bucket holding the percentile in ms, or None without samples
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = fraction * self.count
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else float('inf')
+            return float('inf')
+    
+    def snapshot(self):
+        """
+        Get the histogram
+        
+        Returns:
+            dict: Count, mean, p50/p95/p99 estimates and cumulative bucket counts keyed by upper bound
+        """
+        with self._lock:
+            counts = list(self.counts)
+            count, total_ms = self.count, self.total_ms
+        buckets, cumulative = {}, 0
+        for bound, bucket_count in zip([str(b) for b in self.buckets_ms] + ['+Inf'], counts):
+            cumulative += bucket_count
+            buckets[bound] = cumulative
+        return {
+            'count': count,
+            'mean_ms': (total_ms / count) if count else None,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': buckets
+        }
+
+class ProviderTransport:
+    """Pooled, keep-alive HTTP client with timeouts and retries for one provider"""
+    
+    def __init__(self, provider, connect_timeout=3.05, read_timeout=60.0, max_retries=2,
+                 backoff_base=0.5, backoff_max=8.0, pool_size=10, sleep=time.sleep):
+        """
+        Initialize the transport
+        
+        Args:
+            provider (str): Provider name used in metrics and logs
+            connect_timeout (float): Seconds to establish a connection
+            read_timeout (float): Seconds to wait for response data
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): Backoff before the first retry is drawn from [0, backoff_base]
+            backoff_max (float): Longest backoff, including Retry-After
+            pool_size (int): Connections kept alive per endpoint host
+            sleep (callable): Used to wait between attempts
+        """
+        self.provider = provider
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'attempts': 0, 'retries': 0, 'errors': 0, 'timeouts': 0}
+        self._statuses = {}
+    
+    def post(self, url, **kwargs):
+        """
+        POST with retries
+        
+        Args:
+            url (str): Endpoint URL
+            **kwargs: Passed to requests (headers, json, ...); timeout overrides the default
+        
+        Returns:
+            requests.Response: Final response, which may still be an error status
+        
+        Raises:
+            requests.RequestException: If the last attempt failed without a response
+        """
+        return self.request('POST', url, **kwargs)
+    
+    def request(self, method, url, **kwargs):
+        """
+        Send a request with retries
+        
+        Args:
+            method (str): HTTP method
+            url (str): Endpoint URL
+            **kwargs: Passed to requests; timeout overrides the default
+        
+        Returns:
+            requests.Response: Final response, which may still be an error status
+        
+        Raises:
+            requests.RequestException: If the last attempt failed without a response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        self._count('requests')
+        _track('requests')
+        attempt = 0
+        while True:
+            self._count('attempts')
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ReadTimeout:
+                self.latency.observe(time.perf_counter() - start)
+                self._count('timeouts')
+                self._count('errors')
+                _track('errors')
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+                self.latency.observe(time.perf_counter() - start)
+                if attempt >= self.max_retries:
+                    self._count('errors')
+                    _track('errors')
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"{self.provider} request failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                self.latency.observe(time.perf_counter() - start)
+                self._count_status(response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code >= 400:
+                        self._count('errors')
+                    if response.status_code in RETRY_STATUSES:
+                        _track('errors')
+                    return response
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                logging.warning(f"{self.provider} returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            
+            self._count('retries')
+            self.sleep(delay)
+            attempt += 1
+    
+    def _backoff(self, attempt, retry_after=None):
+        """Full jitter: uniform in [0, base * 2**attempt], or the server's Retry-After, capped"""
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+    
+    def _count_status(self, status):
+        with self._lock:
+            self._statuses[status] = self._statuses.get(status, 0) + 1
+    
+    def metrics(self):
+        """
+        Get transport statistics
+        
+        Returns:
+            dict: Request, attempt, retry, error and timeout counts, responses by status and the latency histogram
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics['statuses'] = {str(status): count for status, count in sorted(self._statuses.items())}
+        metrics['latency'] = self.latency.snapshot()
+        return metrics
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+
+def iter_sse_data(response):
+    """
+    Read a Server-Sent Events stream
+    
+    Args:
+        response (requests.Response): Streamed response
+    
+    Yields:
+        str: Data of each event, multi-line data joined with newlines
+    """
+    data = []
+    for line in response.iter_lines():
+        line = line.decode('utf-8')
+        if not line:
+            if data:
+                yield '\n'.join(data)
+                data = []
+        elif line.startswith('data:'):
+            value = line[5:]
+            data.append(value[1:] if value.startswith(' ') else value)
+    if data:
+        yield '\n'.join(data)
+
+def iter_ndjson(response):
+    """
+    Read a newline-delimited JSON stream
+    
+    Args:
+        response (requests.Response): Streamed response
+    
+    Yields:
+        Parsed object of each non-empty line
+    """
+    for line in response.iter_lines():
+        if line.strip():
+            yield json.loads(line)
+
+_settings = dict(DEFAULT_SETTINGS)
+_transports = {}
+_transports_lock = threading.Lock()
+
+def init_app(app):
+    """
+    Configure the provider transports from the app config
+    
+    Args:
+        app (Flask): Flask application instance
+    """
+    global _settings
+    
+    _settings = {
+        'connect_timeout': app.config.get('PROVIDER_CONNECT_TIMEOUT', DEFAULT_SETTINGS['connect_timeout']),
+        'read_timeout': app.config.get('PROVIDER_READ_TIMEOUT', DEFAULT_SETTINGS['read_timeout']),
+        'max_retries': app.config.get('PROVIDER_MAX_RETRIES', DEFAULT_SETTINGS['max_retries']),
+        'backoff_base': app.config.get('PROVIDER_BACKOFF_BASE', DEFAULT_SETTINGS['backoff_base']),
+        'backoff_max': app.config.get('PROVIDER_BACKOFF_MAX', DEFAULT_SETTINGS['backoff_max']),
+        'pool_size': app.config.get('PROVIDER_POOL_SIZE', DEFAULT_SETTINGS['pool_size'])
+    }
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
+def get_transport(provider):
+    """
+    Get the shared transport of a provider, creating it on first use
+    
+    Args:
+        provider (str): Provider name, e.g. 'openai' or 'anthropic'
+    
+    Returns:
+        ProviderTransport: Transport shared by all handlers of the process
+    """
+    transport = _transports.get(provider)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(provider)
+            if transport is None:
+                transport = _transports[provider] = ProviderTransport(provider, **_settings)
+    return transport
+
+def transport_metrics():
+    """
+    Get the statistics of every provider transport
+    
+    Returns:
+        dict: Provider name -> ProviderTransport.metrics()
+    """
+    return {provider: transport.metrics() for provider, transport in list(_transports.items())}
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+Extractive question answering over the knowledge base for the Smart Learning with Personalized AI Tutor application
+
+The BERT handler answers a question from the knowledge base entries found for
+the message. Passing all of them to the question-answering pipeline as one
+context makes every call tokenize the whole text again and costs more as the
+knowledge base grows, so QAEngine works on fixed-size chunks instead:
+    
+    - each entry (passage) is split once into overlapping word windows, and
+      each window is tokenized once; both are cached by passage id (subject,
+      topic) and chunk position
+    - the chunks of the candidate passages are ranked by the idf weight of
+      the question terms they contain, and only the top-k are kept
+    - the question is encoded once and paired with the cached chunk
+      encodings in one padded batch, so the model runs a single forward pass
+    - the best answer span of each chunk is scored as p(start) * p(end) and
+      the best one over all chunks is returned
+
+Latency is bounded by the top-k and the chunk size, not by the knowledge base.
+A pipeline served by the model server is called with the selected chunks
+instead, since its model and tokenizer live in the other process.
+"""
+
+from collections import namedtuple
+import numpy as np
+from app.models.knowledge_retriever import info_text
+from app.models.response_cache import LRUCache
+
+DEFAULT_TOP_K = 4
+DEFAULT_CHUNK_WORDS = 120
+DEFAULT_CACHE_SIZE = 2048
+
+# Candidate passages considered per question, in relevance order
+MAX_PASSAGES = 32
+
+MAX_QUESTION_TOKENS = 64
+MAX_SEQUENCE_LENGTH = 384
+MAX_ANSWER_TOKENS = 30
+
+Chunk = namedtuple('Chunk', ['text', 'terms'])
+Chunk.__doc__ = """A window of a passage and the set of its preprocessed tokens"""
+
+QAAnswer = namedtuple('QAAnswer', ['answer', 'score', 'subject', 'topic'])
+QAAnswer.__doc__ = """Best answer span, its p(start) * p(end) score and the passage it was taken from"""
+
+def split_words(text, chunk_words=DEFAULT_CHUNK_WORDS):
+    """
+    Split a text into overlapping windows of whole words
+    
+    Args:
+        text (str): Passage text
+        chunk_words (int): Words per window; consecutive windows share a quarter of them
+    
+    Returns:
+        list: Window texts, one for texts shorter than a window
+    """
+    words = text.split()
+    if len(words) <= chunk_words:
+        return [text.strip()] if words else []
+    stride = max(1, chunk_words - chunk_words // 4)
+    windows = []
+    for start in range(0, len(words), stride):
+        windows.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return windows
+
+class QAEngine:
+    """Chunked, cached and batched extractive question answering"""
+    
+    def __init__(self, normalize, retriever=None, top_k=DEFAULT_TOP_K, chunk_words=DEFAULT_CHUNK_WORDS, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialize the engine
+        
+        Args:
+            normalize (callable): Turns a text into tokens (NLPProcessor.preprocess_text)
+            retriever (KnowledgeRetriever): Supplies idf weights for ranking chunks, if available
+            top_k (int): Chunks run through the model per question
+            chunk_words (int): Words per chunk
+            cache_size (int): Passages whose chunks are kept, and chunks whose encodings are kept
+        """
+        self.normalize = normalize
+        self.retriever = retriever
+        self.top_k = top_k
+        self.chunk_words = chunk_words
+        self._chunks = LRUCache(cache_size)
+        self._encodings = LRUCache(cache_size)
+        self._tokenizer_name = None
+    
+    def chunks(self, subject, topic, info):
+        """
+        Chunks of one passage, split and preprocessed on first use
+        
+        Args:
+            subject (str): Subject of the passage
+            topic (str): Topic of the passage
+            info (str or dict): Passage content
+        
+        Returns:
+            tuple: Chunk tuples
+        """
+        chunks = self._chunks.get((subject, topic))
+        if chunks is None:
+            chunks = tuple(
+                Chunk(text, frozenset(self.normalize(text)))
+                for text in split_words(info_text(info), self.chunk_words)
+            )
+            self._chunks.put((subject, topic), chunks)
+        return chunks
+    
+    def select(self, question_terms, relevant_info):
+        """
+        Pick the chunks most likely to contain the answer
+        
+        Args:
+            question_terms (list): Preprocessed question tokens
+            relevant_info (dict): subject -> topic -> info, best passages first
+        
+        Returns:
+            list: (subject, topic, chunk position, Chunk) tuples, best first
+        """
+        weights = {}
+        for term in set(question_terms):
+            weights[term] = self.retriever.term_weight(term) if self.retriever is not None else 1.0
+        
+        candidates = []
+        passages = ((s, t, info) for s, topics in relevant_info.items() for t, info in topics.items())
+        for rank, (subject, topic, info) in enumerate(passages):
+            if rank >= MAX_PASSAGES:
+                break
+            for position, chunk in enumerate(self.chunks(subject, topic, info)):
+                score = sum(weight for term, weight in weights.items() if term in chunk.terms)
+                # Earlier passages and chunks win ties
+                candidates.append((-score, rank, position, subject, topic, chunk))
+        candidates.sort(key=lambda candidate: candidate[:3])
+        return [(subject, topic, position, chunk) for _, _, position, subject, topic, chunk in candidates[:self.top_k]]
+    
+    def answer(self, qa, question, relevant_info, question_terms=None):
+        """
+        Answer a question from the relevant knowledge base passages
+        
+        Args:
+            qa: Question-answering pipeline (local or served by the model server)
+            question (str): User's question
+            relevant_info (dict): subject -> topic -> info from _find_relevant_information
+            question_terms (list): Preprocessed question tokens, if already available
+        
+        Returns:
+            QAAnswer: Best answer, or None if there is nothing to search
+        """
+        if question_terms is None:
+            question_terms = self.normalize(question)
+        selected = self.select(question_terms, relevant_info)
+        if not selected:
+            return None
+        
+        model = getattr(qa, 'model', None)
+        tokenizer = getattr(qa, 'tokenizer', None)
+        if model is None or tokenizer is None or not getattr(tokenizer, 'is_fast', False):
+            return self._answer_with_pipeline(qa, question, selected)
+        return self._answer_batched(model, tokenizer, question, selected)
+    
+    def _answer_with_pipeline(self, qa, question, selected):
+        """Let the pipeline encode the selected chunks, as the model server requires"""
+        results = qa(question=[question] * len(selected), context=[chunk.text for _, _, _, chunk in selected])
+        if isinstance(results, dict):
+            results = [results]
+        best = max(range(len(selected)), key=lambda i: results[i]['score'])
+        subject, topic, _, _ = selected[best]
+        return QAAnswer(results[best]['answer'], float(results[best]['score']), subject, topic)
+    
+    def _encode(self, tokenizer, selected):
+        """Token ids and character offsets of the selected chunks, each tokenized once"""
+        # A different checkpoint tokenizes differently, so start over
+        name = getattr(tokenizer, 'name_or_path', None)
+        if name != self._tokenizer_name:
+            self._encodings.clear()
+            self._tokenizer_name = name
+        
+        keys = [(subject, topic, position) for subject, topic, position, _ in selected]
+        encodings = [self._encodings.get(key) for key in keys]
+        missing = [i for i, encoding in enumerate(encodings) if encoding is None]
+        if missing:
+            # Chunks not seen before are tokenized together in one call
+            encoded = tokenizer([selected[i][3].text for i in missing], add_special_tokens=False, return_offsets_mapping=True)
+            for i, ids, offsets in zip(missing, encoded['input_ids'], encoded['offset_mapping']):
+                encodings[i] = (ids, offsets)
+                self._encodings.put(keys[i], encodings[i])
+        return encodings
+    
+    def _answer_batched(self, model, tokenizer, question, selected):
+        """Run the question against the selected chunks in one forward pass"""
+        import torch
+        
+        question_ids = tokenizer(question, add_special_tokens=False)['input_ids'][:MAX_QUESTION_TOKENS]
+        # Special tokens around the question end the prefix; the context
+        # starts right after it and is followed by one closing token
+        context_start = len(tokenizer.build_inputs_with_special_tokens(question_ids, [])) - 1
+        room = MAX_SEQUENCE_LENGTH - context_start - 1
+        use_token_types = 'token_type_ids' in tokenizer.model_input_names
+        
+        rows, token_types, spans = [], [], []
+        for context_ids, offsets in self._encode(tokenizer, selected):
+            context_ids, offsets = context_ids[:room], offsets[:room]
+            rows.append(tokenizer.build_inputs_with_special_tokens(question_ids, context_ids))
+            if use_token_types:
+                token_types.append(tokenizer.create_token_type_ids_from_sequences(question_ids, context_ids))
+            spans.append((context_start, len(context_ids), offsets))
+        
+        width = max(len(row) for row in rows)
+        input_ids = np.full((len(rows), width), tokenizer.pad_token_id or 0, dtype=np.int64)
+        attention_mask = np.zeros((len(rows), width), dtype=np.int64)
+        for i, row in enumerate(rows):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+        inputs = {'input_ids': torch.from_numpy(input_ids), 'attention_mask': torch.from_numpy(attention_mask)}
+        if use_token_types:
+            types = np.zeros((len(rows), width), dtype=np.int64)
+            for i, row in enumerate(token_types):
+                types[i, :len(row)] = row
+            inputs['token_type_ids'] = torch.from_numpy(types)
+        
+        with torch.no_grad():
+            output = model(**inputs)
+        start_logits = np.asarray(output.start_logits, dtype=np.float64)
+        end_logits = np.asarray(output.end_logits, dtype=np.float64)
+        
+        best = None
+        for i, (start, length, offsets) in enumerate(spans):
+            if length == 0:
+                continue
+            score, first, last = best_span(start_logits[i, start:start + length], end_logits[i, start:start + length])
+            if best is None or score > best[0]:
+                best = (score, i, first, last, offsets)
+        if best is None:
+            return None
+        
+        score, i, first, last, offsets = best
+        subject, topic, _, chunk = selected[i]
+        return QAAnswer(chunk.text[offsets[first][0]:offsets[last][1]], score, subject, topic)
+    
+    def stats(self):
+        """
+        Get cache usage
+        
+        Returns:
+            dict: Cached passages and chunk encodings, encoding cache hits and misses
+        """
+        return {
+            'chunked_passages': len(self._chunks),
+            'encoded_chunks': len(self._encodings),
+            'encoding_hits': self._encodings.hits,
+            'encoding_misses': self._encodings.misses
+        }
+
+def best_span(start_logits, end_logits, max_answer_tokens=MAX_ANSWER_TOKENS):
+    """
+    Find the most likely answer span within one context
+    
+    Args:
+        start_logits (numpy.ndarray): Start logits of the context tokens
+        end_logits (numpy.ndarray): End logits of the context tokens
+        max_answer_tokens (int): Longest span considered
+    
+    Returns:
+        tuple: (p(start) * p(end), first token, last token)
+    """
+    start = np.exp(start_logits - start_logits.max())
+    start /= start.sum()
+    end = np.exp(end_logits - end_logits.max())
+    end /= end.sum()
+    
+    # Spans end at or after their start and are at most max_answer_tokens long
+    scores = np.triu(np.tril(np.outer(start, end), max_answer_tokens - 1))
+    first, last = np.unravel_index(np.argmax(scores), scores.shape)
+    return float(scores[first, last]), int(first), int(last)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Response caching for the Smart Learning with Personalized AI Tutor application
+
+Without an AI model, generate_personalized_response builds its answer only
+from the matched knowledge base entries, the learning style, and which of
+the skill level and response length ranges the profile falls in. The same
+questions from similar students therefore get the same text, so it is kept
+in a bounded LRU cache keyed by those inputs.
+"""
+
+import threading
+from collections import OrderedDict
+
+def skill_bucket(skill_level):
+    """Skill range _adjust_for_skill_level distinguishes (1-10 scale)"""
+    if skill_level <= 3:
+        return 'beginner'
+    if skill_level <= 7:
+        return 'intermediate'
+    return 'advanced'
+
+def length_bucket(preference):
+    """Response length range _adjust_response_length distinguishes (1=quick, 10=detailed)"""
+    if preference <= 3:
+        return 'quick'
+    if preference >= 8:
+        return 'detailed'
+    return 'standard'
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entries"""
+    
+    def __init__(self, maxsize):
+        """
+        Initialize the cache
+        
+        Args:
+            maxsize (int): Entries kept; 0 disables caching
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """
+        Look up a key and mark it as recently used
+        
+        Args:
+            key: Hashable key
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries over maxsize
+        
+        Args:
+            key: Hashable key
+            value: Value to cache (None is never cached)
+        """
+        if self.maxsize <= 0 or value is None:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def metrics(self):
+        """
+        Get cache statistics
+        
+        Returns:
+            dict: Hits, misses, hit rate, evictions and current/maximum size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'max_size': self.maxsize
+        }
\ No newline at end of file
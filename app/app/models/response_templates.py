@@ -0,0 +1,133 @@
+"""
+Learning style response templates for the Smart Learning with Personalized AI Tutor application
+
+Each template renders the rule-based answer for one learning style from the
+relevant knowledge base entries: an introduction, a heading per subject, a
+block per topic, and a fallback when nothing matched. The format strings are
+bound once at import and every part is collected into a list and joined, so
+rendering does not copy the growing response for each piece.
+"""
+
+class ResponseTemplate:
+    """Introduction, subject and topic blocks, and fallback text of one response style"""
+    
+    def __init__(self, intro, subject, topic, empty, topic_extra=None, topic_end=""):
+        """
+        Initialize the template
+        
+        Args:
+            intro (str): Text the response starts with
+            subject (str): Format string per subject, with {subject} and {Subject} (capitalized)
+            topic (str): Format string per topic, with {topic}, {Topic} (capitalized) and {info}
+            empty (str): Text appended when there are no relevant entries
+            topic_extra (callable): (subject, info) -> list of strings added after each topic
+            topic_end (str): Text closing each topic, after the extra strings
+        """
+        self.intro = intro
+        self._subject = subject.format
+        self._topic = topic.format
+        self.empty = empty
+        self.topic_extra = topic_extra
+        self.topic_end = topic_end
+    
+    def render(self, relevant_info):
+        """
+        Render the response
+        
+        Args:
+            relevant_info (dict): subject -> topic -> info
+        
+        Returns:
+            str: Response text
+        """
+        parts = [self.intro]
+        append = parts.append
+        for subject, topics in relevant_info.items():
+            append(self._subject(subject=subject, Subject=subject.capitalize()))
+            for topic, info in topics.items():
+                append(self._topic(topic=topic, Topic=topic.capitalize(), info=info))
+                if self.topic_extra is not None:
+                    parts.extend(self.topic_extra(subject, info))
+                    append(self.topic_end)
+        if not relevant_info:
+            append(self.empty)
+        return "".join(parts)
+
+def _key_points(subject, info):
+    """The first three sentences of the info as bullets"""
+    # Only the first three pieces are used, so the rest is not split
+    points = []
+    for sentence in info.split('.', 3)[:3]:
+        sentence = sentence.strip()
+        if sentence:
+            points.append(f"- {sentence}.\n")
+    return points
+
+KINESTHETIC_EXERCISES = (
+    ("math", "- Work through some example problems step by step\n- Create your own problems and solve them\n"),
+    ("science", "- Design a simple experiment to demonstrate this concept\n- Build a model that represents this idea\n"),
+    ("programming", "- Write a small program that implements this concept\n- Debug and modify existing code to see how it works\n")
+)
+DEFAULT_EXERCISES = "- Create a project that applies this knowledge\n- Teach this concept to someone else using examples\n"
+
+def _exercises(subject, info):
+    """Hands-on exercises for the first subject area the subject name contains"""
+    subject = subject.lower()
+    for area, exercises in KINESTHETIC_EXERCISES:
+        if area in subject:
+            return (exercises,)
+    return (DEFAULT_EXERCISES,)
+
+VISUAL = ResponseTemplate(
+    intro="Let me show you visually:\n\n",
+    subject="## {Subject}\n\n",
+    topic="### {Topic}\n{info}\n\n"
+          "I would recommend looking at diagrams or videos about this topic. Visualizing the concepts will help you understand them better.\n\n",
+    empty="I don't have specific visual information on this topic yet. Would you like me to find some diagrams or visual explanations for you?"
+)
+
+AUDITORY = ResponseTemplate(
+    intro="Let me explain this to you:\n\n",
+    subject="About {subject}:\n\n",
+    topic="When we talk about {topic}, here's what it means:\n{info}\n\n"
+          "Try saying this out loud to yourself to remember it better. Discussing this with others would also help reinforce your understanding.\n\n",
+    empty="I don't have specific information on this topic yet. Would you like me to explain the basic concepts verbally?"
+)
+
+READING_WRITING = ResponseTemplate(
+    intro="Here's a detailed explanation:\n\n",
+    subject="# {Subject}\n\n",
+    topic="## {Topic}\n{info}\n\nKey points to note:\n",
+    empty="I don't have specific textual information on this topic yet. Would you like me to provide some reading materials or written explanations?",
+    topic_extra=_key_points,
+    topic_end="\nTry writing these points down in your own words to better understand and remember them.\n\n"
+)
+
+KINESTHETIC = ResponseTemplate(
+    intro="Let's learn by doing:\n\n",
+    subject="For {subject}, here are some hands-on activities:\n\n",
+    topic="To understand {topic}:\n{info}\n\nTry this practical exercise:\n",
+    empty="I don't have specific hands-on activities for this topic yet. Would you like me to suggest some practical exercises or projects?",
+    topic_extra=_exercises,
+    topic_end="\nLearning by doing will help you internalize these concepts better.\n\n"
+)
+
+DEFAULT = ResponseTemplate(
+    intro="Here's what I know about this topic:\n\n",
+    subject="## {Subject}\n\n",
+    topic="### {Topic}\n{info}\n\n",
+    empty="I don't have specific information on this topic yet. Could you provide more details about what you'd like to learn?"
+)
+
+# Additions of _adjust_for_skill_level and _adjust_response_length
+BEGINNER_INTRO = "Let's start with the basics:\n\n"
+BEGINNER_OUTRO = "\n\nDon't worry if this seems challenging at first. We'll take it one step at a time."
+ADVANCED_INTRO = "Given your advanced understanding, here's a detailed explanation:\n\n"
+ADVANCED_OUTRO = "\n\nFor a deeper dive into this topic, you might want to explore the underlying principles and advanced applications."
+QUICK_OUTRO = "\n\n(I've provided a concise answer. Let me know if you'd like more details.)"
+DETAILED_OUTRO = (
+    "\n\nSince you prefer detailed explanations, here are some additional insights:\n\n"
+    "- The concepts we've discussed connect to broader themes in this field\n"
+    "- Understanding these principles will help you tackle more advanced topics\n"
+    "- Consider exploring related concepts to deepen your knowledge"
+)
\ No newline at end of file
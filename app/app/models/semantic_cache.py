@@ -0,0 +1,278 @@
+"""
+Semantic response cache for the Smart Learning with Personalized AI Tutor application
+
+Students of one course ask the same questions in slightly different words,
+and each one would be a paid, multi-second call to an LLM. The question is
+reduced to the tokens preprocess_text keeps (lowercase lemmas without
+stopwords) minus words that only frame a request ("explain", "tell",
+"please"), and vectorized locally as hashed word, word pair and character
+trigram features, so reworded and misspelled questions still land close
+together. A lookup returns the answer of the most similar cached question
+when the cosine similarity reaches the threshold.
+
+Entries are scoped: only questions asked of the same model, about the same
+knowledge base subjects, by students with the same learning style and skill
+range can share an answer. Each scope keeps an inverted index from feature
+to entries. Vectors have unit length, so an entry sharing only features
+whose question weights have a norm below the threshold cannot reach it: a
+lookup reads the postings of the question's heaviest features until the rest
+falls below that bound, and scores only the entries found there. A question
+normalizing to one already cached is found by its signature without scoring.
+Entries expire after a TTL and the least recently used ones are
+evicted beyond the size limit.
+"""
+
+import math
+import operator
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict, namedtuple
+from itertools import repeat
+
+DEFAULT_SIZE = 2048
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_TTL = 24 * 60 * 60
+
+# Feature space of the hashed vectors
+HASH_BITS = 20
+
+# Words that frame a request without changing what is asked
+REQUEST_WORDS = frozenset([
+    "explain", "tell", "please", "describe", "define", "definition", "mean", "meaning",
+    "help", "understand", "know", "show", "want", "need", "give", "thanks", "thank", "question"
+])
+
+# Relative weight of each feature kind
+WORD_WEIGHT = 1.0
+PAIR_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25
+
+CacheScope = namedtuple('CacheScope', ['namespace', 'subjects', 'learning_style', 'skill'])
+CacheScope.__doc__ = """Questions can only share an answer within one model namespace, subject set, learning style and skill range"""
+
+CacheHit = namedtuple('CacheHit', ['response', 'similarity', 'saved_s'])
+CacheHit.__doc__ = """Cached answer, the similarity of its question and the generation time it saved"""
+
+_Entry = namedtuple('_Entry', ['scope', 'signature', 'vector', 'response', 'created', 'cost_s'])
+
+def _feature(text):
+    return zlib.crc32(text.encode('utf-8')) & ((1 << HASH_BITS) - 1)
+
+def _signature(vector):
+    return frozenset(vector.items())
+
+def question_vector(tokens):
+    """
+    Vectorize a question
+    
+    Args:
+        tokens (list): Preprocessed question tokens
+    
+    Returns:
+        dict: Hashed feature -> weight, L2-normalized; empty if there are no tokens
+    """
+    tokens = [token for token in tokens if token not in REQUEST_WORDS]
+    weights = Counter()
+    for token in tokens:
+        weights[_feature(token)] += WORD_WEIGHT
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            weights[_feature(padded[i:i + 3])] += TRIGRAM_WEIGHT
+    for first, second in zip(tokens, tokens[1:]):
+        weights[_feature(f"{first} {second}")] += PAIR_WEIGHT
+    
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    if not norm:
+        return {}
+    return {feature: weight / norm for feature, weight in weights.items()}
+
+class SemanticCache:
+    """Nearest-neighbour answer cache with per-scope indexes, TTL and LRU eviction"""
+    
+    def __init__(self, maxsize=DEFAULT_SIZE, threshold=DEFAULT_THRESHOLD, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        Initialize the cache
+        
+        Args:
+            maxsize (int): Answers kept over all scopes
+            threshold (float): Minimum cosine similarity of a hit
+            ttl (float): Seconds an answer is served; 0 keeps answers until evicted
+            clock (callable): Monotonic time source
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._indexes = {}
+        self._signatures = {}
+        self._next_id = 0
+        self._namespaces = {}
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, scope, vector):
+        """
+        Find the answer of the most similar cached question
+        
+        Args:
+            scope (CacheScope): Scope of the question
+            vector (dict): question_vector() of the question
+        
+        Returns:
+            CacheHit: Cached answer, or None if no question is similar enough
+        """
+        start = time.perf_counter()
+        with self._lock:
+            counters = self._counters(scope.namespace)
+            best_id, best_score = None, 0.0
+            index = self._indexes.get(scope)
+            if index and vector:
+                now = self.clock()
+                exact = self._signatures.get((scope, _signature(vector)))
+                if exact is not None:
+                    if self._expired(self._entries[exact], now):
+                        self._remove(exact)
+                        self.expirations += 1
+                    else:
+                        best_id, best_score = exact, 1.0
+                
+                if best_id is None:
+                    features, weights = list(vector), list(vector.values())
+                    for entry_id in self._candidates(index, vector):
+                        entry = self._entries[entry_id]
+                        score = sum(map(operator.mul, weights, map(entry.vector.get, features, repeat(0.0))))
+                        if score < self.threshold or score <= best_score:
+                            continue
+                        if self._expired(entry, now):
+                            self._remove(entry_id)
+                            self.expirations += 1
+                            continue
+                        best_id, best_score = entry_id, score
+            
+            counters['lookup_s'] += time.perf_counter() - start
+            if best_id is None:
+                counters['misses'] += 1
+                return None
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            counters['hits'] += 1
+            counters['saved_s'] += entry.cost_s
+            return CacheHit(entry.response, min(best_score, 1.0), entry.cost_s)
+    
+    def put(self, scope, vector, response, cost_s):
+        """
+        Cache the answer to a question
+        
+        Args:
+            scope (CacheScope): Scope of the question
+            vector (dict): question_vector() of the question
+            response (str): Generated answer
+            cost_s (float): Seconds the answer took to generate
+        """
+        if self.maxsize <= 0 or not vector or not response:
+            return
+        with self._lock:
+            signature = _signature(vector)
+            previous = self._signatures.get((scope, signature))
+            if previous is not None:
+                self._remove(previous)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(scope, signature, vector, response, self.clock(), cost_s)
+            self._signatures[(scope, signature)] = entry_id
+            index = self._indexes.setdefault(scope, {})
+            for feature in vector:
+                index.setdefault(feature, set()).add(entry_id)
+            self._counters(scope.namespace)['stored'] += 1
+            
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                if self._expired(self._entries[oldest], self.clock()):
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+                self._remove(oldest)
+    
+    def clear(self):
+        """Drop every answer, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._signatures.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def metrics(self):
+        """
+        Get cache statistics
+        
+        Returns:
+            dict: Overall and per-namespace hits, misses, hit rate, generation
+                time saved and mean lookup time, plus size, evictions and expirations
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._namespaces.items():
+                lookups = counters['hits'] + counters['misses']
+                namespaces[namespace] = {
+                    'hits': counters['hits'],
+                    'misses': counters['misses'],
+                    'hit_rate': (counters['hits'] / lookups) if lookups else 0.0,
+                    'stored': counters['stored'],
+                    'latency_saved_s': counters['saved_s'],
+                    'mean_lookup_ms': (counters['lookup_s'] / lookups * 1000) if lookups else 0.0
+                }
+            hits = sum(counters['hits'] for counters in namespaces.values())
+            misses = sum(counters['misses'] for counters in namespaces.values())
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': (hits / (hits + misses)) if hits + misses else 0.0,
+                'latency_saved_s': sum(counters['latency_saved_s'] for counters in namespaces.values()),
+                'size': len(self._entries),
+                'max_size': self.maxsize,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'threshold': self.threshold,
+                'namespaces': namespaces
+            }
+    
+    def _counters(self, namespace):
+        counters = self._namespaces.get(namespace)
+        if counters is None:
+            counters = self._namespaces[namespace] = {'hits': 0, 'misses': 0, 'stored': 0, 'saved_s': 0.0, 'lookup_s': 0.0}
+        return counters
+    
+    def _candidates(self, index, vector):
+        """Entries that can reach the threshold: those sharing one of the heaviest features"""
+        candidates = set()
+        remaining = 1.0
+        bound = self.threshold * self.threshold
+        for feature, weight in sorted(vector.items(), key=lambda item: -item[1]):
+            if remaining < bound:
+                break
+            postings = index.get(feature)
+            if postings:
+                candidates.update(postings)
+            remaining -= weight * weight
+        return list(candidates)
+    
+    def _expired(self, entry, now):
+        return self.ttl > 0 and now - entry.created > self.ttl
+    
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        if self._signatures.get((entry.scope, entry.signature)) == entry_id:
+            del self._signatures[(entry.scope, entry.signature)]
+        index = self._indexes[entry.scope]
+        for feature in entry.vector:
+            postings = index[feature]
+            postings.discard(entry_id)
+            if not postings:
+                del index[feature]
+        if not index:
+            del self._indexes[entry.scope]
\ No newline at end of file
@@ -0,0 +1,370 @@
+"""
+Word tokenizers for the Smart Learning with Personalized AI Tutor application
+
+NLPProcessor only keeps the alphanumeric tokens of a message. RegexTokenizer
+returns exactly the alphanumeric tokens nltk.word_tokenize would return, but
+without running Punkt and the Treebank regular expressions over every message:
+whitespace chunks that are plain words (the vast majority) are taken as they
+are, words wrapped in brackets, quotes or trailing punctuation are matched by
+one precompiled pattern, and only the remaining chunks go through the Treebank
+rules. NLTK splits the final period off a sentence but keeps it on
+abbreviations, so Punkt's token rules are applied to the few periods that
+could end a sentence. Punkt moves quotes and brackets that follow a break
+back into the ending sentence, and Treebank then only splits the period off
+when they are all closing ones, so "1.‘" keeps its period (and its number).
+
+NLTKTokenizer keeps the original behaviour and is selected with
+NLP_TOKENIZER=nltk.
+"""
+
+import logging
+import re
+from collections import namedtuple
+
+DEFAULT_TOKENIZER = 'regex'
+
+SentenceParameters = namedtuple('SentenceParameters', [
+    'abbrev_types',
+    'collocations',
+    'sent_starters',
+    'ortho_context'
+])
+
+# Used when the Punkt parameters for English are not installed
+COMMON_ABBREVIATIONS = frozenset([
+    'dr', 'mr', 'mrs', 'ms', 'prof', 'st', 'jr', 'sr', 'vs', 'etc', 'inc', 'ltd', 'co', 'corp',
+    'e.g', 'i.e', 'u.s', 'a.m', 'p.m', 'approx', 'dept', 'fig', 'vol', 'no',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+])
+
+# Orthographic context flags of the Punkt parameters
+_ORTHO_BEG_UC = 1 << 1
+_ORTHO_MID_UC = 1 << 2
+_ORTHO_UNK_UC = 1 << 3
+_ORTHO_BEG_LC = 1 << 4
+_ORTHO_MID_LC = 1 << 5
+_ORTHO_UNK_LC = 1 << 6
+_ORTHO_UC = _ORTHO_BEG_UC + _ORTHO_MID_UC + _ORTHO_UNK_UC
+_ORTHO_LC = _ORTHO_BEG_LC + _ORTHO_MID_LC + _ORTHO_UNK_LC
+
+# Punkt word tokenization, used to build the context of a possible sentence break
+_PUNKT_NON_WORD = r"(?:[)\";}\]\*:@\'\({\[‘’“”\xab\xbb?!])"
+_PUNKT_MULTI_CHAR = r"(?:\-{2,}|\.{2,}|(?:\.\s){2,}\.)"
+_PUNKT_WORD = re.compile(r"""(
+        %(MultiChar)s
+        |
+        (?=[^\(\"\`{\[:;&\#\*@\)}\]\-,])\S+?
+        (?=
+            \s|$|%(NonWord)s|%(MultiChar)s|,(?=$|\s|%(NonWord)s|%(MultiChar)s)
+        )
+        |
+        \S
+    )""" % {'NonWord': _PUNKT_NON_WORD, 'MultiChar': _PUNKT_MULTI_CHAR}, re.UNICODE | re.VERBOSE)
+_PUNKT_ELLIPSIS = re.compile(r"\.\.+$")
+_PUNKT_NUMERIC = re.compile(r"^-?[\.,]?\d[\d,\.-]*\.?$")
+_PUNKT_INITIAL = re.compile(r"[^\W\d]\.$")
+_PUNKT_PUNCTUATION = frozenset(";:,.!?")
+_SENTENCE_END_CHARS = frozenset(".?!")
+# Characters after a sentence-ending character that make it a possible break
+_AFTER_TOKEN_CHARS = frozenset(")\";}]*:@'({[‘’“”\xab\xbb?!")
+
+# Characters allowed after the final period of a sentence
+_CLOSING_CHARS = frozenset("])}>\"'\xbb”’")
+# Punkt's boundary realignment: these characters after a break, up to whitespace,
+# the end of the text or "--", are moved back into the ending sentence
+_BOUNDARY_REALIGNMENT = re.compile(r"[\"')\]}‘’“”\xab\xbb]+?(?:\s+|(?=--)|$)")
+_SENTENCE_FINAL_PERIOD = re.compile(r"(.*[^.])\.[%s]*" % re.escape("".join(sorted(_CLOSING_CHARS))), re.DOTALL)
+
+# A word with only brackets, quotes and punctuation that Treebank always splits off
+_WRAPPED_WORD = re.compile(r"[(\[{<\"“\xab‘„`]*([^\W_]+)[?!,;:)\]}>\"”\xbb’]*")
+
+# Treebank contractions that split an alphanumeric word
+_SPLIT_CONTRACTIONS = {
+    'cannot': 3,
+    'gimme': 3,
+    'gonna': 3,
+    'gotta': 3,
+    'lemme': 3,
+    'wanna': 3
+}
+
+# Treebank rules (nltk.tokenize.destructive.NLTKWordTokenizer) except the
+# final-period rules, which depend on where the sentence ends
+_TREEBANK_RULES = [
+    (re.compile("([\xab“‘„]|[`]+)"), r" \1 "),
+    (re.compile(r"^\""), r"``"),
+    (re.compile(r"(``)"), r" \1 "),
+    (re.compile(r"([ \(\[{<])(\"|\'{2})"), r"\1 `` "),
+    (re.compile(r"(?i)(?<!\w)(\')(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)"), r"\1 "),
+    (re.compile(r"([:,])([^\d])"), r" \1 \2"),
+    (re.compile(r"([:,])$"), r" \1 "),
+    (re.compile(r"\.{2,}"), r" \g<0> "),
+    (re.compile(r"[;@#$%&]"), r" \g<0> "),
+    (re.compile(r"[‒-―]"), r" \g<0> "),
+    (re.compile(r"[?!]"), r" \g<0> "),
+    (re.compile(r"([^'])' "), r"\1 ' "),
+    (re.compile(r"[*]"), r" \g<0> "),
+    (re.compile(r"[\]\[\(\)\{\}\<\>]"), r" \g<0> "),
+    (re.compile(r"--"), r" -- ")
+]
+_TREEBANK_ENDING_RULES = [
+    (re.compile("([\xbb”’])"), r" \1 "),
+    (re.compile(r"''"), " '' "),
+    (re.compile(r'"'), " '' "),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+    (re.compile(r"([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) "), r"\1 \2 "),
+    (re.compile(r"(?i)\b(can)(not)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(d)('ye)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(gim)(me)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(gon)(na)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(got)(ta)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(lem)(me)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(more)('n)\b"), r" \1 \2 "),
+    (re.compile(r"(?i)\b(wan)(na)(?=\s)"), r" \1 \2 "),
+    (re.compile(r"(?i) ('t)(is)\b"), r" \1 \2 "),
+    (re.compile(r"(?i) ('t)(was)\b"), r" \1 \2 ")
+]
+
+def load_sentence_parameters():
+    """
+    Load the Punkt parameters for English
+    
+    Returns:
+        SentenceParameters: Abbreviations, collocations, sentence starters and orthographic context
+    """
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer
+        params = PunktTokenizer('english')._params
+    except (ImportError, LookupError) as e:
+        logging.warning(f"Punkt parameters not available, using built-in abbreviations: {str(e)}")
+        return SentenceParameters(COMMON_ABBREVIATIONS, frozenset(), frozenset(), {})
+    
+    return SentenceParameters(
+        frozenset(params.abbrev_types),
+        frozenset(params.collocations),
+        frozenset(params.sent_starters),
+        dict(params.ortho_context)
+    )
+
+class RegexTokenizer:
+    """Returns the alphanumeric tokens of nltk.word_tokenize without running NLTK"""
+    
+    def __init__(self, sentence_parameters=None):
+        """
+        Initialize the tokenizer
+        
+        Args:
+            sentence_parameters (SentenceParameters): Punkt parameters, loaded on first use if not given
+        """
+        self._params = sentence_parameters
+    
+    def tokenize(self, text):
+        """
+        Tokenize text
+        
+        Args:
+            text (str): Text to tokenize
+        
+        Returns:
+            list: Alphanumeric tokens in order
+        """
+        tokens = []
+        chunks = text.split()
+        
+        # Closing brackets and quotes after the last word still end the sentence
+        last = len(chunks) - 1
+        while last > 0 and all(c in _CLOSING_CHARS for c in chunks[last]):
+            last -= 1
+        
+        for index, chunk in enumerate(chunks):
+            if chunk.isalnum():
+                self._add_word(chunk, tokens)
+                continue
+            
+            final = index >= last
+            at_end = index == len(chunks) - 1
+            end = self._possible_sentence_end(chunk, index < len(chunks) - 1)
+            next_chunk = chunks[index + 1] if end == len(chunk) - 1 else None
+            if end >= 0 and self._is_sentence_break(chunk, end, next_chunk):
+                # An opening quote realigned onto the sentence keeps the period on its word
+                realigned = _BOUNDARY_REALIGNMENT.match(chunk[end + 1:] if next_chunk is None else next_chunk)
+                if realigned and not all(c in _CLOSING_CHARS for c in realigned.group(0)):
+                    self._add_piece(chunk[:end + 1], tokens, False)
+                else:
+                    self._add_sentence_end(chunk[:end + 1], tokens, True)
+                chunk = chunk[end + 1:]
+            
+            if final:
+                self._add_sentence_end(chunk, tokens, at_end)
+            else:
+                self._add_piece(chunk, tokens, False)
+        
+        return tokens
+    
+    def _add_word(self, word, tokens):
+        split = _SPLIT_CONTRACTIONS.get(word.lower())
+        if split:
+            tokens.append(word[:split])
+            tokens.append(word[split:])
+        else:
+            tokens.append(word)
+    
+    def _add_piece(self, piece, tokens, at_end):
+        if not piece:
+            return
+        if piece.isalnum():
+            self._add_word(piece, tokens)
+            return
+        
+        match = _WRAPPED_WORD.fullmatch(piece)
+        if match:
+            self._add_word(match.group(1), tokens)
+            return
+        
+        # Uncommon shapes (clitics, inner punctuation, numbers) take the full Treebank
+        # rules; some of them depend on whether whitespace follows
+        text = piece if at_end else piece + " "
+        for regexp, substitution in _TREEBANK_RULES:
+            text = regexp.sub(substitution, text)
+        text = " " + text + " "
+        for regexp, substitution in _TREEBANK_ENDING_RULES:
+            text = regexp.sub(substitution, text)
+        tokens.extend(token for token in text.split() if token.isalnum())
+    
+    def _add_sentence_end(self, piece, tokens, at_end):
+        # Treebank splits the period off the last word of a sentence
+        match = _SENTENCE_FINAL_PERIOD.fullmatch(piece)
+        if match:
+            self._add_piece(match.group(1), tokens, False)
+        else:
+            self._add_piece(piece, tokens, at_end)
+    
+    def _possible_sentence_end(self, chunk, has_next):
+        """Index of the last character of a chunk where Punkt would consider a sentence break, or -1"""
+        for index in range(len(chunk) - 1, -1, -1):
+            if chunk[index] not in _SENTENCE_END_CHARS:
+                continue
+            if index == len(chunk) - 1:
+                if has_next:
+                    return index
+            elif chunk[index + 1] in _AFTER_TOKEN_CHARS:
+                return index
+        return -1
+    
+    def _is_sentence_break(self, chunk, end, next_chunk):
+        """Punkt's decision for the possible break at chunk[end]"""
+        context = chunk[:end + 1] + (" " + next_chunk if next_chunk is not None else chunk[end + 1])
+        if self._params is None:
+            self._params = load_sentence_parameters()
+        
+        # First pass: [token, type, sentence break, abbreviation, ellipsis]
+        annotated = []
+        for token in _PUNKT_WORD.findall(context):
+            token_type = _PUNKT_NUMERIC.sub('##number##', token.lower())
+            sentbreak = abbr = ellipsis = False
+            if token in _SENTENCE_END_CHARS:
+                sentbreak = True
+            elif _PUNKT_ELLIPSIS.match(token):
+                ellipsis = True
+            elif token.endswith('.') and not token.endswith('..'):
+                word = token[:-1].lower()
+                if word in self._params.abbrev_types or word.split('-')[-1] in self._params.abbrev_types:
+                    abbr = True
+                else:
+                    sentbreak = True
+            annotated.append([token, token_type, sentbreak, abbr, ellipsis])
+        
+        # Second pass over consecutive pairs, then Punkt's text_contains_sentbreak
+        for first, second in zip(annotated, annotated[1:]):
+            self._second_pass(first, second)
+        return any(entry[2] for entry in annotated[:-1])
+    
+    def _second_pass(self, first, second):
+        token, token_type = first[0], first[1]
+        if not token.endswith('.'):
+            return
+        
+        typ = _type_no_period(token_type)
+        next_typ = _type_no_period(second[1]) if second[2] else second[1]
+        is_initial = _PUNKT_INITIAL.match(token) is not None
+        
+        if (typ, next_typ) in self._params.collocations:
+            first[2], first[3] = False, True
+            return
+        
+        if (first[3] or first[4]) and not is_initial:
+            is_sent_starter = self._ortho_heuristic(second[0], next_typ)
+            if is_sent_starter is True:
+                first[2] = True
+                return
+            if second[0][0].isupper() and next_typ in self._params.sent_starters:
+                first[2] = True
+                return
+        
+        if is_initial or typ == '##number##':
+            is_sent_starter = self._ortho_heuristic(second[0], next_typ)
+            if is_sent_starter is False:
+                first[2], first[3] = False, True
+                return
+            if (is_sent_starter == 'unknown' and is_initial and second[0][0].isupper()
+                    and not (self._params.ortho_context.get(next_typ, 0) & _ORTHO_LC)):
+                first[2], first[3] = False, True
+    
+    def _ortho_heuristic(self, token, token_type):
+        if token in _PUNKT_PUNCTUATION:
+            return False
+        
+        ortho_context = self._params.ortho_context.get(token_type, 0)
+        if token[0].isupper() and (ortho_context & _ORTHO_LC) and not (ortho_context & _ORTHO_MID_UC):
+            return True
+        if token[0].islower() and ((ortho_context & _ORTHO_UC) or not (ortho_context & _ORTHO_BEG_LC)):
+            return False
+        return 'unknown'
+
+class NLTKTokenizer:
+    """nltk.word_tokenize (Punkt sentence splitting plus the Treebank word tokenizer)"""
+    
+    def __init__(self):
+        from nltk.tokenize import word_tokenize
+        self._word_tokenize = word_tokenize
+    
+    def tokenize(self, text):
+        """
+        Tokenize text
+        
+        Args:
+            text (str): Text to tokenize
+        
+        Returns:
+            list: All tokens, including punctuation
+        """
+        return self._word_tokenize(text)
+
+def _type_no_period(token_type):
+    if len(token_type) > 1 and token_type[-1] == '.':
+        return token_type[:-1]
+    return token_type
+
+TOKENIZERS = {
+    'regex': RegexTokenizer,
+    'nltk': NLTKTokenizer
+}
+
+def get_tokenizer(name=None, sentence_parameters=None):
+    """
+    Create a tokenizer backend
+    
+    Args:
+        name (str): 'regex' or 'nltk'
+        sentence_parameters (SentenceParameters): Punkt parameters for the regex tokenizer
+    
+    Returns:
+        object: Tokenizer with a tokenize(text) method
+    """
+    name = name or DEFAULT_TOKENIZER
+    if name not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer '{name}', expected one of: {', '.join(TOKENIZERS)}")
+    if name == 'nltk':
+        return NLTKTokenizer()
+    return RegexTokenizer(sentence_parameters)
\ No newline at end of file
@@ -5,7 +5,10 @@ AI model routes for the Smart Learning with Personalized AI Tutor
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.database.db import get_db_session
-from app.models.user import User, AIModel
+from app.models.user import User
+from app.models.ai_model import AIModel
+from app.models.circuit_breaker import guard_state
+from app.models.provider_router import model_key
 
 ai_model_bp = Blueprint('ai_model', __name__)
 
@@ -56,6 +59,43 @@ def admin_get_models():
     finally:
         db_session.remove()
 
+@ai_model_bp.route('/admin/breakers', methods=['GET'])
+@jwt_required()
+def admin_get_breakers():
+    """Admin endpoint to get the circuit breaker and concurrency limit of every AI model"""
+    # Get current user ID from JWT
+    user_id = get_jwt_identity()
+    
+    # Get database session
+    db_session = get_db_session()
+    
+    try:
+        # Check if user is admin
+        user = db_session.query(User).filter_by(id=user_id).first()
+        
+        if not user or not user.is_admin:
+            return jsonify({"error": "Unauthorized access"}), 403
+        
+        # Breaker state is kept per process; models not called yet show a closed breaker
+        models = db_session.query(AIModel).all()
+        
+        return jsonify({
+            "models": [
+                {
+                    "id": model.id,
+                    "name": model.name,
+                    "model_type": model.model_type.value,
+                    "is_active": model.is_active,
+                    **guard_state(model_key(model))
+                }
+                for model in models
+            ]
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Could not retrieve circuit breakers: {str(e)}"}), 500
+    finally:
+        db_session.remove()
+
 @ai_model_bp.route('', methods=['POST'])
 @jwt_required()
 def create_model():
@@ -0,0 +1,226 @@
+"""
+Circuit breakers and AIMD concurrency limits against a local stand-in provider that fails and overloads
+
+Starts stand-ins for a GPT and a Claude model API. Claude answers in
+--backup-ms. GPT can be switched between three modes: healthy (answers in
+--base-ms), down (fails with a 503 after --base-ms) and overloaded, where it
+serves --capacity requests at a time and each request beyond that makes all
+of them slower, as a provider queueing work does.
+
+Checks that:
+- while GPT is down, its breaker opens after the minimum number of calls,
+  later requests go to Claude without calling GPT, and a rejected call costs
+  microseconds;
+- once GPT is healthy again, the half-open probe closes the breaker;
+- under --threads concurrent callers of the overloaded GPT, the AIMD limit
+  settles near its capacity and cuts the latency of the admitted calls
+  compared with no limit.
+
+Usage:
+    python -m benchmarks.circuit_breaker_bench [--requests 100] [--threads 32] [--capacity 4] [--seconds 2]
+"""
+
+import argparse
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from app.models import circuit_breaker, provider_transport
+from app.models.ai_model import AIModelType
+from app.models.circuit_breaker import ModelGuard, get_guard, CLOSED, OPEN
+from app.models.nlp_processor import NLPProcessor
+from app.models.provider_router import ProviderRouter, Route, model_key
+
+class DegradingProvider(BaseHTTPRequestHandler):
+    """/gpt answers according to server.mode; /claude always answers"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        if self.path.strip('/') == 'claude':
+            time.sleep(server.backup_s)
+            self._reply(200, {'completion': 'claude answer', 'stop_reason': 'stop_sequence'})
+            return
+        
+        with server.lock:
+            server.gpt_requests += 1
+            server.in_flight += 1
+            in_flight = server.in_flight
+        try:
+            if server.mode == 'overloaded':
+                # Work beyond the capacity queues up and slows every request down
+                time.sleep(server.base_s * max(1.0, in_flight / server.capacity))
+            else:
+                time.sleep(server.base_s)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        if server.mode == 'down':
+            self._reply(503, {'error': 'overloaded'})
+        else:
+            self._reply(200, {'choices': [{'message': {'content': 'gpt answer'}}]})
+    
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def overload(guard, call, seconds, threads):
+    """Call through a guard from concurrent callers for a while; returns admitted latencies and shed count"""
+    latencies, shed = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    
+    def caller(_):
+        while time.perf_counter() < deadline:
+            if not guard.admit():
+                with lock:
+                    shed[0] += 1
+                # A shed caller gets the fallback answer; pace it like a short one
+                time.sleep(0.002)
+                continue
+            start = time.perf_counter()
+            guard.run(call)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+    
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(caller, range(threads)))
+    return latencies, shed[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--capacity', type=int, default=4)
+    parser.add_argument('--base-ms', type=float, default=20.0)
+    parser.add_argument('--backup-ms', type=float, default=5.0)
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of each overload run')
+    args = parser.parse_args()
+    # Every failed GPT call logs an error; the counts below are what matters
+    logging.disable(logging.CRITICAL)
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DegradingProvider)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.mode = 'down'
+    server.base_s, server.backup_s = args.base_ms / 1000, args.backup_ms / 1000
+    server.capacity = args.capacity
+    server.gpt_requests = server.in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    # Failures should reach the breaker, not be retried by the transport
+    provider_transport.init_app(SimpleNamespace(config={'PROVIDER_MAX_RETRIES': 0, 'PROVIDER_POOL_SIZE': args.threads * 2}))
+    circuit_breaker.init_app(SimpleNamespace(config={'NLP_BREAKER_SLOW_CALL_MS': args.base_ms * 10}))
+    
+    # The handlers need no lexicon or knowledge base
+    processor = NLPProcessor.__new__(NLPProcessor)
+    preference = SimpleNamespace(api_key='stand-in', custom_parameters=None)
+    kwargs = dict(user_message='What is photosynthesis?', user_profile={'skill_level': 5}, conversation_history=[], relevant_info={})
+    
+    def model(model_type, path):
+        return SimpleNamespace(name='stand-in', model_type=model_type, api_endpoint=f"{base}/{path}",
+                               api_key_required=False, parameters=None)
+    
+    gpt_model, claude_model = model(AIModelType.GPT, 'gpt'), model(AIModelType.CLAUDE, 'claude')
+    gpt = Route(model_key(gpt_model), gpt_model, preference, processor._handle_gpt_model, None)
+    claude = Route(model_key(claude_model), claude_model, preference, processor._handle_claude_model, None)
+    guard = get_guard(gpt.key)
+    failures = []
+    
+    # GPT down: the breaker opens and the chain answers from Claude without calling GPT
+    router = ProviderRouter(max_workers=8)
+    latencies, answered = [], 0
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        result = router.route([gpt, claude], kwargs)
+        latencies.append(time.perf_counter() - start)
+        answered += bool(result and result.key == claude.key)
+    breaker = guard.breaker.snapshot()
+    min_calls = guard.breaker.min_calls
+    after_open = latencies[min_calls:]
+    print(f"gpt down: {answered}/{args.requests} answered by claude, gpt called {server.gpt_requests} times, "
+          f"breaker {breaker['state']} (rejected {breaker['rejected']})")
+    print(f"  per request: {percentile(latencies[:min_calls], 0.5) * 1000:.1f} ms before opening, "
+          f"{percentile(after_open, 0.5) * 1000:.1f} ms after")
+    if answered != args.requests:
+        failures.append("not every request was answered by the fallback")
+    if breaker['state'] != OPEN or server.gpt_requests > min_calls:
+        failures.append(f"breaker {breaker['state']} after {server.gpt_requests} failing calls")
+    if percentile(after_open, 0.5) >= percentile(latencies[:min_calls], 0.5):
+        failures.append("open breaker did not shorten the requests")
+    
+    # Cost of a rejected call
+    rounds = 100000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        guard.admit()
+    rejection_us = (time.perf_counter() - start) / rounds * 1e6
+    print(f"  rejected call: {rejection_us:.2f} us")
+    if rejection_us > 50:
+        failures.append(f"rejection took {rejection_us:.2f} us")
+    
+    # GPT healthy again: after the open period a probe closes the breaker
+    server.mode = 'healthy'
+    guard.breaker.open_seconds = 0.1
+    time.sleep(0.15)
+    requests_before = server.gpt_requests
+    result = router.route([gpt, claude], kwargs)
+    state = guard.breaker.snapshot()['state']
+    print(f"gpt recovered: probe answered by {result.key if result else None}, breaker {state}")
+    if state != CLOSED or result is None or result.key != gpt.key or server.gpt_requests != requests_before + 1:
+        failures.append(f"half-open probe did not close the breaker ({state})")
+    
+    # GPT overloaded: AIMD keeps the calls in flight near its capacity
+    server.mode = 'overloaded'
+    call = lambda: processor._handle_gpt_model(ai_model=gpt_model, ai_model_preference=preference, **kwargs)
+    slow_call_ms = args.base_ms * 2
+    unlimited = ModelGuard('unlimited', dict(circuit_breaker.DEFAULT_SETTINGS, min_calls=10 ** 9,
+                                             initial_limit=10 ** 6, max_limit=10 ** 6, slow_call_ms=float('inf')))
+    aimd = ModelGuard('aimd', dict(circuit_breaker.DEFAULT_SETTINGS, min_calls=10 ** 9, slow_call_ms=slow_call_ms,
+                                   initial_limit=args.threads, max_limit=args.threads))
+    overload(aimd, call, args.seconds / 2, args.threads)  # let the limit settle
+    print(f"gpt overloaded ({args.threads} callers, capacity {args.capacity}):")
+    print(f"{'limit':>12}{'admitted/s':>12}{'shed/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    p95 = {}
+    for name, limited in (('none', unlimited), ('aimd', aimd)):
+        latencies, shed = overload(limited, call, args.seconds, args.threads)
+        p95[name] = percentile(latencies, 0.95)
+        label = 'none' if limited is unlimited else f"aimd {limited.limiter.snapshot()['limit']}"
+        print(f"{label:>12}{len(latencies) / args.seconds:>12.0f}{shed / args.seconds:>9.0f}"
+              f"{percentile(latencies, 0.5) * 1000:>9.1f}{p95[name] * 1000:>9.1f}")
+    limit = aimd.limiter.snapshot()['limit']
+    if not 1 <= limit <= args.capacity * 3:
+        failures.append(f"AIMD limit {limit} did not settle near the capacity {args.capacity}")
+    if p95['aimd'] > p95['none'] / 2:
+        failures.append("AIMD did not halve the p95 latency of admitted calls")
+    
+    server.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Accuracy parity and latency/RSS report for the CPU inference backends
+
+Loads the sentiment, NER and question-answering pipelines on each backend in
+a fresh interpreter, runs the fixed sample below through them one input at a
+time and reports load time, resident memory and p50/p95 latency per task.
+Every backend is then compared with the fp32 pytorch pipeline on the same
+sample:
+    
+    sentiment  share of texts with the same label, largest score difference
+    ner        share of sentences with the same entities (word and type)
+    qa         share of questions with the same answer span
+
+Exits with status 1 when any agreement is below --min-agreement, so it can
+gate a backend change.
+
+Usage:
+    python -m benchmarks.inference_backend_report [--backends pytorch int8 onnx onnx-int8] [--min-agreement 0.95]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Libraries each backend needs; without them the loader would quietly use fp32
+REQUIRED_MODULES = {
+    'pytorch': ['torch', 'transformers'],
+    'int8': ['torch', 'transformers'],
+    'onnx': ['transformers', 'optimum.onnxruntime'],
+    'onnx-int8': ['transformers', 'optimum.onnxruntime']
+}
+
+SENTIMENT_SAMPLE = [
+    "I finally understand how recursion works, thanks!",
+    "This explanation of derivatives is confusing and unclear.",
+    "Can you give me another example of a chemical bond?",
+    "The diagram really helped, great job.",
+    "I keep getting the wrong answer and I'm frustrated.",
+    "Photosynthesis makes so much more sense now.",
+    "That was way too fast, I couldn't follow.",
+    "Why does the French Revolution matter today?",
+    "I love how you explained the quadratic formula.",
+    "This is boring, can we do something else?",
+    "The practice problems were exactly what I needed.",
+    "I don't think this answer is correct.",
+    "Could you slow down a little?",
+    "Wow, I never knew cells worked like that!",
+    "I'm stuck on question 4 again.",
+    "Your examples are clear and easy to remember.",
+    "I hate fractions, they never make sense.",
+    "Let's try the next chapter.",
+    "That video lesson was fantastic.",
+    "I'm not sure I get the difference between mitosis and meiosis.",
+    "Thanks, that fixed my Python error.",
+    "The quiz was unfair and way too hard.",
+    "Geometry proofs are starting to click for me.",
+    "I still can't remember the periodic table groups."
+]
+
+NER_SAMPLE = [
+    "Marie Curie won the Nobel Prize in Paris.",
+    "Isaac Newton studied at Cambridge University in England.",
+    "The Treaty of Versailles was signed in France in 1919.",
+    "Guido van Rossum created Python while working in the Netherlands.",
+    "Napoleon Bonaparte was exiled to Saint Helena by the British.",
+    "Ada Lovelace worked with Charles Babbage in London.",
+    "The Amazon River flows through Brazil and Peru.",
+    "Albert Einstein moved from Germany to Princeton."
+]
+
+QA_SAMPLE = [
+    ("What does algebra deal with?", "Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols."),
+    ("What is calculus the study of?", "Calculus is the mathematical study of continuous change."),
+    ("What does geometry study?", "Geometry is a branch of mathematics that studies the sizes, shapes, positions, and dimensions of things."),
+    ("What does physics study?", "Physics is the natural science that studies matter, its motion and behavior through space and time."),
+    ("What is chemistry involved with?", "Chemistry is the scientific discipline involved with elements and compounds."),
+    ("What does biology study?", "Biology is the natural science that studies life and living organisms."),
+    ("What kind of language is Python?", "Python is an interpreted, high-level, general-purpose programming language."),
+    ("What kind of language is Java?", "Java is a class-based, object-oriented programming language."),
+    ("Which specification does JavaScript conform to?", "JavaScript is a programming language that conforms to the ECMAScript specification."),
+    ("Where do plants make glucose?", "Plants make glucose in their chloroplasts during photosynthesis, using light, water and carbon dioxide."),
+    ("When did the French Revolution begin?", "The French Revolution began in 1789 with the storming of the Bastille and ended in 1799."),
+    ("What is the powerhouse of the cell?", "The mitochondria is the powerhouse of the cell, producing most of its chemical energy.")
+]
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def module_available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+def timed(call, inputs):
+    """Run call on every input, returning the outputs and per-call latencies in ms"""
+    outputs, latencies = [], []
+    for item in inputs:
+        start = time.perf_counter()
+        outputs.append(call(item))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, latencies
+
+def child(backend):
+    """Load and run one backend; prints a JSON result line"""
+    missing = [name for name in REQUIRED_MODULES[backend] if not module_available(name)]
+    if missing:
+        print(json.dumps({'error': f"not installed: {', '.join(missing)}"}))
+        return
+    
+    from app.models.inference_backends import pipeline_loader
+    from app.models.model_registry import SENTIMENT_MODEL, NER_MODEL, QA_MODEL
+    
+    # Load the library before the baseline so only model memory is measured
+    importlib.import_module('transformers')
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    sentiment = pipeline_loader(SENTIMENT_MODEL, backend)()
+    ner = pipeline_loader(NER_MODEL, backend)()
+    qa = pipeline_loader(QA_MODEL, backend)()
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_mb()
+    
+    # One untimed call each so lazy initialization is not counted
+    sentiment(SENTIMENT_SAMPLE[0])
+    ner(NER_SAMPLE[0])
+    qa(question=QA_SAMPLE[0][0], context=QA_SAMPLE[0][1])
+    
+    sentiment_out, sentiment_ms = timed(lambda text: sentiment(text)[0], SENTIMENT_SAMPLE)
+    ner_out, ner_ms = timed(ner, NER_SAMPLE)
+    qa_out, qa_ms = timed(lambda pair: qa(question=pair[0], context=pair[1]), QA_SAMPLE)
+    
+    print(json.dumps({
+        'load_s': load_s,
+        'model_rss_mb': loaded_rss - baseline_rss,
+        'peak_rss_mb': rss_mb(),
+        'latency_ms': {'sentiment': sentiment_ms, 'ner': ner_ms, 'qa': qa_ms},
+        'sentiment': [(out['label'], float(out['score'])) for out in sentiment_out],
+        'ner': [sorted((entity['word'], entity['entity']) for entity in out) for out in ner_out],
+        'qa': [(out['start'], out['end'], out['answer']) for out in qa_out]
+    }))
+
+def run_backend(backend):
+    """Run the child measurement in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.inference_backend_report', '--child', backend],
+        env=dict(os.environ), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def parity(reference, result):
+    """Agreement of a backend with the fp32 reference per task"""
+    sentiment_same = sum(a[0] == b[0] for a, b in zip(reference['sentiment'], result['sentiment']))
+    return {
+        'sentiment': sentiment_same / len(SENTIMENT_SAMPLE),
+        'sentiment_max_score_diff': max(abs(a[1] - b[1]) for a, b in zip(reference['sentiment'], result['sentiment'])),
+        'ner': sum(a == b for a, b in zip(reference['ner'], result['ner'])) / len(NER_SAMPLE),
+        'qa': sum(a[:2] == b[:2] for a, b in zip(reference['qa'], result['qa'])) / len(QA_SAMPLE)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--backends', nargs='+', default=list(REQUIRED_MODULES), choices=list(REQUIRED_MODULES))
+    parser.add_argument('--min-agreement', type=float, default=0.95)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(args.child)
+        return
+    
+    backends = ['pytorch'] + [backend for backend in args.backends if backend != 'pytorch']
+    results = {}
+    for backend in backends:
+        result = run_backend(backend)
+        if 'error' in result:
+            print(f"{backend}: skipped, {result['error']}")
+        else:
+            results[backend] = result
+    if 'pytorch' not in results:
+        print("The fp32 pytorch pipeline is needed as the parity reference")
+        sys.exit(1)
+    reference = results['pytorch']
+    
+    print(f"{'backend':<10}{'load s':>8}{'model MB':>10}{'peak MB':>9}"
+          + "".join(f"{task + ' p50/p95 ms':>22}" for task in ('sentiment', 'ner', 'qa')))
+    for backend, result in results.items():
+        latencies = "".join(
+            f"{f'{statistics.median(ms):.1f} / {percentile(ms, 0.95):.1f}':>22}"
+            for ms in (result['latency_ms'][task] for task in ('sentiment', 'ner', 'qa'))
+        )
+        print(f"{backend:<10}{result['load_s']:>8.1f}{result['model_rss_mb']:>10.0f}{result['peak_rss_mb']:>9.0f}{latencies}")
+    
+    failed = False
+    print(f"\n{'backend':<10}{'sentiment':>11}{'max score diff':>16}{'ner':>7}{'qa':>7}   (agreement with pytorch fp32)")
+    for backend, result in results.items():
+        if backend == 'pytorch':
+            continue
+        agreement = parity(reference, result)
+        low = [task for task in ('sentiment', 'ner', 'qa') if agreement[task] < args.min_agreement]
+        failed = failed or bool(low)
+        print(f"{backend:<10}{agreement['sentiment']:>11.0%}{agreement['sentiment_max_score_diff']:>16.4f}"
+              f"{agreement['ner']:>7.0%}{agreement['qa']:>7.0%}   {'below ' + str(args.min_agreement) + ': ' + ', '.join(low) if low else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
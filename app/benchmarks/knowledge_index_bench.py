@@ -0,0 +1,112 @@
+"""
+Knowledge base lookup latency, full scan versus KnowledgeIndex
+
+Builds synthetic knowledge bases of 1k, 10k and 50k topics (multi-word topic
+names over a shared vocabulary), then looks up student messages that mention
+some topics by name and some by single words. Reports index build time and
+memory, per-message lookup time for the previous subject/topic scan and for
+the index, and how often both return the same entries (the index matches
+extracted topics against whole words of topic names rather than any
+substring).
+
+Topic names are normalized by lowercasing and splitting on non-alphanumerics
+here, so the benchmark needs no NLTK data.
+
+Usage:
+    python -m benchmarks.knowledge_index_bench [--sizes 1000 10000 50000] [--messages 2000]
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+import tracemalloc
+from collections import Counter
+from app.models.knowledge_index import KnowledgeIndex
+
+SUBJECTS = ["math", "science", "history", "programming", "literature", "geography", "music", "art"]
+
+def normalize(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def extract_topics(text):
+    """Same shape as NLPProcessor.extract_topics: up to 5 most frequent tokens longer than 3 characters"""
+    return [topic for topic, _ in Counter(normalize(text)).most_common(5) if len(topic) > 3]
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+def knowledge_base(topics, rng, words):
+    kb = {"subjects": {subject: {} for subject in SUBJECTS}}
+    names = set()
+    while len(names) < topics:
+        names.add(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))))
+    for name in sorted(names):
+        kb["subjects"][rng.choice(SUBJECTS)][name] = f"{name} is an important topic."
+    return kb
+
+def messages(kb, count, rng, words):
+    names = [topic for subject_data in kb["subjects"].values() for topic in subject_data]
+    result = []
+    for _ in range(count):
+        parts = ["can you explain"] + [rng.choice(words) for _ in range(rng.randint(2, 6))]
+        if rng.random() < 0.5:
+            parts.append(rng.choice(names))
+        rng.shuffle(parts)
+        result.append(" ".join(parts) + "?")
+    return result
+
+def scan_lookup(knowledge_base, user_message, topics):
+    """The previous _find_relevant_information"""
+    relevant_info = {}
+    for subject, subject_data in knowledge_base.get("subjects", {}).items():
+        for topic, info in subject_data.items():
+            if any(extracted_topic in topic.lower() for extracted_topic in topics):
+                if subject not in relevant_info:
+                    relevant_info[subject] = {}
+                relevant_info[subject][topic] = info
+            if topic.lower() in user_message.lower():
+                if subject not in relevant_info:
+                    relevant_info[subject] = {}
+                relevant_info[subject][topic] = info
+    return relevant_info
+
+def per_message_ms(lookup, queries):
+    start = time.perf_counter()
+    results = [lookup(message, topics) for message, topics in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--scan-messages', type=int, default=100, help="Messages timed with the slow full scan")
+    args = parser.parse_args()
+    
+    print(f"{'topics':>8}{'build s':>9}{'index MB':>10}{'scan ms':>10}{'index ms':>10}{'speedup':>9}{'same result':>13}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        words = vocabulary(max(2000, size // 5), rng)
+        kb = knowledge_base(size, rng, words)
+        queries = [(message, extract_topics(message)) for message in messages(kb, args.messages, rng, words)]
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = KnowledgeIndex(kb, normalize)
+        build_s = time.perf_counter() - start
+        index_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        
+        index_ms, index_results = per_message_ms(index.lookup, queries)
+        scan_queries = queries[:args.scan_messages]
+        scan_ms, scan_results = per_message_ms(lambda message, topics: scan_lookup(kb, message, topics), scan_queries)
+        same = sum(1 for a, b in zip(scan_results, index_results) if a == b) / len(scan_queries)
+        print(f"{size:>8}{build_s:>9.2f}{index_mb:>10.1f}{scan_ms:>10.3f}{index_ms:>10.3f}"
+              f"{scan_ms / index_ms:>8.0f}x{same:>13.0%}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+TF-IDF knowledge retrieval: fit versus load, and query latency
+
+Builds synthetic knowledge bases of 1k, 10k and 50k entries (a subject, a
+topic name and a sentence of text drawn from a Zipf-distributed vocabulary),
+fits KnowledgeRetriever, saves it and loads it back. Then answers student
+messages with KnowledgeRetriever.search and with the straightforward
+scikit-learn path (vectorizer.transform plus cosine_similarity over the whole
+matrix), and reports per-query latency and whether both return the same
+top-k entries with the same scores.
+
+Texts are tokenized by lowercasing and splitting on non-alphanumerics here,
+so the benchmark needs no NLTK data.
+
+Usage:
+    python -m benchmarks.knowledge_retriever_bench [--sizes 1000 10000 50000] [--queries 1000] [--top-k 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import string
+import tempfile
+import time
+import numpy as np
+from app.models.knowledge_retriever import KnowledgeRetriever, knowledge_base_entries, entry_document
+
+SUBJECTS = ["math", "science", "history", "programming", "literature", "geography", "music", "art"]
+
+def analyzer(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+def zipf_words(words, count, rng):
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    return rng.choices(words, weights=weights, k=count)
+
+def knowledge_base(size, words, rng):
+    subjects = {subject: {} for subject in SUBJECTS}
+    while sum(len(topics) for topics in subjects.values()) < size:
+        topic = " ".join(zipf_words(words, rng.randint(1, 3), rng))
+        text = " ".join(zipf_words(words, rng.randint(8, 25), rng))
+        subjects[rng.choice(SUBJECTS)][topic] = text.capitalize() + "."
+    return {"subjects": subjects}
+
+def messages(kb, words, count, rng):
+    entries = knowledge_base_entries(kb)
+    result = []
+    for _ in range(count):
+        subject, topic = rng.choice(entries)
+        info = kb["subjects"][subject][topic]
+        picked = rng.sample(analyzer(info), 3) + zipf_words(words, 3, rng)
+        result.append(f"Can you explain {' '.join(picked)} in {topic}?")
+    return result
+
+def sklearn_search(vectorizer, matrix, entries, tokens_text, top_k):
+    """The straightforward path: transform the query, score every entry, sort"""
+    from sklearn.metrics.pairwise import cosine_similarity
+    scores = cosine_similarity(vectorizer.transform([tokens_text]), matrix)[0]
+    best = np.argsort(-scores, kind='stable')[:top_k]
+    return [(float(scores[i]),) + entries[i] for i in best if scores[i] > 0]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--max-features', type=int, default=1000)
+    args = parser.parse_args()
+    
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    
+    rng = random.Random(7)
+    words = vocabulary(20000, rng)
+    print(f"{'entries':>8}{'fit s':>8}{'file KB':>9}{'load ms':>9}"
+          f"{'p50 us':>9}{'p95 us':>9}{'sklearn p50 us':>16}{'same top-k':>12}{'max diff':>10}")
+    
+    for size in args.sizes:
+        kb = knowledge_base(size, words, rng)
+        entries = knowledge_base_entries(kb)
+        queries = messages(kb, words, args.queries, rng)
+        
+        start = time.perf_counter()
+        retriever = KnowledgeRetriever.fit(kb, analyzer, args.max_features)
+        fit_s = time.perf_counter() - start
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'knowledge_tfidf.npz')
+            retriever.save(path)
+            file_kb = os.path.getsize(path) / 1024
+            start = time.perf_counter()
+            retriever = KnowledgeRetriever.load(path, kb, args.max_features)
+            load_ms = (time.perf_counter() - start) * 1000
+        
+        vectorizer = TfidfVectorizer(max_features=args.max_features, analyzer=analyzer)
+        matrix = vectorizer.fit_transform([
+            entry_document(subject, topic, kb["subjects"][subject][topic]) for subject, topic in entries
+        ])
+        
+        latencies, reference_latencies = [], []
+        same, max_diff = 0, 0.0
+        for query in queries:
+            tokens = analyzer(query)
+            start = time.perf_counter()
+            found = retriever.search(tokens, args.top_k)
+            latencies.append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            expected = sklearn_search(vectorizer, matrix, entries, query, args.top_k)
+            reference_latencies.append(time.perf_counter() - start)
+            
+            # Ties may be ordered differently, so compare scores and entry sets
+            if [round(r[0], 5) for r in found] == [round(r[0], 5) for r in expected]:
+                cutoff = round(found[-1][0], 5) if found else None
+                if {r[1:3] for r in found if round(r[0], 5) != cutoff} <= {r[1:3] for r in expected}:
+                    same += 1
+            for a, b in zip(found, expected):
+                max_diff = max(max_diff, abs(a[0] - b[0]))
+        
+        print(f"{size:>8}{fit_s:>8.2f}{file_kb:>9.0f}{load_ms:>9.1f}"
+              f"{statistics.median(latencies) * 1e6:>9.0f}{percentile(latencies, 0.95) * 1e6:>9.0f}"
+              f"{statistics.median(reference_latencies) * 1e6:>16.0f}"
+              f"{same / len(queries):>12.0%}{max_diff:>10.1e}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Per-worker cost of the JSON knowledge base versus the compiled, memory-mapped one
+
+Writes synthetic knowledge bases of 1k, 10k and 50k topics (a paragraph of
+text each) as JSON and compiles them. For both forms reports the file size,
+the time and Python heap a worker spends opening it, and the latency of
+reading one topic's info.
+
+Usage:
+    python -m benchmarks.knowledge_store_bench [--sizes 1000 10000 50000] [--lookups 20000]
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+from app.models.knowledge_store import compile_knowledge_base, open_knowledge_base
+
+SUBJECTS = ["math", "science", "history", "programming", "literature", "geography", "music", "art"]
+
+def word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+def knowledge_base(size, rng):
+    subjects = {subject: {} for subject in SUBJECTS}
+    for i in range(size):
+        topic = f"{word(rng)} {word(rng)} {i}"
+        subjects[rng.choice(SUBJECTS)][topic] = " ".join(word(rng) for _ in range(60)).capitalize() + "."
+    return {"subjects": subjects}
+
+def measure_open(path):
+    """Open a knowledge base, returning it with the seconds and traced heap MB spent"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    knowledge_base = open_knowledge_base(path)
+    seconds = time.perf_counter() - start
+    heap = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    return knowledge_base, seconds, heap
+
+def lookup_us(knowledge_base, keys):
+    subjects = knowledge_base["subjects"]
+    start = time.perf_counter()
+    for subject, topic in keys:
+        subjects[subject][topic]
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+    
+    rng = random.Random(5)
+    print(f"{'topics':>8}{'format':>10}{'file MB':>9}{'open ms':>10}{'heap MB':>9}{'lookup us':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            kb = knowledge_base(size, rng)
+            keys = rng.choices([(s, t) for s, topics in kb["subjects"].items() for t in topics], k=args.lookups)
+            
+            source = os.path.join(directory, f"kb_{size}.json")
+            compiled = os.path.join(directory, f"kb_{size}.kb")
+            with open(source, 'w') as f:
+                json.dump(kb, f)
+            compile_knowledge_base(kb, compiled)
+            del kb
+            
+            for name, path in (('json', source), ('compiled', compiled)):
+                loaded, seconds, heap = measure_open(path)
+                print(f"{size:>8}{name:>10}{os.path.getsize(path) / 1e6:>9.1f}{seconds * 1000:>10.1f}"
+                      f"{heap:>9.1f}{lookup_us(loaded, keys):>11.2f}")
+                del loaded
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
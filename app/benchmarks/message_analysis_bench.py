@@ -0,0 +1,93 @@
+"""
+Per-message CPU time of the tutor NLP path, separate calls versus analyze_message()
+
+"before" reproduces what /tutor/ask did per message: extract_topics,
+analyze_sentiment, calculate_engagement_score and
+generate_personalized_response (which extracted topics again), plus
+detect_learning_style. "after" runs analyze_message() once and passes its
+topics to generate_personalized_response.
+
+The sentiment model is disabled so both paths use keyword sentiment and the
+comparison measures text processing only; pass --with-model to keep it.
+
+Usage:
+    python -m benchmarks.message_analysis_bench [--messages 2000] [--with-model]
+"""
+
+import argparse
+import random
+import time
+from app.models.model_registry import model_registry, SENTIMENT_MODEL
+from app.models.nlp_processor import NLPProcessor
+
+QUESTIONS = [
+    "Can you explain how photosynthesis works in plants?",
+    "I don't understand why the derivative of x squared is 2x, can you show me another example?",
+    "What is the difference between mitosis and meiosis? I find it confusing.",
+    "Could you give me more practice problems on quadratic equations please!",
+    "I read the chapter on the French Revolution but I still can't see the main causes.",
+    "Thanks, that diagram really helped me understand the water cycle.",
+    "How do I write a loop in Python that adds up a list of numbers?",
+    "Why is the sky blue? Please explain it like I'm hearing it for the first time."
+]
+
+def corpus(size, seed=7):
+    """Deterministic synthetic student messages"""
+    rng = random.Random(seed)
+    return [rng.choice(QUESTIONS) + (" " + rng.choice(QUESTIONS) if rng.random() < 0.3 else "") for _ in range(size)]
+
+def count_preprocessing(nlp_processor):
+    """Wrap preprocess_text on the instance to count calls"""
+    counter = {'calls': 0}
+    preprocess_text = nlp_processor.preprocess_text
+    
+    def counted(text):
+        counter['calls'] += 1
+        return preprocess_text(text)
+    
+    nlp_processor.preprocess_text = counted
+    return counter
+
+def before(nlp_processor, message, profile):
+    nlp_processor.extract_topics(message)
+    nlp_processor.analyze_sentiment(message)
+    nlp_processor.calculate_engagement_score(message)
+    nlp_processor.detect_learning_style(message)
+    nlp_processor.generate_personalized_response(message, profile)
+
+def after(nlp_processor, message, profile):
+    analysis = nlp_processor.analyze_message(message)
+    nlp_processor.generate_personalized_response(message, profile, topics=analysis.topics)
+
+def measure(path, nlp_processor, messages, profile):
+    counter = count_preprocessing(nlp_processor)
+    start = time.process_time()
+    for message in messages:
+        path(nlp_processor, message, profile)
+    elapsed = time.process_time() - start
+    del nlp_processor.preprocess_text
+    return elapsed / len(messages) * 1000, counter['calls'] / len(messages)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--with-model', action='store_true')
+    args = parser.parse_args()
+    
+    if not args.with_model:
+        model_registry.register(SENTIMENT_MODEL, lambda: None)
+    
+    nlp_processor = NLPProcessor()
+    messages = corpus(args.messages)
+    profile = {'learning_style': 'visual', 'skill_level': 5, 'response_time_preference': 5}
+    
+    # Warm up lazy imports and caches outside the measurement
+    after(nlp_processor, messages[0], profile)
+    
+    print(f"{'path':<8}{'CPU ms/message':>16}{'tokenizations/message':>24}")
+    for name, path in (('before', before), ('after', after)):
+        cpu_ms, tokenizations = measure(path, nlp_processor, messages, profile)
+        print(f"{name:<8}{cpu_ms:>16.3f}{tokenizations:>24.1f}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Fallback chains and hedged requests against local stand-in providers that inject latency
+
+Starts stand-ins for a GPT, a Claude and a custom model API. The GPT
+stand-in usually answers in --fast-ms but takes --slow-ms for a
+--slow-rate share of requests; Claude and the custom API answer in
+--backup-ms. Each answer streams a few tokens after its delay, and the
+server counts streams the client closed before the end.
+
+Reports latency percentiles for GPT alone and for the chain GPT -> Claude
+-> custom with hedging after GPT's p95, then sends requests while GPT fails
+with a 500. Checks that hedging cuts the tail, that losing streams are
+closed, and that every failed request is answered by Claude.
+
+Usage:
+    python -m benchmarks.provider_routing_bench [--requests 300] [--slow-rate 0.08]
+"""
+
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from app.models import provider_transport
+from app.models.ai_model import AIModelType
+from app.models.nlp_processor import NLPProcessor
+from app.models.provider_router import ProviderRouter, Route, model_key
+
+TOKENS = 8
+
+class LatencyInjectingProvider(BaseHTTPRequestHandler):
+    """/gpt, /claude and /custom stream an answer after an injected delay; /gpt-down fails"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        name = self.path.strip('/')
+        if name == 'gpt-down':
+            data = b'{"error": "unavailable"}'
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        
+        server = self.server
+        if name == 'gpt':
+            with server.lock:
+                slow = server.rng.random() < server.slow_rate
+            delay = server.slow_s if slow else server.fast_s
+        else:
+            delay = server.backup_s
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson' if name == 'custom' else 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            time.sleep(delay)
+            for i in range(TOKENS):
+                token = f"{name}{i} "
+                if name == 'gpt':
+                    self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n")
+                elif name == 'claude':
+                    self._chunk(f"data: {json.dumps({'completion': token, 'stop_reason': None})}\n\n")
+                else:
+                    self._chunk(json.dumps({'response': token}) + '\n')
+                time.sleep(0.005)
+            if name == 'gpt':
+                self._chunk("data: [DONE]\n\n")
+            elif name == 'claude':
+                self._chunk(f"data: {json.dumps({'completion': '', 'stop_reason': 'stop_sequence'})}\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with server.lock:
+                server.aborted += 1
+            self.close_connection = True
+    
+    def _chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--fast-ms', type=float, default=40.0)
+    parser.add_argument('--slow-ms', type=float, default=800.0)
+    parser.add_argument('--slow-rate', type=float, default=0.08)
+    parser.add_argument('--backup-ms', type=float, default=60.0)
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LatencyInjectingProvider)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.rng = random.Random(11)
+    server.fast_s, server.slow_s = args.fast_ms / 1000, args.slow_ms / 1000
+    server.slow_rate, server.backup_s = args.slow_rate, args.backup_ms / 1000
+    server.aborted = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    # Failures should reach the router, not be retried by the transport
+    provider_transport.init_app(SimpleNamespace(config={'PROVIDER_MAX_RETRIES': 0, 'PROVIDER_POOL_SIZE': 32}))
+    
+    # The handlers need no lexicon or knowledge base
+    processor = NLPProcessor.__new__(NLPProcessor)
+    preference = SimpleNamespace(api_key='stand-in', custom_parameters=None)
+    
+    def route(name, model_type, path, handle, stream):
+        model = SimpleNamespace(name=name, model_type=model_type, api_endpoint=f"{base}/{path}",
+                                api_key_required=False, parameters=None)
+        return Route(model_key(model), model, preference, handle, stream)
+    
+    gpt = route('stand-in', AIModelType.GPT, 'gpt', processor._handle_gpt_model, processor._stream_gpt_model)
+    gpt_down = route('stand-in-down', AIModelType.GPT, 'gpt-down', processor._handle_gpt_model, processor._stream_gpt_model)
+    claude = route('stand-in', AIModelType.CLAUDE, 'claude', processor._handle_claude_model, processor._stream_claude_model)
+    custom = route('stand-in', AIModelType.CUSTOM, 'custom', processor._handle_custom_model, processor._stream_custom_model)
+    kwargs = dict(user_message='What is photosynthesis?', user_profile={'skill_level': 5}, conversation_history=[], relevant_info={})
+    
+    failures = []
+    print(f"{'policy':>22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'hedges':>8}{'closed':>8}")
+    p99 = {}
+    for name, routes, hedge in (('gpt only', [gpt], False), ('gpt>claude>custom +hedge', [gpt, claude, custom], True)):
+        router = ProviderRouter(max_workers=8, min_samples=20)
+        aborted = server.aborted
+        latencies, hedges = [], 0
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            result = router.route(routes, kwargs, hedge=hedge)
+            latencies.append(time.perf_counter() - start)
+            if result is None:
+                failures.append(f"{name}: no answer")
+            else:
+                hedges += result.hedged
+        time.sleep(0.2)
+        closed = server.aborted - aborted
+        p99[name] = percentile(latencies, 0.99)
+        print(f"{name:>22}{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+              f"{p99[name] * 1000:>9.1f}{max(latencies) * 1000:>9.1f}{hedges:>8}{closed:>8}")
+        if hedge:
+            metrics = router.metrics()
+            if not hedges or not closed or not metrics[gpt.key]['cancelled'] + metrics[claude.key]['cancelled']:
+                failures.append(f"{name}: hedges {hedges}, losing streams closed {closed}")
+    
+    if p99['gpt>claude>custom +hedge'] > p99['gpt only'] / 2:
+        failures.append("hedging did not halve the p99 latency")
+    
+    router = ProviderRouter(max_workers=8)
+    answers = [router.route([gpt_down, claude, custom], kwargs) for _ in range(20)]
+    by_claude = sum(1 for answer in answers if answer and answer.key == claude.key)
+    metrics = router.metrics()
+    print(f"gpt failing: {by_claude}/20 answered by claude, "
+          f"gpt failures {metrics[gpt_down.key]['failures']}, fallbacks {metrics[gpt_down.key]['fallbacks']}")
+    if by_claude != 20:
+        failures.append("fallback did not answer every request")
+    
+    server.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Provider transport: keep-alive pooling, retries and timeouts against a local stand-in server
+
+Starts an HTTP/1.1 stand-in for a model provider on localhost and compares
+calling it with a bare requests.post per message (the previous handlers)
+against ProviderTransport with its pooled keep-alive session, counting the
+TCP connections the server accepted. Then checks that 429 and 503 responses
+are retried until the server answers, that the retries stop at max_retries,
+and that a stalled response ends at the read timeout instead of holding the
+caller.
+
+Usage:
+    python -m benchmarks.provider_transport_bench [--requests 500] [--threads 8]
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from app.models.provider_transport import ProviderTransport
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like a chat completion; /flaky/<n> fails n times per key, /stall never answers in time"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; without this, Nagle and delayed ACKs stall keep-alive replies
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        parts = self.path.strip('/').split('/')
+        if parts[0] == 'stall':
+            time.sleep(self.server.stall_seconds)
+        elif parts[0] == 'flaky':
+            with self.server.lock:
+                failures = self.server.failures[body.get('key')] = self.server.failures.get(body.get('key'), 0) + 1
+            if failures <= int(parts[2]):
+                self._reply(int(parts[1]), {'error': 'try again'}, {'Retry-After': '0'} if parts[1] == '429' else {})
+                return
+        time.sleep(self.server.latency_seconds)
+        self._reply(200, {'choices': [{'message': {'content': 'stand-in answer'}}]})
+    
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+def start_server(latency_seconds, stall_seconds):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.failures = {}
+    server.latency_seconds = latency_seconds
+    server.stall_seconds = stall_seconds
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(post, url, count, threads):
+    latencies = []
+    def call(i):
+        start = time.perf_counter()
+        response = post(url, json={'messages': [{'role': 'user', 'content': f'question {i}'}]})
+        response.json()
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(call, range(count)))
+    return time.perf_counter() - start, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='stand-in generation time')
+    args = parser.parse_args()
+    
+    server = start_server(args.latency_ms / 1000, stall_seconds=3.0)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = ProviderTransport('stand-in', connect_timeout=1.0, read_timeout=0.5,
+                                  max_retries=2, backoff_base=0.01, backoff_max=0.05, pool_size=args.threads)
+    
+    print(f"{'client':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'connections':>13}")
+    for name, post in (('bare', requests.post), ('pooled', transport.post)):
+        connections = server.connections
+        elapsed, latencies = run(post, f"{base}/chat", args.requests, args.threads)
+        latencies.sort()
+        print(f"{name:>10}{args.requests / elapsed:>10.0f}{statistics.median(latencies) * 1000:>10.2f}"
+              f"{latencies[int(len(latencies) * 0.95)] * 1000:>10.2f}{server.connections - connections:>13}")
+    
+    failures = []
+    for status in (429, 503):
+        response = transport.post(f"{base}/flaky/{status}/2", json={'key': f'recover-{status}'})
+        if response.status_code != 200:
+            failures.append(f"{status} twice then 200: got {response.status_code}")
+        response = transport.post(f"{base}/flaky/{status}/3", json={'key': f'give-up-{status}'})
+        if response.status_code != status or server.failures[f'give-up-{status}'] != 3:
+            failures.append(f"{status} past max_retries: got {response.status_code} after {server.failures[f'give-up-{status}']} attempts")
+    
+    start = time.perf_counter()
+    try:
+        transport.post(f"{base}/stall", json={})
+        failures.append("stalled response did not time out")
+    except requests.exceptions.ReadTimeout:
+        pass
+    stalled = time.perf_counter() - start
+    if stalled > 1.0:
+        failures.append(f"stalled response held the caller {stalled:.2f}s")
+    
+    metrics = transport.metrics()
+    print(f"retries {metrics['retries']}, timeouts {metrics['timeouts']} (stall released after {stalled:.2f}s), "
+          f"statuses {metrics['statuses']}, p50 {metrics['latency']['p50_ms']} ms, p95 {metrics['latency']['p95_ms']} ms")
+    server.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
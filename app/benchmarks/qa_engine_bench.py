@@ -0,0 +1,96 @@
+"""
+BERT handler question answering: whole context versus chunked QAEngine
+
+Builds 1, 8, 32 and 128 relevant passages (the real knowledge base texts
+padded with filler sentences to about 150 words each) and answers questions
+whose answer is in one of them, first by passing every passage to the
+question-answering pipeline as a single context, then with QAEngine (top-k
+chunks, cached encodings, one forward pass). Reports p50/p95 latency of both
+and how often they return the same answer.
+
+Needs transformers and torch.
+
+Usage:
+    python -m benchmarks.qa_engine_bench [--passages 1 8 32 128] [--repeats 5]
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+from app.models.model_registry import model_registry, QA_MODEL
+from app.models.qa_engine import QAEngine
+
+FACTS = [
+    ("math", "algebra", "Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols.", "What does algebra deal with?"),
+    ("math", "calculus", "Calculus is the mathematical study of continuous change.", "What is calculus the study of?"),
+    ("science", "physics", "Physics is the natural science that studies matter, its motion and behavior through space and time.", "What does physics study?"),
+    ("science", "biology", "Biology is the natural science that studies life and living organisms.", "What does biology study?"),
+    ("programming", "python", "Python is an interpreted, high-level, general-purpose programming language.", "What kind of language is Python?"),
+    ("history", "french revolution", "The French Revolution began in 1789 with the storming of the Bastille.", "When did the French Revolution begin?")
+]
+
+FILLER = [
+    "Students often review this topic several times before an exam.",
+    "Teachers usually introduce it with a short example.",
+    "Practice problems help to remember the main ideas.",
+    "Many textbooks cover it in an early chapter.",
+    "It connects to several other topics in the course."
+]
+
+def analyzer(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def passage(fact, rng):
+    sentences = [rng.choice(FILLER) for _ in range(14)]
+    sentences.insert(rng.randrange(len(sentences)), fact)
+    return " ".join(sentences)
+
+def relevant_info(count, answer_fact, rng):
+    """count passages, one of them holding answer_fact"""
+    info = {}
+    holder = rng.randrange(count)
+    for i in range(count):
+        subject, topic, fact, _ = answer_fact if i == holder else rng.choice(FACTS)
+        info.setdefault(subject, {})[f"{topic} {i}"] = passage(fact if i == holder else rng.choice(FILLER), rng)
+    return info
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--passages', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    qa = model_registry.get(QA_MODEL)
+    if qa is None:
+        raise SystemExit("The question-answering pipeline could not be loaded (transformers and torch are needed)")
+    
+    rng = random.Random(11)
+    print(f"{'passages':>9}{'context p50 ms':>16}{'context p95 ms':>16}{'engine p50 ms':>15}{'engine p95 ms':>15}{'same answer':>13}")
+    for count in args.passages:
+        engine = QAEngine(analyzer)
+        cases = [(fact[3], relevant_info(count, fact, rng)) for fact in FACTS]
+        context_ms, engine_ms, same = [], [], 0
+        for _ in range(args.repeats):
+            for question, info in cases:
+                context = "\n".join(text for topics in info.values() for text in topics.values())
+                start = time.perf_counter()
+                expected = qa(question=question, context=context)['answer']
+                context_ms.append((time.perf_counter() - start) * 1000)
+                
+                start = time.perf_counter()
+                found = engine.answer(qa, question, info)
+                engine_ms.append((time.perf_counter() - start) * 1000)
+                same += found is not None and found.answer.strip() == expected.strip()
+        
+        print(f"{count:>9}{statistics.median(context_ms):>16.1f}{percentile(context_ms, 0.95):>16.1f}"
+              f"{statistics.median(engine_ms):>15.1f}{percentile(engine_ms, 0.95):>15.1f}"
+              f"{same / len(context_ms):>13.0%}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
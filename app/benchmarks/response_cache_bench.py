@@ -0,0 +1,93 @@
+"""
+Rule-based response building: string concatenation, templates and the response cache
+
+Builds the reading/writing response (with the beginner and detailed-length
+adjustments) for 1, 5, 20 and 50 relevant entries of about 80 words each,
+with the previous += implementation, with the join-based templates, and
+through NLPProcessor._rule_based_response when the response is already
+cached. Checks that the previous and template outputs are identical.
+
+Usage:
+    python -m benchmarks.response_cache_bench [--entries 1 5 20 50] [--repeats 2000]
+"""
+
+import argparse
+import random
+import string
+import time
+from app.models.response_cache import LRUCache
+from app.models.nlp_processor import NLPProcessor
+
+def previous_response(relevant_info):
+    """The previous _adapt_for_reading_writing_learner, _adjust_for_skill_level(2) and _adjust_response_length(9)"""
+    response = "Here's a detailed explanation:\n\n"
+    for subject, topics in relevant_info.items():
+        response += f"# {subject.capitalize()}\n\n"
+        for topic, info in topics.items():
+            response += f"## {topic.capitalize()}\n"
+            response += f"{info}\n\n"
+            response += "Key points to note:\n"
+            sentences = info.split('.')
+            for i, sentence in enumerate(sentences[:3]):
+                if sentence.strip():
+                    response += f"- {sentence.strip()}.\n"
+            response += "\nTry writing these points down in your own words to better understand and remember them.\n\n"
+    if not relevant_info:
+        response += "I don't have specific textual information on this topic yet. Would you like me to provide some reading materials or written explanations?"
+    
+    response = response.replace("complex", "step-by-step")
+    response = "Let's start with the basics:\n\n" + response
+    response += "\n\nDon't worry if this seems challenging at first. We'll take it one step at a time."
+    
+    response += "\n\nSince you prefer detailed explanations, here are some additional insights:\n\n"
+    response += "- The concepts we've discussed connect to broader themes in this field\n"
+    response += "- Understanding these principles will help you tackle more advanced topics\n"
+    response += "- Consider exploring related concepts to deepen your knowledge"
+    return response
+
+def relevant_info(count, rng):
+    info = {}
+    for i in range(count):
+        sentences = [
+            " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(10)).capitalize()
+            for _ in range(8)
+        ]
+        info.setdefault(f"subject {i % 4}", {})[f"topic {i}"] = ". ".join(sentences) + "."
+    return info
+
+def per_call_us(call, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--entries', type=int, nargs='+', default=[1, 5, 20, 50])
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+    
+    # Only the response methods are used, so skip loading the lexicon and knowledge base
+    processor = NLPProcessor.__new__(NLPProcessor)
+    processor._response_cache = LRUCache(16)
+    profile = {'learning_style': 'reading_writing', 'skill_level': 2, 'response_time_preference': 9}
+    
+    def templates(info):
+        response = processor._adapt_for_reading_writing_learner(info)
+        return processor._adjust_response_length(processor._adjust_for_skill_level(response, 2), 9)
+    
+    rng = random.Random(3)
+    print(f"{'entries':>8}{'+= us':>10}{'templates us':>14}{'cached us':>11}{'identical':>11}")
+    for count in args.entries:
+        info = relevant_info(count, rng)
+        identical = previous_response(info) == templates(info)
+        processor._rule_based_response(info, profile, 1)
+        print(f"{count:>8}{per_call_us(lambda: previous_response(info), args.repeats):>10.1f}"
+              f"{per_call_us(lambda: templates(info), args.repeats):>14.1f}"
+              f"{per_call_us(lambda: processor._rule_based_response(info, profile, 1), args.repeats):>11.1f}"
+              f"{str(identical):>11}")
+        if not identical:
+            raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
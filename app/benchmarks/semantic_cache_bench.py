@@ -0,0 +1,98 @@
+"""
+Semantic LLM answer cache: hit rate, wrong answers and lookup cost
+
+Replays a course's question stream: 500 concepts asked with Zipf-distributed
+frequency, each time in one of several phrasings, sometimes with a typo. A
+miss stands for an LLM call of --llm-seconds and stores its answer. Reports
+the hit rate, how many hits returned the answer to a different concept, the
+lookup latency and the LLM time saved, for several similarity thresholds.
+
+Questions are tokenized by lowercasing, splitting on non-alphanumerics and
+dropping a short stopword list, so the benchmark needs no NLTK data.
+
+Usage:
+    python -m benchmarks.semantic_cache_bench [--questions 20000] [--thresholds 0.75 0.85 0.95]
+"""
+
+import argparse
+import random
+import re
+import statistics
+import string
+import time
+from app.models.semantic_cache import SemanticCache, CacheScope, question_vector
+
+STOPWORDS = {"what", "is", "are", "a", "an", "the", "of", "in", "on", "to", "how", "do", "does", "i",
+             "can", "you", "me", "about", "don", "t", "s", "why", "work", "works", "my", "with"}
+
+PHRASINGS = [
+    "What is {}?",
+    "Can you explain {}?",
+    "explain {} please",
+    "Tell me about {}",
+    "what's {}",
+    "I don't understand {}",
+    "How does {} work?",
+    "{}?"
+]
+
+def analyzer(text):
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS]
+
+def concepts(count, rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(count // 2)]
+    result = set()
+    while len(result) < count:
+        result.add(" ".join(rng.sample(words, rng.randint(1, 3))))
+    return sorted(result)
+
+def typo(text, rng):
+    position = rng.randrange(len(text) - 1)
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--questions', type=int, default=20000)
+    parser.add_argument('--concepts', type=int, default=500)
+    parser.add_argument('--typo-rate', type=float, default=0.1)
+    parser.add_argument('--llm-seconds', type=float, default=2.0)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.75, 0.85, 0.95])
+    args = parser.parse_args()
+    
+    rng = random.Random(13)
+    names = concepts(args.concepts, rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(names))]
+    stream = []
+    for concept in rng.choices(range(len(names)), weights=weights, k=args.questions):
+        question = rng.choice(PHRASINGS).format(names[concept])
+        if rng.random() < args.typo_rate:
+            question = typo(question, rng)
+        stream.append((concept, question))
+    
+    scope = CacheScope('gpt:bench', ('science',), 'visual', 'intermediate')
+    print(f"{'threshold':>10}{'hit rate':>10}{'wrong':>8}{'lookup p50 us':>15}{'lookup p95 us':>15}{'LLM time saved':>16}")
+    for threshold in args.thresholds:
+        cache = SemanticCache(maxsize=2048, threshold=threshold)
+        hits, wrong, latencies = 0, 0, []
+        for concept, question in stream:
+            start = time.perf_counter()
+            vector = question_vector(analyzer(question))
+            hit = cache.get(scope, vector)
+            latencies.append(time.perf_counter() - start)
+            if hit:
+                hits += 1
+                wrong += hit.response != names[concept]
+            else:
+                cache.put(scope, vector, names[concept], args.llm_seconds)
+        
+        saved = cache.metrics()['latency_saved_s']
+        print(f"{threshold:>10.2f}{hits / len(stream):>10.1%}{wrong / max(hits, 1):>8.2%}"
+              f"{statistics.median(latencies) * 1e6:>15.0f}{percentile(latencies, 0.95) * 1e6:>15.0f}"
+              f"{saved / (len(stream) * args.llm_seconds):>16.1%}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
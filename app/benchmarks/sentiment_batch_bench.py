@@ -0,0 +1,112 @@
+"""
+Sentiment throughput benchmark with and without micro-batching
+
+Runs 1, 8, 32 and 128 concurrent callers against the sentiment model, first
+calling it once per text and then through the MicroBatcher, and reports
+throughput, latency percentiles and the average batch size.
+
+The real Hugging Face pipeline is used when transformers is installed.
+--synthetic (the default without transformers) replaces it with a cost model
+of a CPU forward pass: a fixed per-call overhead plus a smaller per-item cost,
+executed by one inference engine at a time.
+
+Usage:
+    python -m benchmarks.sentiment_batch_bench [--seconds 5] [--batch-size 32] [--wait-ms 5] [--synthetic]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from app.models.micro_batcher import MicroBatcher
+
+TEXTS = [
+    "I finally understand how recursion works, thanks!",
+    "This explanation of derivatives is confusing and unclear.",
+    "Can you give me another example of a chemical bond?",
+    "The diagram really helped, great job."
+]
+
+class SyntheticSentimentModel:
+    """Stand-in for a CPU pipeline: fixed call overhead plus per-item cost, one call at a time"""
+    
+    def __init__(self, call_overhead_ms=8.0, per_item_ms=0.5):
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self._engine = threading.Lock()
+    
+    def __call__(self, texts, **kwargs):
+        batch = [texts] if isinstance(texts, str) else texts
+        with self._engine:
+            time.sleep(self.call_overhead + self.per_item * len(batch))
+        return [{'label': 'POSITIVE', 'score': 0.9} for _ in batch]
+
+def load_model(synthetic):
+    if not synthetic:
+        try:
+            from transformers import pipeline
+            return pipeline('sentiment-analysis'), 'transformers pipeline'
+        except ImportError:
+            pass
+    return SyntheticSentimentModel(), 'synthetic cost model'
+
+def run(call, concurrency, seconds):
+    """
+    Call the model from concurrent threads for a fixed time
+    
+    Returns:
+        tuple: (throughput per second, p50 ms, p95 ms)
+    """
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    
+    def worker(index):
+        local = []
+        i = index
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            call(TEXTS[i % len(TEXTS)])
+            local.append(time.perf_counter() - start)
+            i += 1
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    return len(latencies) / seconds, statistics.median(latencies) * 1000, p95 * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--wait-ms', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--synthetic', action='store_true')
+    args = parser.parse_args()
+    
+    model, description = load_model(args.synthetic)
+    print(f"Model: {description}; batch size {args.batch_size}, max wait {args.wait_ms} ms")
+    print(f"{'callers':>8}{'mode':>10}{'texts/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'avg batch':>11}")
+    
+    for concurrency in args.concurrency:
+        throughput, p50, p95 = run(lambda text: model(text)[0], concurrency, args.seconds)
+        print(f"{concurrency:>8}{'single':>10}{throughput:>10.1f}{p50:>10.1f}{p95:>10.1f}{1.0:>11.1f}")
+        
+        batcher = MicroBatcher(
+            lambda texts: model(texts, batch_size=len(texts)),
+            max_batch_size=args.batch_size,
+            max_wait_ms=args.wait_ms
+        )
+        throughput, p50, p95 = run(batcher, concurrency, args.seconds)
+        print(f"{concurrency:>8}{'batched':>10}{throughput:>10.1f}{p50:>10.1f}{p95:>10.1f}"
+              f"{batcher.metrics()['avg_batch_size']:>11.1f}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
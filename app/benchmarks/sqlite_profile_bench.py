@@ -0,0 +1,138 @@
+"""
+Concurrent read/write throughput benchmark for the SQLite database profiles
+
+Runs dashboard-style readers alongside /tutor/ask-style writers (one
+Conversation insert and commit per operation) against a temporary database,
+first with the default profile and then with the sqlite-production profile.
+
+Usage:
+    python -m benchmarks.sqlite_profile_bench [--seconds 5] [--readers 8] [--writers 4]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import func, desc
+from sqlalchemy.orm import sessionmaker
+from app.database.db import build_engine, build_read_engine, pool_metrics, read_pool_metrics
+from app.models.base import Base
+from app.models.learning_session import LearningSession, Conversation
+
+def seed(engine, sessions=50, conversations_per_session=100):
+    """Create the schema and a single user's learning history"""
+    Base.metadata.create_all(bind=engine)
+    db_session = sessionmaker(bind=engine)()
+    for i in range(sessions):
+        learning_session = LearningSession(user_id=1, subject=f"subject-{i % 5}", topic=f"topic-{i}")
+        db_session.add(learning_session)
+        db_session.flush()
+        for j in range(conversations_per_session):
+            db_session.add(Conversation(
+                learning_session_id=learning_session.id,
+                message=f"question {j}",
+                response=f"answer {j}"
+            ))
+    db_session.commit()
+    db_session.close()
+
+def read_once(db_session):
+    """Dashboard overview style query set"""
+    db_session.query(func.count(Conversation.id)).join(LearningSession).filter(
+        LearningSession.user_id == 1
+    ).scalar()
+    db_session.query(LearningSession).filter_by(user_id=1).order_by(
+        desc(LearningSession.start_time)
+    ).limit(5).all()
+    db_session.query(LearningSession.subject, func.count(LearningSession.id)).filter_by(
+        user_id=1
+    ).group_by(LearningSession.subject).all()
+
+def write_once(db_session, session_id):
+    """Tutor message style insert"""
+    db_session.add(Conversation(learning_session_id=session_id, message="new question", response="new answer"))
+    db_session.commit()
+
+def run_profile(profile, seconds, readers, writers):
+    """
+    Run the mixed workload against a fresh database
+    
+    Returns:
+        dict: Operation counts and throughput
+    """
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+    config = {
+        'DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        'DATABASE_PROFILE': profile,
+        'DATABASE_POOL_SIZE': readers + writers,
+        'DATABASE_MAX_OVERFLOW': 0,
+        'DATABASE_READ_POOL_SIZE': readers
+    }
+    pool_metrics.reset()
+    read_pool_metrics.reset()
+    
+    engine = build_engine(config)
+    read_engine = build_read_engine(config) or engine
+    seed(engine)
+    
+    write_factory = sessionmaker(bind=engine)
+    read_factory = sessionmaker(bind=read_engine)
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    counts_lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    
+    def worker(factory, operation):
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            db_session = factory()
+            try:
+                operation(db_session)
+                done += 1
+            except Exception:
+                db_session.rollback()
+                errors += 1
+            finally:
+                db_session.close()
+        key = 'writes' if factory is write_factory else 'reads'
+        with counts_lock:
+            counts[key] += done
+            counts['errors'] += errors
+    
+    threads = [threading.Thread(target=worker, args=(read_factory, read_once)) for _ in range(readers)]
+    threads += [
+        threading.Thread(target=worker, args=(write_factory, lambda s, i=i: write_once(s, i % 50 + 1)))
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+    
+    return {
+        'profile': profile,
+        'reads_per_sec': counts['reads'] / seconds,
+        'writes_per_sec': counts['writes'] / seconds,
+        'errors': counts['errors'],
+        'writer_max_wait_ms': pool_metrics.to_dict()['max_wait_ms']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    args = parser.parse_args()
+    
+    print(f"{'profile':<20}{'reads/s':>12}{'writes/s':>12}{'errors':>10}{'writer max wait ms':>22}")
+    for profile in ('default', 'sqlite-production'):
+        result = run_profile(profile, args.seconds, args.readers, args.writers)
+        print(f"{result['profile']:<20}{result['reads_per_sec']:>12.1f}{result['writes_per_sec']:>12.1f}"
+              f"{result['errors']:>10}{result['writer_max_wait_ms']:>22.1f}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Worker startup benchmark for the NLP model loading modes
+
+Starts a fresh interpreter per mode, builds the app and an NLPProcessor the
+way the API blueprints do at import time, then serves one tutor-style message
+(sentiment, topics, personalized response). Reports the time from interpreter
+start to ready, the first response latency and the resident set size.
+
+Modes:
+    lazy   - models load on first use (default)
+    eager  - every registered model is warmed up at startup (NLP_WARMUP_MODELS=all),
+             which matches the previous behaviour of NLPProcessor.__init__
+    full-nltk - lazy models, but stopwords and lemmas come from the NLTK corpora
+             (NLP_FULL_NLTK=true) instead of the prebuilt lexicon
+
+Usage:
+    python -m benchmarks.startup_bench [--modes lazy eager full-nltk]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+MESSAGE = "Can you explain how photosynthesis works in plants? I find it confusing."
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(start):
+    """Measure one worker start; prints a JSON result line"""
+    from app import create_app
+    from app.models.nlp_processor import NLPProcessor
+    from app.models.model_registry import model_registry
+    
+    create_app()
+    nlp_processor = NLPProcessor()
+    ready = time.time()
+    ready_rss = rss_mb()
+    
+    nlp_processor.analyze_sentiment(MESSAGE)
+    topics = nlp_processor.extract_topics(MESSAGE)
+    nlp_processor.generate_personalized_response(MESSAGE, {'learning_style': 'visual'})
+    responded = time.time()
+    
+    print(json.dumps({
+        'import_to_ready_s': ready - start,
+        'first_response_s': responded - ready,
+        'import_to_first_response_s': responded - start,
+        'rss_ready_mb': ready_rss,
+        'rss_after_first_response_mb': rss_mb(),
+        'topics': topics,
+        'nltk_imported': 'nltk' in sys.modules,
+        'models': {name: state['loaded'] for name, state in model_registry.stats().items()}
+    }))
+
+def run_mode(mode):
+    """Run the child measurement in a fresh interpreter"""
+    env = dict(os.environ)
+    env['NLP_WARMUP_MODELS'] = 'all' if mode == 'eager' else ''
+    env['NLP_FULL_NLTK'] = 'true' if mode == 'full-nltk' else 'false'
+    env.setdefault('DATABASE_URI', 'sqlite://')
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup_bench', '--child', str(time.time())],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--modes', nargs='+', default=['lazy', 'eager', 'full-nltk'], choices=['lazy', 'eager', 'full-nltk'])
+    parser.add_argument('--child', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(args.child)
+        return
+    
+    print(f"{'mode':<10}{'to ready s':>12}{'first resp s':>14}{'to first resp s':>17}{'RSS ready MB':>14}{'RSS after MB':>14}{'NLTK':>6}  loaded models")
+    for mode in args.modes:
+        result = run_mode(mode)
+        loaded = ', '.join(name for name, loaded in result['models'].items() if loaded) or '-'
+        print(f"{mode:<10}{result['import_to_ready_s']:>12.2f}{result['first_response_s']:>14.3f}"
+              f"{result['import_to_first_response_s']:>17.2f}{result['rss_ready_mb']:>14.1f}"
+              f"{result['rss_after_first_response_mb']:>14.1f}{'yes' if result['nltk_imported'] else 'no':>6}  {loaded}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
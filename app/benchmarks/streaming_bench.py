@@ -0,0 +1,136 @@
+"""
+Streaming model responses: time to first token against a local stand-in provider
+
+Starts a stand-in for the OpenAI, Anthropic and custom model APIs that
+generates --tokens tokens, one every --token-ms milliseconds, and answers
+either with the whole completion or, when the request asks for a stream,
+with SSE (OpenAI, Anthropic) or NDJSON (custom) chunks. For each provider,
+reports when the first text reaches the caller and when the answer is
+complete, with and without streaming, and checks that the streamed parts
+join to the same answer.
+
+Usage:
+    python -m benchmarks.streaming_bench [--tokens 60] [--token-ms 20]
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from app.models.ai_model import AIModelType
+from app.models.nlp_processor import NLPProcessor
+
+class StandInProvider(BaseHTTPRequestHandler):
+    """/openai, /anthropic and /custom answer in the format of each provider"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        provider = self.path.strip('/')
+        tokens = [f"word{i} " for i in range(self.server.tokens)]
+        if not body.get('stream'):
+            time.sleep(self.server.token_seconds * len(tokens))
+            text = ''.join(tokens)
+            payload = {
+                'openai': {'choices': [{'message': {'content': text}}]},
+                'anthropic': {'completion': text, 'stop_reason': 'stop_sequence'},
+                'custom': {'response': text}
+            }[provider]
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson' if provider == 'custom' else 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for token in tokens:
+            time.sleep(self.server.token_seconds)
+            if provider == 'openai':
+                self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n")
+            elif provider == 'anthropic':
+                self._chunk(f"event: completion\ndata: {json.dumps({'type': 'completion', 'completion': token, 'stop_reason': None})}\n\n")
+            else:
+                self._chunk(json.dumps({'response': token}) + '\n')
+        if provider == 'openai':
+            self._chunk("data: [DONE]\n\n")
+        elif provider == 'anthropic':
+            self._chunk(f"event: completion\ndata: {json.dumps({'type': 'completion', 'completion': '', 'stop_reason': 'stop_sequence'})}\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+    
+    def _chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+def timed(parts):
+    """Seconds to the first part and to the end, and the joined text"""
+    start = time.perf_counter()
+    first, text = None, []
+    for part in parts:
+        if first is None:
+            first = time.perf_counter() - start
+        text.append(part)
+    return first, time.perf_counter() - start, ''.join(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tokens', type=int, default=60)
+    parser.add_argument('--token-ms', type=float, default=20.0)
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInProvider)
+    server.daemon_threads = True
+    server.tokens = args.tokens
+    server.token_seconds = args.token_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    # The handlers need no lexicon or knowledge base
+    processor = NLPProcessor.__new__(NLPProcessor)
+    preference = SimpleNamespace(api_key='stand-in', custom_parameters=None)
+    profile = {'learning_style': 'visual', 'skill_level': 5}
+    providers = [
+        ('openai', AIModelType.GPT, processor._handle_gpt_model, processor._stream_gpt_model),
+        ('anthropic', AIModelType.CLAUDE, processor._handle_claude_model, processor._stream_claude_model),
+        ('custom', AIModelType.CUSTOM, processor._handle_custom_model, processor._stream_custom_model)
+    ]
+    
+    failures = []
+    print(f"{'provider':>10}{'complete s':>12}{'stream first s':>16}{'stream done s':>15}{'identical':>11}")
+    for name, model_type, handle, stream in providers:
+        model = SimpleNamespace(name=name, model_type=model_type, api_endpoint=f"{base}/{name}",
+                                api_key_required=True, parameters=None)
+        call = dict(user_message='What is photosynthesis?', user_profile=profile, conversation_history=[],
+                    ai_model=model, ai_model_preference=preference, relevant_info={})
+        _, complete_s, complete = timed(handle(**call) for _ in range(1))
+        first_s, done_s, streamed = timed(stream(**call))
+        identical = bool(complete) and streamed == complete
+        print(f"{name:>10}{complete_s:>12.3f}{first_s if first_s is not None else float('nan'):>16.3f}{done_s:>15.3f}{str(identical):>11}")
+        if not identical:
+            failures.append(f"{name}: streamed answer differs from the complete one")
+        elif first_s > complete_s / 4:
+            failures.append(f"{name}: first token after {first_s:.3f}s")
+    
+    server.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+Word tokenizer throughput, nltk.word_tokenize versus RegexTokenizer
+
+Tokenizes the synthetic student messages of token_cache_bench (lowercased, as
+preprocess_text does) with each backend and reports messages and
+alphanumeric tokens per second. Without the Punkt data, NLTK runs its Punkt
+sentence tokenizer with the fallback parameters, as in tokenizer_conformance.
+
+Usage:
+    python -m benchmarks.tokenizer_bench [--messages 100000]
+"""
+
+import argparse
+import time
+from app.models.tokenizers import RegexTokenizer, load_sentence_parameters
+from benchmarks.token_cache_bench import corpus
+from benchmarks.tokenizer_conformance import load_reference
+
+def measure(tokenize, messages):
+    start = time.perf_counter()
+    tokens = sum(len([token for token in tokenize(message) if token.isalnum()]) for message in messages)
+    elapsed = time.perf_counter() - start
+    return len(messages) / elapsed, tokens / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=100000)
+    args = parser.parse_args()
+    
+    messages = [message.lower() for message in corpus(args.messages)]
+    sentence_parameters = load_sentence_parameters()
+    reference, with_punkt = load_reference(sentence_parameters)
+    backends = (
+        ('nltk' if with_punkt else 'nltk*', reference),
+        ('regex', RegexTokenizer(sentence_parameters).tokenize)
+    )
+    
+    print(f"{args.messages} messages")
+    print(f"{'backend':<8}{'messages/s':>14}{'tokens/s':>14}")
+    for name, tokenize in backends:
+        messages_per_second, tokens_per_second = measure(tokenize, messages)
+        print(f"{name:<8}{messages_per_second:>14.0f}{tokens_per_second:>14.0f}")
+    if not with_punkt:
+        print("* Punkt data not installed: Punkt with fallback parameters")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Conformance check of RegexTokenizer against nltk.word_tokenize
+
+For every text of a fixed corpus of student messages and tricky punctuation,
+plus generated variations, the alphanumeric tokens of RegexTokenizer must
+equal the alphanumeric tokens of nltk.word_tokenize, in the original case and
+lowercased (as preprocess_text tokenizes). Exits with status 1 on any
+difference.
+
+nltk.word_tokenize needs the Punkt data. Without it the reference is NLTK's
+Punkt sentence tokenizer with the built-in fallback parameters RegexTokenizer
+uses, followed by the Treebank word tokenizer.
+
+Usage:
+    python -m benchmarks.tokenizer_conformance [--generated 20000] [--show 20]
+"""
+
+import argparse
+import random
+import sys
+from collections import defaultdict
+from app.models.tokenizers import RegexTokenizer, load_sentence_parameters
+
+CORPUS = [
+    "Can you explain how photosynthesis works in plants?",
+    "I don't understand why the derivative of x squared is 2x.",
+    "What's the difference between mitosis and meiosis? I find it confusing.",
+    "I can't see it. Can you show me a diagram?",
+    "We're studying the French Revolution (1789-1799) in class.",
+    "My teacher, Dr. Smith, said the answer is 3.14 but I got 3.",
+    "Is it true that e.g. whales are mammals, i.e. they breathe air?",
+    "The U.S. Constitution was signed in 1787. Who signed it?",
+    "I'm gonna need more practice, I wanna get this right!",
+    "Lemme try again... gimme a second.",
+    "You cannot divide by zero, can you?",
+    "It's 5 p.m. and I still haven't finished my homework.",
+    "He said \"the mitochondria is the powerhouse of the cell\" and left.",
+    "She asked: 'why is the sky blue?'",
+    "“Smart quotes” and ‘single ones’ should work too.",
+    "What about «guillemets» in French texts?",
+    "Use a for-loop -- or a while-loop -- to add the numbers.",
+    "The formula is a*b + c; then divide by 2.",
+    "Email me at student@example.com or visit www.example.com/help.",
+    "I scored 85% on the test & I'm happy #winning",
+    "Why?? Why does this happen?!",
+    "The students' results were better than the teacher's.",
+    "Ok.",
+    "Hmm...",
+    "Chapter 3. Quadratic equations.",
+    "See fig. 2 for the diagram.",
+    "'Tis the season to study, 'twas said.",
+    "I'd like to know how you'd solve it, and we'll see.",
+    "They've said it's fine; you're right.",
+    "Numbers like 1,000,000 and 3,5 and 2.5.",
+    "Time is 10:30, ratio 3:1 and list: apples, pears.",
+    "Brackets [like this] and {these} and <those> matter.",
+    "Ends with a parenthesis (like this.)",
+    "Quoted at the end \"like this.\"",
+    "Multiple   spaces\tand\nnew lines.",
+    "Mr. and Mrs. Jones went to St. Louis on Jan. 5th.",
+    "J. K. Rowling wrote Harry Potter.",
+    "Read section 2.3. then answer question 4.",
+    "The value of pi is approx. 3.14159.",
+    "A. B. C. are options; choose one.",
+    "first_name and last_name are variables",
+    "x=5, y=10; what is x+y?",
+    "C++ and C# are programming languages.",
+    "Don't, won't, shouldn't, couldn't, wouldn't.",
+    "It is O'Neil's book, isn't it?",
+    "I have 2 questions: 1) what is it? 2) why?",
+    "end. )",
+    "The end.'",
+    "Is this right?.",
+    "Really!? Yes.",
+    "Well... I think so.",
+    "The year 2024. It was great.",
+    "ok.then what",
+    "H2O is water. CO2 is carbon dioxide.",
+    "1.‘",
+    ";Y$Dr.“",
+    "She said it.“ Then left.",
+    "end. “",
+    "Fig.« 3"
+]
+
+WORDS = [
+    "photosynthesis", "plants", "derivative", "x", "2x", "3", "3.14", "1,000", "dr", "mr", "etc",
+    "e.g", "i", "can", "cannot", "gonna", "wanna", "don't", "it's", "students'", "o'neil",
+    "well-known", "first_name", "q", "a", "the", "why", "what", "u.s", "co2", "café", "naïve"
+]
+PREFIXES = ["", "", "", "(", "\"", "'", "“", "‘", "[", "«", "`", "--", "<"]
+SUFFIXES = ["", "", "", "", ".", ",", "?", "!", ":", ";", ")", "\"", "'", "”", "’", "...", ".)", ".\"",
+            "?!", "--", "%", "s", "'s", "n't", "]", ">", "»", ".“", ".‘", ".«", ".)“", ".”"]
+
+def generated(count, seed=3):
+    """Deterministic random messages built from tricky words and punctuation"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(1, 12)):
+            word = rng.choice(WORDS)
+            if rng.random() < 0.3:
+                word = word.capitalize()
+            words.append(rng.choice(PREFIXES) + word + rng.choice(SUFFIXES))
+        texts.append(" ".join(words))
+    return texts
+
+def load_reference(sentence_parameters):
+    """
+    Get the reference tokenizer
+    
+    Args:
+        sentence_parameters (SentenceParameters): Parameters used without the Punkt data
+    
+    Returns:
+        tuple: (tokenize function, True if it is nltk.word_tokenize itself)
+    """
+    from nltk.tokenize import word_tokenize, NLTKWordTokenizer
+    from nltk.tokenize.punkt import PunktParameters, PunktSentenceTokenizer
+    try:
+        word_tokenize("Punkt check. Done.")
+        return word_tokenize, True
+    except LookupError:
+        pass
+    
+    params = PunktParameters()
+    params.abbrev_types = set(sentence_parameters.abbrev_types)
+    params.collocations = set(sentence_parameters.collocations)
+    params.sent_starters = set(sentence_parameters.sent_starters)
+    params.ortho_context = defaultdict(int, sentence_parameters.ortho_context)
+    sentence_tokenizer = PunktSentenceTokenizer(params)
+    word_tokenizer = NLTKWordTokenizer()
+    
+    def tokenize(text):
+        return [token for sentence in sentence_tokenizer.tokenize(text) for token in word_tokenizer.tokenize(sentence)]
+    return tokenize, False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--generated', type=int, default=20000)
+    parser.add_argument('--show', type=int, default=20)
+    args = parser.parse_args()
+    
+    sentence_parameters = load_sentence_parameters()
+    reference, with_punkt = load_reference(sentence_parameters)
+    tokenizer = RegexTokenizer(sentence_parameters)
+    if not with_punkt:
+        print("Punkt data not installed: checking against Punkt with the built-in fallback parameters")
+    
+    checked = 0
+    mismatches = []
+    for text in CORPUS + generated(args.generated):
+        for variant in (text, text.lower()):
+            checked += 1
+            expected = [token for token in reference(variant) if token.isalnum()]
+            actual = tokenizer.tokenize(variant)
+            if actual != expected:
+                mismatches.append((variant, expected, actual))
+    
+    print(f"{checked} texts checked, {len(mismatches)} mismatches")
+    for text, expected, actual in mismatches[:args.show]:
+        print(f"\n{text!r}\n  nltk:  {expected}\n  regex: {actual}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template_string, request, jsonify, session, redirect, url_for
 import os
 import random
 import json
@@ -388,8 +388,12 @@ def setup_dashboard_routes(app):
         
         if not subject or not message:
             return jsonify({'error': 'Missing subject or message'}), 400
-            
+        
         response = get_ai_response(subject, message)
+        if data.get('stream'):
+            # Same NDJSON lines as the streaming /api/chat; the canned answer is a single chunk
+            lines = [json.dumps({'token': response}), json.dumps({'done': True})]
+            return Response('\n'.join(lines) + '\n', mimetype='application/x-ndjson')
         return jsonify({'response': response})
     
     @app.route('/quizzes/<subject>')
@@ -398,7 +402,7 @@ def setup_dashboard_routes(app):
             return redirect(url_for('home'))
         if subject not in quizzes:
             return redirect(url_for('dashboard'))
-            
+        
         return render_template_string(
             quiz_list_template,
             subject=subject,
@@ -409,7 +413,7 @@ def setup_dashboard_routes(app):
     def take_quiz(quiz_id):
         if 'username' not in session:
             return redirect(url_for('home'))
-            
+        
         # Find the quiz
         quiz = None
         for subject_quizzes in quizzes.values():
@@ -419,10 +423,10 @@ def setup_dashboard_routes(app):
                     break
             if quiz:
                 break
-                
+        
         if not quiz:
             return redirect(url_for('dashboard'))
-            
+        
         return render_template_string(
             quiz_template,
             quiz=quiz
@@ -432,13 +436,13 @@ def setup_dashboard_routes(app):
     def submit_quiz(quiz_id):
         if 'username' not in session:
             return jsonify({'error': 'Not logged in'}), 401
-            
+        
         data = request.json
         answers = data.get('answers')
         
         if not answers:
             return jsonify({'error': 'No answers provided'}), 400
-            
+        
         # Find the quiz
         quiz = None
         for subject_quizzes in quizzes.values():
@@ -448,17 +452,17 @@ def setup_dashboard_routes(app):
                     break
             if quiz:
                 break
-                
+        
         if not quiz:
             return jsonify({'error': 'Quiz not found'}), 404
-            
+        
         # Calculate score
         score = 0
         total = len(quiz['questions'])
         for i, answer in enumerate(answers):
             if i < total and answer == quiz['questions'][i]['correct']:
                 score += 1
-                
+        
         # Save result
         username = session['username']
         if username not in quiz_results:
@@ -1588,15 +1592,47 @@ session_template = '''
                     },
                     body: JSON.stringify({
                         message: message,
-                        subject: '{{ subject }}'
+                        subject: '{{ subject }}',
+                        stream: true
                     })
                 });
                 
-                const data = await response.json();
-                if (data.error) {
+                // Errors are plain JSON; answers arrive as NDJSON lines
+                if (!response.ok || !response.body || !(response.headers.get('Content-Type') || '').includes('ndjson')) {
+                    const data = await response.json();
+                    if (data.error) {
+                        appendMessage('System', 'Sorry, there was an error processing your request.', 'ai-message');
+                    } else {
+                        appendMessage('AI Tutor', data.response, 'ai-message');
+                    }
+                    return;
+                }
+                
+                // Render each token as soon as it arrives
+                const answer = appendStreamingMessage('AI Tutor', 'ai-message');
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let failed = false;
+                while (true) {
+                    const result = await reader.read();
+                    if (result.done) break;
+                    buffer += decoder.decode(result.value, { stream: true });
+                    const lines = buffer.split('\\n');
+                    buffer = lines.pop();
+                    for (const line of lines) {
+                        if (!line.trim()) continue;
+                        const event = JSON.parse(line);
+                        if (event.token) {
+                            answer.textContent += event.token;
+                            chatContainer.scrollTop = chatContainer.scrollHeight;
+                        } else if (event.error) {
+                            failed = true;
+                        }
+                    }
+                }
+                if (failed) {
                     appendMessage('System', 'Sorry, there was an error processing your request.', 'ai-message');
-                } else {
-                    appendMessage('AI Tutor', data.response, 'ai-message');
                 }
             } catch (error) {
                 appendMessage('System', 'Sorry, there was an error connecting to the server.', 'ai-message');
@@ -1611,6 +1647,17 @@ session_template = '''
             chatContainer.scrollTop = chatContainer.scrollHeight;
         }
         
+        // Message whose text is filled in while the answer streams
+        function appendStreamingMessage(sender, className) {
+            const messageDiv = document.createElement('div');
+            messageDiv.className = `chat-message ${className}`;
+            messageDiv.innerHTML = `<strong>${sender}:</strong> `;
+            const text = document.createElement('span');
+            messageDiv.appendChild(text);
+            chatContainer.appendChild(messageDiv);
+            return text;
+        }
+        
         // Handle enter key in chat input
         userInput.addEventListener('keypress', (e) => {
             if (e.key === 'Enter') {
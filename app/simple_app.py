@@ -1,6 +1,7 @@
-from flask import Flask, render_template_string, request, jsonify, session, redirect, url_for, send_from_directory
+from flask import Flask, Response, render_template_string, request, jsonify, session, redirect, url_for, send_from_directory, stream_with_context
 import os
 import random
+import json
 import google.generativeai as genai
 # Import our dashboard functionality
 from dashboard import setup_dashboard_routes, video_content, teachers, progress_data, session_template
@@ -421,6 +422,24 @@ def chat():
     if not user_input:
         return jsonify({'error': 'No message provided'}), 400
     
+    if data.get('stream'):
+        # Forward Gemini's chunks as NDJSON lines while they are generated
+        def generate():
+            try:
+                for chunk in model.generate_content(user_input, stream=True):
+                    if chunk.text:
+                        yield json.dumps({'token': chunk.text}) + '\n'
+                yield json.dumps({'done': True}) + '\n'
+            except Exception as e:
+                print(f"Error: {str(e)}")
+                yield json.dumps({'error': 'Failed to get response from AI model'}) + '\n'
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
     try:
         # Get response from Gemini
         response = model.generate_content(user_input)